@@ -0,0 +1,28 @@
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from app.core.config import get_settings
+from app.metrics.collectors import collect
+from app.metrics.multiprocess import worker_metrics_files
+from app.metrics.registry import render
+
+settings = get_settings()
+
+router = APIRouter()
+
+EXPOSITION_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus scrape endpoint, exempt from JWT auth; guarded by METRICS_AUTH_TOKEN instead."""
+    expected = f"Bearer {settings.METRICS_AUTH_TOKEN}"
+    if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    if worker_metrics_files is not None:
+        families = await worker_metrics_files.collect_all()
+    else:
+        families = collect()
+    return Response(render(families), media_type=EXPOSITION_MEDIA_TYPE)
@@ -0,0 +1,79 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.cache.notify import version_broadcaster
+from app.capture.traffic import traffic_capture
+from app.cache.reference import reference_cache, user_context_cache
+from app.cache.responses import response_cache
+from app.db.pool import pool_stats
+from app.db.session import engine
+from app.db.single_flight import single_flight
+from app.dependencies.admin import require_admin
+from app.limits.bulkheads import tenant_bulkheads
+from app.limits.rate import rate_limiter
+from app.profiling.loop_monitor import loop_monitor
+from app.schemas.response import APIResponse
+from app.tracing.export import detail, summary, trace_buffer, trace_exporter
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/db-pool", response_model=APIResponse[dict])
+async def get_db_pool_stats():
+    data = pool_stats.snapshot(engine.sync_engine.pool)
+    data["single_flight"] = single_flight.snapshot()
+    return APIResponse(success=True, code=200, data=data)
+
+
+@router.get("/response-cache", response_model=APIResponse[dict])
+async def get_response_cache_stats():
+    return APIResponse(success=True, code=200, data=response_cache.snapshot())
+
+
+@router.get("/reference-cache", response_model=APIResponse[dict])
+async def get_reference_cache_stats():
+    data = reference_cache.snapshot()
+    data["user_context"] = user_context_cache.snapshot()
+    data["notify"] = version_broadcaster.snapshot()
+    return APIResponse(success=True, code=200, data=data)
+
+
+@router.get("/rate-limits", response_model=APIResponse[dict])
+async def get_rate_limit_stats():
+    data = rate_limiter.snapshot()
+    data["bulkheads"] = tenant_bulkheads.snapshot()
+    return APIResponse(success=True, code=200, data=data)
+
+
+@router.get("/event-loop", response_model=APIResponse[dict])
+async def get_event_loop_stats():
+    return APIResponse(success=True, code=200, data=loop_monitor.snapshot())
+
+
+@router.get("/traffic-capture", response_model=APIResponse[Optional[dict]])
+async def get_traffic_capture_stats():
+    return APIResponse(success=True, code=200, data=traffic_capture.snapshot() if traffic_capture else None)
+
+
+@router.get("/traces", response_model=APIResponse[List[dict]])
+async def list_traces(
+    limit: int = Query(20, ge=1, le=500),
+    min_duration_ms: float = Query(0, ge=0),
+    route: Optional[str] = Query(None, description="Part of the root span name, as `GET /api/v1/vehicle`"),
+):
+    traces = trace_buffer.find(limit, min_duration_ms, route)
+    return APIResponse(success=True, code=200, data=[summary(trace) for trace in traces])
+
+
+@router.get("/traces/export", response_model=APIResponse[Optional[dict]])
+async def get_trace_export_stats():
+    return APIResponse(success=True, code=200, data=trace_exporter.snapshot() if trace_exporter else None)
+
+
+@router.get("/traces/{trace_id}", response_model=APIResponse[dict])
+async def get_trace(trace_id: str):
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found, it was not sampled or is no longer buffered")
+    return APIResponse(success=True, code=200, data=detail(trace))
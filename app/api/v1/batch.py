@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.batch.runner import BatchRunner, allowed_path
+from app.core.config import get_settings
+from app.db.session import get_db as get_session
+from app.schemas.batch import BatchRequest, BatchResponse
+from app.schemas.response import APIResponse
+from app.schemas.serialization import fast_response
+
+settings = get_settings()
+
+router = APIRouter()
+
+
+@router.post("/", response_model=APIResponse[BatchResponse])
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Run several /api/v1 operations in one request, in order, and return each
+    operation's status, headers and body. With `atomic` they share one
+    transaction that is rolled back, and the remaining operations skipped, as
+    soon as one fails.
+    """
+    if len(batch.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch"
+        )
+    ids = [operation.id for operation in batch.operations if operation.id]
+    if len(ids) != len(set(ids)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Operation ids must be unique")
+    for operation in batch.operations:
+        if not allowed_path(operation.path):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{operation.path} cannot be called in a batch"
+            )
+
+    committed, results = await BatchRunner(request.app, request.scope, session).run(batch.operations, batch.atomic)
+    return fast_response({"committed": committed, "results": results})
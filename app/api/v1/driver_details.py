@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 from app.db.repositories.driver_details import DriverDetailRepository
 from app.schemas.driver_details import DriverDetailCreate, DriverDetailRead
 from app.db.session import get_db as get_session
 from app.schemas.response import APIResponse
+from app.schemas.serialization import fast_response, serialize_rows
+from app.schemas.search import SearchHitRead
+from app.search.entities import driver_search
 
 router = APIRouter()
 
@@ -34,7 +37,17 @@ async def list_driver_details(
     if license_number is not None:
         filters["license_number"] = license_number
     drivers = await repo.get_all(filters=filters)
-    return APIResponse(success=True, code=200, data=drivers)
+    return fast_response(serialize_rows(DriverDetailRead, drivers))
+
+
+@router.get("/search", response_model=APIResponse[List[SearchHitRead]])
+async def search_driver_details(
+    tenant: str,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+):
+    hits = driver_search.search(tenant, q, limit)
+    return APIResponse(success=True, code=200, data=hits)
 
 
 @router.get("/{id}", response_model=APIResponse[DriverDetailRead])
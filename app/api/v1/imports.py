@@ -0,0 +1,100 @@
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import get_settings
+from app.imports.jobs import ImportJob, ImportStatus, import_jobs
+from app.imports.pipeline import ImportEntity, ImportFormat, format_from_content_type, run_import
+from app.schemas.response import APIResponse
+
+settings = get_settings()
+
+router = APIRouter()
+
+READ_BLOCK_SIZE = 64 * 1024
+UPLOAD_WRITE_SIZE = 1024 * 1024 # body bytes collected per write to the upload file
+
+
+def get_job_or_404(job_id: str) -> ImportJob:
+    job = import_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+@router.post("/{entity}", response_model=APIResponse[dict], status_code=status.HTTP_202_ACCEPTED)
+async def start_import(
+    entity: ImportEntity,
+    request: Request,
+    format: Optional[ImportFormat] = None,
+    tenant: Optional[str] = None,
+):
+    """
+    Upload a CSV (with a header row) or NDJSON file as the raw request body.
+    Rows are imported in the background; `tenant` overrides the tenant of every row.
+    """
+    format = format or format_from_content_type(request.headers.get("content-type"))
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+        )
+
+    job = import_jobs.create(entity.value, format.value, tenant)
+    try:
+        # file calls run in a thread, a slow disk would otherwise stall the event loop
+        upload = await asyncio.to_thread(open, job.upload_path, "wb")
+        try:
+            buffer = bytearray()
+            async for chunk in request.stream():
+                job.bytes_total += len(chunk)
+                if job.bytes_total > settings.IMPORT_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Import files are limited to {settings.IMPORT_MAX_BYTES} bytes"
+                    )
+                buffer += chunk
+                if len(buffer) >= UPLOAD_WRITE_SIZE:
+                    block, buffer = buffer, bytearray()
+                    await asyncio.to_thread(upload.write, block)
+            await asyncio.to_thread(upload.write, buffer)
+        finally:
+            await asyncio.to_thread(upload.close)
+    except BaseException:
+        job.finish(ImportStatus.FAILED, "Upload did not complete.")
+        raise
+
+    job.task = asyncio.create_task(run_import(job), name=f"import-{job.id}")
+    return APIResponse(success=True, code=202, data=job.snapshot())
+
+
+@router.get("/{job_id}", response_model=APIResponse[dict])
+async def get_import(job_id: str):
+    job = get_job_or_404(job_id)
+    return APIResponse(success=True, code=200, data=job.snapshot())
+
+
+@router.get("/{job_id}/errors")
+async def download_import_errors(job_id: str):
+    """Rejected rows as CSV (line, error, row); available while the import is still running."""
+    job = get_job_or_404(job_id)
+    if not job.errors_bytes or not os.path.exists(job.errors_path):
+        raise HTTPException(status_code=404, detail="No error report yet")
+
+    def read_report(path: str, size: int):
+        with open(path, "rb") as report:
+            while size > 0:
+                block = report.read(min(READ_BLOCK_SIZE, size))
+                if not block:
+                    return
+                size -= len(block)
+                yield block
+
+    return StreamingResponse(
+        read_report(job.errors_path, job.errors_bytes),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="import-{job.id}-errors.csv"'},
+    )
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional
 
 from app.db.repositories.location import LocationRepository
 from app.schemas.location import LocationCreate, LocationRead
 from app.schemas.response import APIResponse
+from app.schemas.serialization import fast_response, serialize_rows
+from app.schemas.search import SearchHitRead
+from app.search.entities import location_search
 from app.db.session import get_db as get_session
 
 router = APIRouter()
@@ -38,7 +41,17 @@ async def list_locations(
         filters["location_name"] = location_name
 
     locations = await repo.get_all(filters=filters)
-    return APIResponse(success=True, code=200, data=locations)
+    return fast_response(serialize_rows(LocationRead, locations))
+
+
+@router.get("/search", response_model=APIResponse[List[SearchHitRead]])
+async def search_locations(
+    tenant: str,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+):
+    hits = location_search.search(tenant, q, limit)
+    return APIResponse(success=True, code=200, data=hits)
 
 
 @router.get("/{id}", response_model=APIResponse[LocationRead])
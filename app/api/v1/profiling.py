@@ -0,0 +1,81 @@
+import asyncio
+from enum import Enum
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from app.core.config import get_settings
+from app.dependencies.admin import require_admin
+from app.profiling.flamegraph import render_flamegraph
+from app.profiling.profiles import PROFILE_HEADER, issue_token, parse_collapsed, profile_store
+from app.profiling.sampler import StackSampler, collapsed
+from app.schemas.response import APIResponse
+
+settings = get_settings()
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# one process profile at a time per worker, samples of two would mix
+process_profile_lock = asyncio.Lock()
+
+
+class ProfileFormat(str, Enum):
+    COLLAPSED = "collapsed"
+    SVG = "svg"
+
+
+def profile_response(stacks: dict, format: ProfileFormat, name: str) -> Response:
+    if format == ProfileFormat.SVG:
+        return Response(
+            render_flamegraph(stacks, name),
+            media_type="image/svg+xml",
+            headers={"Content-Disposition": f'attachment; filename="{name}.svg"'},
+        )
+    return Response(collapsed(stacks), media_type="text/plain; charset=utf-8")
+
+
+@router.post("/process")
+async def profile_process(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(None, ge=1),
+    format: ProfileFormat = ProfileFormat.COLLAPSED,
+):
+    """
+    Sample the stacks of every thread of the worker answering this request for
+    `seconds`, and return them as collapsed stacks or an SVG flamegraph.
+    """
+    if seconds > settings.PROFILING_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Profiles are limited to {settings.PROFILING_MAX_SECONDS} seconds"
+        )
+    if process_profile_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A process profile is already running")
+
+    async with process_profile_lock:
+        sampler = StackSampler((interval_ms or settings.PROFILING_INTERVAL_MS) / 1000)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            # waits for at most one sample
+            stacks = await asyncio.to_thread(sampler.stop)
+    return profile_response(stacks, format, f"process-{seconds:g}s")
+
+
+@router.post("/request-tokens", response_model=APIResponse[dict], status_code=status.HTTP_201_CREATED)
+async def create_request_token():
+    """
+    Token enabling one request profile: send it as `X-Profile-Token` with the
+    request, then fetch `/requests/{profile_id}`.
+    """
+    profile_id, token, expires_at = issue_token(settings.PROFILING_TOKEN_TTL_SECONDS)
+    data = {"profile_id": profile_id, "header": PROFILE_HEADER, "token": token, "expires_at": expires_at}
+    return APIResponse(success=True, code=201, data=data)
+
+
+@router.get("/requests/{profile_id}")
+async def get_request_profile(profile_id: str, format: ProfileFormat = ProfileFormat.COLLAPSED):
+    content = profile_store.load(profile_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Request profile not found")
+    return profile_response(parse_collapsed(content), format, f"request-{profile_id}")
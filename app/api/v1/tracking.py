@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 
@@ -9,7 +11,9 @@ from app.schemas.vehicle_tracking import (
     TrackingTypeEnum,
 )
 from app.schemas.response import APIResponse
+from app.schemas.serialization import fast_response, serialize_rows
 from app.db.session import get_db as get_session  # Returns an `AsyncSession`
+from app.metrics.instruments import record_ping
 
 router = APIRouter()
 
@@ -24,12 +28,13 @@ async def create_vehicle_tracking_entry(
     repo: VehicleTrackingRepository = Depends(get_tracking_repo)
 ):
     created = await repo.create(data.dict())
+    record_ping("record", data.last_update_time)
     return APIResponse(success=True, code=201, data=created)
 
 
 @router.get("/", response_model=APIResponse[List[VehicleTrackingRead]])
 async def list_vehicle_tracking_entries(
-    vehicle_id: Optional[int] = None,
+    vehicle_id: Optional[str] = None,
     is_active: Optional[bool] = True,
     tracking_type: Optional[TrackingTypeEnum] = None,
     repo: VehicleTrackingRepository = Depends(get_tracking_repo),
@@ -43,7 +48,7 @@ async def list_vehicle_tracking_entries(
         filters["tracking_type"] = tracking_type
 
     records = await repo.get_all(filters=filters)
-    return APIResponse(success=True, code=200, data=records)
+    return fast_response(serialize_rows(VehicleTrackingRead, records))
 
 
 @router.get("/{id}", response_model=APIResponse[VehicleTrackingRead])
@@ -103,7 +108,8 @@ async def record_vehicle_tracking_ping(
     if not tracking:
         raise HTTPException(status_code=404, detail="Tracking record not found")
 
-    data = ping.dict()
-    data["last_update_time"] = ping.timestamp or None
+    data = ping.dict(exclude={"timestamp"})
+    data["last_update_time"] = ping.timestamp or datetime.now(timezone.utc)
     updated = await repo.update(id, data)
+    record_ping("ping", ping.timestamp)
     return APIResponse(success=True, code=200, data=updated)
\ No newline at end of file
@@ -5,6 +5,7 @@ from datetime import datetime
 from app.db.repositories.trip import TripRepository
 from app.schemas.trip import TripCreate, TripRead
 from app.schemas.response import APIResponse
+from app.schemas.serialization import fast_response, serialize_rows
 from app.db.session import get_db as get_session
 
 router = APIRouter()
@@ -14,6 +15,10 @@ def get_trip_repo(session=Depends(get_session)) -> TripRepository:
     return TripRepository(session)
 
 
+def get_trip_read_repo(include_archived: bool = False, session=Depends(get_session)) -> TripRepository:
+    return TripRepository(session, include_archived=include_archived)
+
+
 @router.post("/", response_model=APIResponse[TripRead], status_code=status.HTTP_201_CREATED)
 async def create_trip(
     data: TripCreate,
@@ -28,7 +33,9 @@ async def list_trips(
     tenant: Optional[str] = None,
     status: Optional[str] = None,
     vehicle_number: Optional[str] = None,
-    repo: TripRepository = Depends(get_trip_repo)
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    repo: TripRepository = Depends(get_trip_read_repo)
 ):
     filters = {}
     if tenant is not None:
@@ -37,15 +44,19 @@ async def list_trips(
         filters["status"] = status
     if vehicle_number is not None:
         filters["vehicle_number"] = vehicle_number
+    if created_from is not None:
+        filters["created_from"] = created_from
+    if created_to is not None:
+        filters["created_to"] = created_to
 
     trips = await repo.get_all(filters=filters)
-    return APIResponse(success=True, code=200, data=trips)
+    return fast_response(serialize_rows(TripRead, trips))
 
 
 @router.get("/{id}", response_model=APIResponse[TripRead])
 async def get_trip_by_id(
     id: int,
-    repo: TripRepository = Depends(get_trip_repo)
+    repo: TripRepository = Depends(get_trip_read_repo)
 ):
     trip = await repo.get(id)
     if not trip:
@@ -4,7 +4,10 @@ from typing import List, Optional
 from app.db.repositories.vehicle import VehicleRepository
 from app.schemas.vehicle import VehicleCreate, VehicleRead
 from app.schemas.response import APIResponse
-from app.schemas.pagination import PaginatedQueryResponse
+from app.schemas.serialization import fast_response, row_serializer, serialize_rows
+from app.schemas.search import SearchHitRead
+from app.search.entities import vehicle_search
+from app.schemas.pagination import PaginatedQueryResponse, Pagination
 from app.db.session import get_db as get_session
 
 router = APIRouter()
@@ -39,7 +42,7 @@ async def list_vehicles(
         filters["vehicle_type_id"] = vehicle_type_id
 
     vehicles = await repo.get_all(filters=filters)
-    return APIResponse(success=True, code=200, data=vehicles)
+    return fast_response(serialize_rows(VehicleRead, vehicles))
 
 @router.get("/paginated", response_model=APIResponse[PaginatedQueryResponse[VehicleRead]])
 async def list_vehicles_paginated(
@@ -68,14 +71,20 @@ async def list_vehicles_paginated(
         order_direction=order_direction
     )
 
-    return APIResponse(
-        success=True,
-        code=200,
-        data=PaginatedQueryResponse[VehicleRead](
-            results=paginated_result["results"],
-            pagination=paginated_result["pagination"]
-        )
-    )
+    return fast_response({
+        "results": serialize_rows(VehicleRead, paginated_result["results"]),
+        "pagination": row_serializer(Pagination)(paginated_result["pagination"]),
+    })
+
+@router.get("/search", response_model=APIResponse[List[SearchHitRead]])
+async def search_vehicles(
+    tenant: str,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+):
+    hits = vehicle_search.search(tenant, q, limit)
+    return APIResponse(success=True, code=200, data=hits)
+
 
 @router.get("/{id}", response_model=APIResponse[VehicleRead])
 async def get_vehicle_by_id(
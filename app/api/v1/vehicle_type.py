@@ -4,6 +4,7 @@ from typing import List, Optional
 from app.db.repositories.vehicle_type import VehicleTypeRepository
 from app.schemas.vehicle_type import VehicleTypeCreate, VehicleTypeRead
 from app.schemas.response import APIResponse
+from app.schemas.serialization import fast_response, serialize_rows
 from app.db.session import get_db as get_session
 
 router = APIRouter()
@@ -38,7 +39,7 @@ async def list_vehicle_type_entries(
         filters["type"] = type
 
     vehicle_types = await repo.get_all(filters=filters)
-    return APIResponse(success=True, code=200, data=vehicle_types)
+    return fast_response(serialize_rows(VehicleTypeRead, vehicle_types))
 
 
 @router.get("/{id}", response_model=APIResponse[VehicleTypeRead])
@@ -0,0 +1,276 @@
+"""
+Run the operations of a batch request in process.
+
+Each operation is dispatched as an ASGI request through the app's full
+middleware stack with the claims of the batch request already in the request
+state, so the token is verified once while routing, validation, rate limits
+and error handling behave exactly as for a direct call.
+
+Writes share the DB session of the batch request. With `atomic` every
+operation runs on one session joined to the batch's transaction, which is
+committed only if all of them succeed (see `app.db.transactions`). Without it,
+consecutive reads run concurrently on sessions the runner opens, one per
+bulkhead slot it holds: the batch request's own, whose session gives its
+connection back first, and up to BATCH_MAX_CONCURRENT_READS - 1 more that the
+tenant has free at that moment. A batch never waits for a slot while holding
+one and never holds more connections than slots.
+
+String values in an operation's path and body may reference earlier results
+as `${id.body.data.id}`; a value that is only a reference keeps its JSON type.
+"""
+import asyncio
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Scope
+
+from app.core.config import get_settings
+from app.db.repositories.base import notify_write
+from app.db.session import AsyncSessionLocal
+from app.db.timeouts import statement_timeout_for
+from app.db.transactions import DEFERRED_WRITES
+from app.limits.bulkheads import tenant_bulkheads
+from app.limits.rate import tenant_key
+from app.schemas.batch import BatchOperation
+
+settings = get_settings()
+
+REFERENCE = re.compile(r"\$\{([A-Za-z0-9_-]+)((?:\.[A-Za-z0-9_-]+)*)\}")
+ALLOWED_PREFIX = "/api/v1/"
+# batches do not nest, uploads are streamed bodies
+EXCLUDED_PREFIXES = ("/api/v1/batch", "/api/v1/imports")
+FAILED_DEPENDENCY = 424
+
+
+class BatchReferenceError(Exception):
+    pass
+
+
+def allowed_path(path: str) -> bool:
+    return path.startswith(ALLOWED_PREFIX) and not path.startswith(EXCLUDED_PREFIXES)
+
+
+def references(value: Any) -> set:
+    """Ids of the operations referenced anywhere in `value`."""
+    if isinstance(value, str):
+        return {match.group(1) for match in REFERENCE.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*map(references, value.values())) if value else set()
+    if isinstance(value, list):
+        return set().union(*map(references, value)) if value else set()
+    return set()
+
+
+def lookup(match: re.Match, results: Dict[str, dict]) -> Any:
+    name, path = match.group(1), match.group(2)
+    if name not in results:
+        raise BatchReferenceError(f"${{{name}}} does not name an earlier operation")
+    value = results[name]
+    for part in path.split(".")[1:]:
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            raise BatchReferenceError(f"{match.group(0)} is not in the result of {name}")
+    return value
+
+
+def resolve(value: Any, results: Dict[str, dict]) -> Any:
+    if isinstance(value, str):
+        whole = REFERENCE.fullmatch(value)
+        if whole:
+            return lookup(whole, results)
+        return REFERENCE.sub(lambda match: str(lookup(match, results)), value)
+    if isinstance(value, dict):
+        return {key: resolve(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve(item, results) for item in value]
+    return value
+
+
+def failed(operation: BatchOperation, status: int, detail: str) -> dict:
+    return {"id": operation.id, "status": status, "headers": {}, "body": {"detail": detail}}
+
+
+class BatchRunner:
+    def __init__(self, app: ASGIApp, scope: Scope, db: AsyncSession):
+        """
+        :param app: The application the operations are dispatched to.
+        :param scope: Scope of the batch request, its claims are passed on.
+        :param db: Session of the batch request.
+        """
+        self.app = app
+        self.scope = scope
+        self.db = db
+        claims = scope.get("state", {}).get("user")
+        self.tenant = tenant_key(claims) if claims else None
+        # the operations are captured as requests of their own, the batch is not (see TrafficCaptureMiddleware)
+        scope.setdefault("state", {})["batch_dispatched"] = True
+        self.named: Dict[str, dict] = {}
+
+    async def run(self, operations: List[BatchOperation], atomic: bool) -> Tuple[bool, List[dict]]:
+        """Run `operations`, return whether their writes were committed and one result per operation."""
+        if atomic:
+            return await self.run_atomic(operations)
+        return True, await self.run_independent(operations)
+
+    async def run_independent(self, operations: List[BatchOperation]) -> List[dict]:
+        results: List[Optional[dict]] = [None] * len(operations)
+        reads: List[int] = []
+        for index, operation in enumerate(operations):
+            if operation.method == "GET":
+                pending = {operations[i].id for i in reads}
+                if references([operation.path, operation.body]) & pending:
+                    await self.run_reads(operations, reads, results)
+                    reads = []
+                reads.append(index)
+                continue
+
+            await self.run_reads(operations, reads, results)
+            reads = []
+            results[index] = await self.call(operation, self.db)
+            if results[index]["status"] >= 400:
+                # leave the shared session usable for the next write
+                await self.db.rollback()
+        await self.run_reads(operations, reads, results)
+        return results
+
+    async def run_reads(self, operations: List[BatchOperation], indexes: List[int], results: List[Optional[dict]]):
+        if not indexes:
+            return
+        # writes are committed, but the refresh after them keeps a connection checked out
+        await self.db.close()
+        pending = iter(indexes)
+        wanted = min(len(indexes), settings.BATCH_MAX_CONCURRENT_READS) - 1
+        async with tenant_bulkheads.spare_slots(self.tenant, wanted) as spare:
+            await asyncio.gather(*(self.read_worker(operations, pending, results) for _ in range(1 + spare)))
+
+    async def read_worker(self, operations: List[BatchOperation], pending: Iterator[int], results: List[Optional[dict]]):
+        """Run reads taken from `pending` one after another on a session of the worker's own."""
+        async with AsyncSessionLocal() as session:
+            for index in pending:
+                operation = operations[index]
+                path, _, query = operation.path.partition("?")
+                session.info["statement_timeout_ms"] = statement_timeout_for(operation.method, path, query)
+                results[index] = await self.call(operation, session)
+                # the next read starts a transaction of its own
+                await session.rollback()
+
+    async def run_atomic(self, operations: List[BatchOperation]) -> Tuple[bool, List[dict]]:
+        connection = await self.db.connection()
+        session = AsyncSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+        deferred = session.info[DEFERRED_WRITES] = []
+        results = []
+        try:
+            for operation in operations:
+                results.append(await self.call(operation, session))
+                if results[-1]["status"] >= 400:
+                    break
+        finally:
+            await session.close()
+
+        if results[-1]["status"] >= 400:
+            await self.db.rollback()
+            results += [
+                failed(operation, FAILED_DEPENDENCY, "Not run, an earlier operation failed")
+                for operation in operations[len(results):]
+            ]
+            return False, results
+
+        await self.db.commit()
+        for write in deferred:
+            notify_write(*write)
+        return True, results
+
+    async def call(self, operation: BatchOperation, session: AsyncSession) -> dict:
+        """
+        :param session: Session the operation's route uses.
+        """
+        try:
+            path = str(resolve(operation.path, self.named))
+            body = resolve(operation.body, self.named)
+        except BatchReferenceError as e:
+            result = failed(operation, FAILED_DEPENDENCY, str(e))
+        else:
+            if allowed_path(path):
+                # a task of its own, so the request id middleware does not overwrite the batch's
+                result = await asyncio.create_task(self.dispatch(operation.method, path, body, session))
+                result["id"] = operation.id
+            else:
+                result = failed(operation, 400, f"{path} cannot be called in a batch")
+        if operation.id:
+            self.named[operation.id] = result
+        return result
+
+    async def dispatch(self, method: str, path: str, body: Any, session: AsyncSession) -> dict:
+        path, _, query = path.partition("?")
+        content = b"" if body is None else orjson.dumps(body)
+        parent_state = self.scope.get("state", {})
+        state = {
+            "user_id": parent_state.get("user_id"),
+            "user": parent_state.get("user"),
+            "batch_operation": True,
+            "db_session": session,
+            "joined_transaction": DEFERRED_WRITES in session.info,
+        }
+        scope = {
+            "type": "http",
+            "asgi": self.scope.get("asgi", {"version": "3.0"}),
+            "http_version": self.scope.get("http_version", "1.1"),
+            "method": method,
+            "scheme": self.scope.get("scheme", "http"),
+            "server": self.scope.get("server"),
+            "client": self.scope.get("client"),
+            "root_path": self.scope.get("root_path", ""),
+            "path": unquote(path),
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [
+                (b"host", Headers(scope=self.scope).get("host", "").encode()),
+                (b"accept", b"application/json"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(content)).encode()),
+            ],
+            "state": state,
+        }
+
+        received = False
+
+        async def receive() -> Message:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": content, "more_body": False}
+            # an operation never disconnects, it ends with the batch request
+            await asyncio.get_running_loop().create_future()
+
+        start: Message = {"status": 500, "headers": []}
+        chunks = []
+
+        async def send(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+
+        headers = Headers(raw=start.get("headers", []))
+        content = b"".join(chunks)
+        if not content:
+            data = None
+        elif headers.get("content-type", "").startswith("application/json"):
+            data = orjson.loads(content)
+        else:
+            data = content.decode("utf-8", "replace")
+        return {
+            "status": start["status"],
+            "headers": {name: value for name, value in headers.items() if name != "content-length"},
+            "body": data,
+        }
@@ -0,0 +1,113 @@
+"""
+Share version bumps between workers through Postgres LISTEN/NOTIFY.
+
+Every local bump is published on CACHE_NOTIFY_CHANNEL and bumps published by
+other workers are applied locally, so their cached entries go stale without
+waiting for the TTL. While the listening connection is down bumps can be
+missed, so every (re)connect invalidates all cached entries. Bumps waiting to
+be sent are kept once per (namespace, key), so a write burst or a slow
+connection cannot grow the outbox beyond the number of keys.
+"""
+import asyncio
+import json
+import os
+import uuid
+from typing import Dict, Optional, Tuple
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.cache.versions import model_versions
+from app.core.config import get_settings
+from app.core.logger import logger
+
+settings = get_settings()
+
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 30
+
+
+class VersionBroadcaster:
+    def __init__(self, dsn: str, channel: str):
+        self.dsn = dsn
+        self.channel = channel
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # one entry per pending (namespace, key), a bump waiting to be sent covers later ones
+        self._outbox: Dict[Tuple[str, Optional[str]], None] = {}
+        self._outbox_ready = asyncio.Event()
+        self._connection: Optional[asyncpg.Connection] = None
+        self.sent = 0
+        self.received = 0
+
+    def publish(self, namespace: str, key: Optional[str]):
+        """Bump listener of `model_versions`, queues the bump for the sender."""
+        self._outbox[(namespace, key)] = None
+        self._outbox_ready.set()
+
+    def receive(self, connection, pid: int, channel: str, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed cache notification: {payload!r}")
+            return
+        if message.get("origin") == self.origin:
+            return
+        self.received += 1
+        model_versions.bump(message["namespace"], message.get("key"), propagate=False)
+
+    async def run(self):
+        model_versions.on_bump(self.publish)
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                await self._connection.add_listener(self.channel, self.receive)
+                model_versions.invalidate_all()
+                logger.info(f"Listening for cache version bumps on '{self.channel}'.")
+                delay = RECONNECT_MIN_DELAY
+                await self._send_loop()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache notification connection lost, retrying in {delay}s: {e}")
+            finally:
+                if self._connection is not None:
+                    await self._close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _send_loop(self):
+        while True:
+            if not self._outbox:
+                self._outbox_ready.clear()
+                await self._outbox_ready.wait()
+                continue
+            # taken out first, so a bump arriving while this one is sent is queued again
+            namespace, key = next(iter(self._outbox))
+            del self._outbox[(namespace, key)]
+            payload = json.dumps({"origin": self.origin, "namespace": namespace, "key": key})
+            # a bump that fails to send is dropped, the TTL bounds how long other workers serve stale data
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            self.sent += 1
+
+    async def _close(self):
+        connection, self._connection = self._connection, None
+        try:
+            await asyncio.shield(connection.close(timeout=5))
+        except Exception:
+            connection.terminate()
+
+    def snapshot(self) -> dict:
+        return {
+            "channel": self.channel,
+            "connected": self._connection is not None and not self._connection.is_closed(),
+            "sent": self.sent,
+            "received": self.received,
+            "pending": len(self._outbox),
+        }
+
+
+version_broadcaster = VersionBroadcaster(
+    make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False),
+    settings.CACHE_NOTIFY_CHANNEL,
+)
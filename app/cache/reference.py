@@ -0,0 +1,64 @@
+"""
+Cache of reference data reads (vehicle types, roles, tenants) and of the
+authenticated user context.
+
+Entries are validated against the model versions they were loaded under, and
+additionally expire after REFERENCE_CACHE_TTL_SECONDS as a safety net for
+changes made outside the repositories or bumps missed from other workers.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class ReferenceEntry:
+    versions: Tuple[int, ...]
+    expires_at: float
+    value: Any
+
+
+class ReferenceCache:
+    """LRU of loaded values, bounded by entry count."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, ReferenceEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: tuple, versions: Tuple[int, ...], load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        :param versions: Snapshot taken before loading, so a write racing the load
+            leaves an entry that is already stale.
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and entry.versions == versions and entry.expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+        self.misses += 1
+        value = await load()
+        self._entries[key] = ReferenceEntry(versions, now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "ttl_seconds": self.ttl}
+
+
+reference_cache = ReferenceCache(settings.REFERENCE_CACHE_TTL_SECONDS, settings.REFERENCE_CACHE_MAX_ENTRIES)
+user_context_cache = ReferenceCache(settings.USER_CONTEXT_CACHE_TTL_SECONDS, settings.USER_CONTEXT_CACHE_MAX_ENTRIES)
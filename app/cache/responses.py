@@ -0,0 +1,99 @@
+"""
+Cache of GET responses for read endpoints whose data rarely changes.
+
+Entries are keyed by path, normalised query string and tenant, and remember the
+model versions they were built from; a write through the matching repository
+bumps the version, so the next lookup sees a mismatch and rebuilds the entry.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.cache.versions import bump_on_write
+from app.core.config import get_settings
+from app.db.models.location import Location
+from app.db.models.role import Role
+from app.db.models.vehicle import Vehicle
+from app.db.models.vehicle_type import VehicleType
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class CachedRoute:
+    prefix: str
+    namespaces: Tuple[str, ...] # versions the responses depend on
+    tenant_param: str # query parameter holding the tenant the response is scoped to
+
+
+CACHED_ROUTES = (
+    # deleting a vehicle type cascades to its vehicles
+    CachedRoute("/api/v1/vehicle", ("vehicles", "vehicle_types"), "tenant"),
+    CachedRoute("/api/v1/location", ("locations",), "tenant"),
+    CachedRoute("/api/v1/vehicle-types", ("vehicle_types",), "tenant"),
+    CachedRoute("/api/v1/roles", ("roles",), "tenant_id"),
+)
+
+bump_on_write(Vehicle, "vehicles", "tenant")
+bump_on_write(Location, "locations", "tenant")
+bump_on_write(VehicleType, "vehicle_types", "tenant")
+bump_on_write(Role, "roles", "tenant_id")
+
+
+def match_cached_route(path: str) -> Optional[CachedRoute]:
+    for route in CACHED_ROUTES:
+        if path == route.prefix or path.startswith(route.prefix + "/"):
+            return route
+    return None
+
+
+@dataclass
+class CachedResponse:
+    versions: Tuple[int, ...]
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: bytes
+
+
+class ResponseCache:
+    """LRU of `CachedResponse`s, bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: tuple, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.versions != versions:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, entry: CachedResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": sum(len(entry.body) for entry in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
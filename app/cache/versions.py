@@ -0,0 +1,71 @@
+"""
+Version counters used to invalidate cached data.
+
+A version is kept per (namespace, key), e.g. ("vehicles", "acme"), and one per
+namespace for data that spans every key. Bumping a key also bumps its
+namespace, so a cache entry built for "all tenants" goes stale on any write
+while an entry for one tenant only goes stale on writes to that tenant.
+"""
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.db.repositories.base import on_write
+
+VersionKey = Tuple[str, Optional[str]]
+BumpListener = Callable[[str, Optional[str]], None]
+
+
+class ModelVersions:
+    def __init__(self):
+        self._versions: Dict[VersionKey, int] = {}
+        self._listeners: List[BumpListener] = []
+        self._epoch = 0 # bumped to invalidate everything at once
+
+    def get(self, namespace: str, key: Optional[str] = None) -> int:
+        return self._versions.get((namespace, key), 0)
+
+    def snapshot(self, namespaces: Tuple[str, ...], key: Optional[str] = None) -> Tuple[int, ...]:
+        return (self._epoch, *(self.get(namespace, key) for namespace in namespaces))
+
+    def invalidate_all(self):
+        """Make every snapshot taken so far stale, e.g. after bumps may have been missed."""
+        self._epoch += 1
+
+    def bump(self, namespace: str, key: Optional[str] = None, propagate: bool = True):
+        """
+        :param propagate: Tell the bump listeners, False for bumps that came from them.
+        """
+        if key is not None:
+            self._versions[(namespace, key)] = self.get(namespace, key) + 1
+        self._versions[(namespace, None)] = self.get(namespace) + 1
+        if propagate:
+            for listener in self._listeners:
+                listener(namespace, key)
+
+    def on_bump(self, listener: BumpListener):
+        self._listeners.append(listener)
+
+
+model_versions = ModelVersions()
+_registered: Set[Tuple[type, str, Optional[str]]] = set()
+
+
+def bump_on_write(model: type, namespace: str, key_attribute: Optional[str] = None):
+    """
+    Bump `namespace` on every committed repository write of `model`, keyed by
+    the record's `key_attribute` and, for an update, the value it had before.
+    Registering the same combination again is a no-op.
+    """
+    if (model, namespace, key_attribute) in _registered:
+        return
+    _registered.add((model, namespace, key_attribute))
+
+    def listener(action: str, obj, previous: dict):
+        keys = {None}
+        if key_attribute:
+            keys = {getattr(obj, key_attribute)}
+            if key_attribute in previous:
+                keys.add(previous[key_attribute])
+        for key in keys:
+            model_versions.bump(namespace, None if key is None else str(key))
+
+    on_write(model, listener)
@@ -0,0 +1,182 @@
+"""
+Capture of sanitized request metadata, for replay with `benchmarks.replay`.
+
+With CAPTURE_ENABLED a share CAPTURE_SAMPLE_RATE of the HTTP requests is
+recorded: method, route template and path parameters, query parameters, the
+request headers in `KEPT_HEADERS`, the shape of a JSON or MessagePack body
+(field names and value types, never the values), status, duration and
+response size. The Authorization and cookie headers are never read, and query
+or path parameters named like a credential (`REDACTED_NAMES`) are replaced
+with `REDACTED`. Batch requests are recorded as their operations, see
+`TrafficCaptureMiddleware`.
+
+Records are queued in memory and appended by a thread every
+CAPTURE_FLUSH_INTERVAL seconds, one JSON object per line, to
+`traffic-<pid>.jsonl` in CAPTURE_DIR, so workers never share a file. A file
+is rotated to `.1`, `.2`, ... once it reaches CAPTURE_MAX_BYTES, keeping
+CAPTURE_BACKUP_COUNT old files. The queue is bounded; when writing falls
+behind the oldest records are dropped and counted.
+"""
+import asyncio
+import os
+import re
+from collections import deque
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+import msgpack
+import orjson
+
+from app.core.config import get_settings
+from app.core.logger import logger
+
+settings = get_settings()
+
+KEPT_HEADERS = (b"accept", b"accept-encoding", b"content-type", b"if-none-match")
+REDACTED_NAMES = re.compile(r"token|secret|password|passwd|api_?key|signature|auth|session|cookie", re.IGNORECASE)
+REDACTED = "[redacted]"
+DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+DATE = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+
+def redact(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: REDACTED if REDACTED_NAMES.search(name) else value for name, value in params.items()}
+
+
+def redact_query(query_string: str) -> List[List[str]]:
+    """Query parameters as `[name, value]` pairs in request order, repeated names kept."""
+    pairs = parse_qsl(query_string, keep_blank_values=True)
+    return [[name, REDACTED if REDACTED_NAMES.search(name) else value] for name, value in pairs]
+
+
+def value_shape(value):
+    """
+    The structure of a decoded body with every value replaced by its type:
+    "str", "datetime", "date", "int", "float", "bool" or "null". Lists become
+    `{"$list": <shape of the first item>, "$len": n}`.
+    """
+    if isinstance(value, dict):
+        return {str(key): value_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return {"$list": value_shape(value[0]) if value else None, "$len": len(value)}
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        if DATETIME.match(value):
+            return "datetime"
+        return "date" if DATE.match(value) else "str"
+    return type(value).__name__
+
+
+def body_shape(body: bytes, content_type: Optional[str]):
+    """Shape of a JSON or MessagePack body, None for other or undecodable bodies."""
+    if not body or not content_type:
+        return None
+    try:
+        if "json" in content_type:
+            return value_shape(orjson.loads(body))
+        if "msgpack" in content_type:
+            return value_shape(msgpack.unpackb(body))
+    except (ValueError, msgpack.UnpackException):
+        return None
+    return None
+
+
+class TrafficCapture:
+    def __init__(self, directory: str, interval: float, max_pending: int, max_bytes: int, backup_count: int):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.pending: Deque[dict] = deque(maxlen=max_pending)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def path(self) -> Path:
+        # looked up each time, the app may be imported before the workers fork
+        return self.directory / f"traffic-{os.getpid()}.jsonl"
+
+    def add(self, record: dict):
+        """Queue a record; its `body` (raw bytes) is replaced by its shape when written."""
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(record)
+
+    async def run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self.flush()
+        finally:
+            with suppress(Exception):
+                await asyncio.shield(self.flush())
+
+    async def flush(self):
+        if not self.pending:
+            return
+        records = list(self.pending)
+        self.pending.clear()
+        try:
+            await asyncio.to_thread(self.write, records)
+        except OSError as e:
+            self.failed += len(records)
+            logger.warning(f"Could not write captured requests to {self.path}: {e}")
+            return
+        self.written += len(records)
+
+    def write(self, records: List[dict]):
+        lines = []
+        for record in records:
+            body = record.pop("body", b"")
+            record["body_shape"] = body_shape(body, record["headers"].get("content-type"))
+            lines.append(orjson.dumps(record))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path
+        with path.open("ab") as file:
+            file.write(b"\n".join(lines) + b"\n")
+            size = file.tell()
+        if size >= self.max_bytes:
+            self.rotate(path)
+
+    def rotate(self, path: Path):
+        """`traffic-<pid>.jsonl` becomes `.1`, `.1` becomes `.2` and so on, replacing the oldest."""
+        if not self.backup_count:
+            path.unlink(missing_ok=True)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            older = path.with_name(f"{path.name}.{index}")
+            if older.exists():
+                os.replace(older, path.with_name(f"{path.name}.{index + 1}"))
+        os.replace(path, path.with_name(f"{path.name}.1"))
+
+    def snapshot(self) -> dict:
+        return {
+            "file": str(self.path),
+            "sample_rate": settings.CAPTURE_SAMPLE_RATE,
+            "pending": len(self.pending),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+traffic_capture = (
+    TrafficCapture(
+        settings.CAPTURE_DIR,
+        settings.CAPTURE_FLUSH_INTERVAL,
+        settings.CAPTURE_MAX_PENDING,
+        settings.CAPTURE_MAX_BYTES,
+        settings.CAPTURE_BACKUP_COUNT,
+    )
+    if settings.CAPTURE_ENABLED else None
+)
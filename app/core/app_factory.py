@@ -1,6 +1,14 @@
+from app.middleware.disconnect import CancelOnDisconnectMiddleware
+from app.middleware.content_negotiation import ContentNegotiationMiddleware
+from app.middleware.response_cache import ResponseCacheMiddleware
 from app.middleware.request_id import RequestIDMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 from app.middleware.auth_user_context import JWTAuthMiddlewareRS256
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.traffic_capture import TrafficCaptureMiddleware
 from fastapi import FastAPI, HTTPException
+from starlette.middleware.gzip import GZipMiddleware
 from app.api.v1.tracking import router as tracking_router
 from app.api.v1.vehicle_type import router as vehicle_type_router
 from app.api.v1.vehicle import router as vehicle_router
@@ -11,7 +19,14 @@ from app.api.v1.tenant import router as tenant_router
 from app.api.v1.user import router as user_router
 from app.api.v1.role import router as role_router
 from app.api.v1.user_role import router as user_role_router
+from app.api.v1.admin import router as admin_router
+from app.api.v1.imports import router as imports_router
+from app.api.v1.batch import router as batch_router
+from app.api.v1.profiling import router as profiling_router
+from app.api.metrics import router as metrics_router
 from app.core.startup_events import lifespan
+from app.tracing.instrument import instrument_routes
+from app.core.config import get_settings
 
 from fastapi.openapi.utils import get_openapi
 
@@ -21,6 +36,7 @@ from sqlalchemy.exc import (
     OperationalError,
     ProgrammingError,
     DataError,
+    DBAPIError,
 )
 
 from app.core.exception_handlers import (
@@ -30,18 +46,34 @@ from app.core.exception_handlers import (
     operational_error_handler,
     programming_error_handler,
     data_error_handler,
+    dbapi_error_handler,
     generic_exception_handler,
 )
 
+settings = get_settings()
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="NavEx",
         lifespan=lifespan
     )
-    app.add_middleware(RequestIDMiddleware)
+    app.add_middleware(CancelOnDisconnectMiddleware)
+    app.add_middleware(ContentNegotiationMiddleware)
+    app.add_middleware(ResponseCacheMiddleware)
+    app.add_middleware(RateLimitMiddleware) # needs the claims set by the auth middleware
     app.add_middleware(JWTAuthMiddlewareRS256)
+    app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+    app.add_middleware(RequestIDMiddleware) # outside auth and compression, so both show in traces
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware) # outside auth, so token verification shows in request profiles
+    if settings.CAPTURE_ENABLED:
+        app.add_middleware(TrafficCaptureMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
     register_routes(app)
     register_exception_handlers(app)
+    if settings.TRACING_ENABLED:
+        instrument_routes(app)
 
     app.openapi = custom_openapi_factory(app)
 
@@ -63,6 +95,13 @@ def register_routes(app: FastAPI):
     app.include_router(vehicle_router, prefix="/api/v1/vehicle", tags=["Vehicles"])
     app.include_router(location_router, prefix="/api/v1/location", tags=["Locations"])
     app.include_router(driver_details_router, prefix="/api/v1/drivers", tags=["Drivers"])
+    app.include_router(imports_router, prefix="/api/v1/imports", tags=["Imports"])
+    app.include_router(batch_router, prefix="/api/v1/batch", tags=["Batch"])
+    app.include_router(admin_router, prefix="/api/v1/admin", tags=["Admin"])
+    if settings.PROFILING_ENABLED:
+        app.include_router(profiling_router, prefix="/api/v1/admin/profiling", tags=["Admin"])
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router)
 
 
 
@@ -74,6 +113,7 @@ def register_exception_handlers(app: FastAPI):
     app.add_exception_handler(OperationalError, operational_error_handler)
     app.add_exception_handler(ProgrammingError, programming_error_handler)
     app.add_exception_handler(DataError, data_error_handler)
+    app.add_exception_handler(DBAPIError, dbapi_error_handler)
     app.add_exception_handler(Exception, generic_exception_handler)
 
 
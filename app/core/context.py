@@ -4,3 +4,14 @@ request_id_ctx_var: contextvars.ContextVar[str] = contextvars.ContextVar("reques
 
 def get_request_id() -> str:
     return request_id_ctx_var.get()
+
+
+# "msgpack" when the client negotiated MessagePack responses, see ContentNegotiationMiddleware
+response_format_ctx_var: contextvars.ContextVar[str] = contextvars.ContextVar("response_format", default="json")
+
+
+# id of the request profile the current request is sampled for, see ProfilingMiddleware
+profile_id_ctx_var: contextvars.ContextVar[str] = contextvars.ContextVar("profile_id", default=None)
+
+# innermost open tracing span of the request, None when the request is not sampled, see app.tracing
+span_ctx_var: contextvars.ContextVar["Span"] = contextvars.ContextVar("span", default=None)
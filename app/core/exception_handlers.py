@@ -6,21 +6,27 @@ from sqlalchemy.exc import (
     OperationalError,
     ProgrammingError,
     DataError,
+    DBAPIError,
 )
 from starlette.status import (
     HTTP_400_BAD_REQUEST,
     HTTP_422_UNPROCESSABLE_ENTITY,
     HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_504_GATEWAY_TIMEOUT,
 )
 from app.schemas.response import APIResponse
 from app.core.logger import logger
 
+# one record per handled HTTP error, can be sampled on its own with LOG_SAMPLE_RATES
+http_logger = logger.getChild("http")
+
 
 async def http_exception_handler(request: Request, exc: HTTPException):
-    logger.warning(f"HTTPException: {exc.detail} (status_code={exc.status_code})")
+    http_logger.warning(f"HTTPException: {exc.detail} (status_code={exc.status_code})")
     return JSONResponse(
         status_code=exc.status_code,
-        content=APIResponse(success=False, code=exc.status_code, message=exc.detail).dict(exclude_none=True)
+        content=APIResponse(success=False, code=exc.status_code, message=exc.detail).dict(exclude_none=True),
+        headers=exc.headers,
     )
 
 async def integrity_error_handler(request: Request, exc: IntegrityError):
@@ -83,6 +89,23 @@ async def data_error_handler(request: Request, exc: DataError):
     )
 
 
+QUERY_CANCELED_SQLSTATE = "57014"
+
+
+async def dbapi_error_handler(request: Request, exc: DBAPIError):
+    if getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED_SQLSTATE:
+        logger.warning(f"Statement timeout on {request.method} {request.url.path}: {exc.orig}")
+        return JSONResponse(
+            status_code=HTTP_504_GATEWAY_TIMEOUT,
+            content=APIResponse(
+                success=False,
+                code=HTTP_504_GATEWAY_TIMEOUT,
+                message="Database query timed out.",
+            ).dict(exclude_none=True),
+        )
+    return await generic_exception_handler(request, exc)
+
+
 async def generic_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
     return JSONResponse(
@@ -1,17 +1,182 @@
-import os
-import sys
+"""
+Application logging.
+
+Loggers only hand records to a bounded queue; a listener thread formats and
+writes them, so a burst of log lines never blocks the event loop on stdout.
+When the queue is full records are dropped and counted instead of waiting,
+and a warning with the number dropped is logged once there is room again.
+
+The request id is added while the record is created, on the thread and in
+the context of the request. Loggers listed in LOG_SAMPLE_RATES (and their
+children) keep only that share of their records below ERROR, for
+high-volume messages such as `app.http` (handled HTTP errors) and `app.auth`
+(rejected tokens).
+"""
+import atexit
+import copy
 import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict
+
+import orjson
+
 from app.core.context import get_request_id
 from app.core.config import get_settings
 
 settings = get_settings()
 
+# attributes every LogRecord has, anything else was passed in `extra`
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
 class RequestIDFilter(logging.Filter):
     def filter(self, record):
         record.request_id = get_request_id() or "-"
         return True
 
+
+def parse_sample_rates(rates: str) -> Dict[str, float]:
+    """:param rates: Comma separated `logger=rate` pairs, rates between 0 and 1."""
+    parsed = {}
+    for pair in filter(None, (pair.strip() for pair in rates.split(","))):
+        name, _, rate = pair.partition("=")
+        try:
+            parsed[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            raise ValueError(f"Invalid LOG_SAMPLE_RATES entry '{pair}', expected logger=rate") from None
+    return parsed
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a configured share of the records below ERROR of some loggers and their children."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out: Dict[str, int] = {}
+        self._rate_by_logger: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._rate_by_logger.get(name)
+        if rate is None:
+            rate = 1.0
+            parent = name
+            while parent:
+                if parent in self.rates:
+                    rate = self.rates[parent]
+                    break
+                parent = parent.rpartition(".")[0]
+            self._rate_by_logger[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out[record.name] = self.sampled_out.get(record.name, 0) + 1
+        return False
+
+
+class BoundedQueueHandler(QueueHandler):
+    """`QueueHandler` that drops records when the queue is full instead of raising or blocking."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped: Dict[str, int] = {}
+        self._unreported = 0
+
+    def prepare(self, record):
+        # only the message is rendered here, formatting and tracebacks are left to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        # called with the handler lock held
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self.drop_report(self._unreported))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+            self._unreported += 1
+
+    @staticmethod
+    def drop_report(count: int) -> logging.LogRecord:
+        record = logging.LogRecord(
+            "app.logging", logging.WARNING, __file__, 0,
+            f"Dropped {count} log records, the log queue was full", None, None,
+        )
+        record.request_id = "-"
+        return record
+
+
+class BlockingSentinelListener(QueueListener):
+    def enqueue_sentinel(self):
+        # on exit, wait for room so the records already queued are written
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, request id, message, exception and `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        return orjson.dumps(entry, default=str).decode()
+
+
+class LogPipeline:
+    def __init__(self, queue_size: int, sample_rates: Dict[str, float], output: logging.Handler):
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = BoundedQueueHandler(self.queue)
+        self.sampling = SamplingFilter(sample_rates)
+        self.listener = BlockingSentinelListener(self.queue, output, respect_handler_level=True)
+
+    def start(self):
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        try:
+            self.listener.stop()
+        except queue.Full:
+            pass
+
+    def snapshot(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": dict(self.handler.dropped),
+            "sampled_out": dict(self.sampling.sampled_out),
+        }
+
+
+log_pipeline = None
+
 if settings.USE_UVICORN_LOGGER:
     try:
         from uvicorn.main import logger as uvicorn_logger
@@ -22,26 +187,28 @@ else:
     LOG_LEVEL = settings.LOG_LEVEL.upper()
     LOG_FORMAT = "[%(asctime)s] %(levelname)-2s [%(request_id)s] %(name)s - %(message)s"
 
+    output_handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_JSON:
+        output_handler.setFormatter(JSONFormatter())
+    else:
+        output_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+    log_pipeline = LogPipeline(settings.LOG_QUEUE_SIZE, parse_sample_rates(settings.LOG_SAMPLE_RATES), output_handler)
+
     LOGGING_CONFIG = {
         "version": 1,
         "disable_existing_loggers": False,
-        "formatters": {
-            "default": {
-                "format": LOG_FORMAT,
-                "datefmt": "%Y-%m-%d %H:%M:%S",
-            },
-        },
         "filters": {
+            "sampling": {
+                '()': lambda: log_pipeline.sampling,
+            },
             "request_id": {
                 '()': RequestIDFilter,
             },
         },
         "handlers": {
             "default": {
-                "formatter": "default",
-                "class": "logging.StreamHandler",
-                "filters": ["request_id"],
-                "stream": sys.stdout,
+                '()': lambda: log_pipeline.handler,
+                "filters": ["sampling", "request_id"],
             },
         },
         "loggers": {
@@ -58,4 +225,5 @@ else:
     }
 
     dictConfig(LOGGING_CONFIG)
-    logger = logging.getLogger("app")
\ No newline at end of file
+    log_pipeline.start()
+    logger = logging.getLogger("app")
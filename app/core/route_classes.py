@@ -0,0 +1,59 @@
+import enum
+from typing import Dict
+from urllib.parse import parse_qsl
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class RouteClass(str, enum.Enum):
+    INGEST = "ingest"
+    READ = "read"
+    EXPORT = "export"
+    ADMIN = "admin"
+
+
+# path prefix -> class, checked before the method based default
+ROUTE_CLASS_PREFIXES: Dict[str, RouteClass] = {
+    "/api/v1/tenants": RouteClass.ADMIN,
+    "/api/v1/users": RouteClass.ADMIN,
+    "/api/v1/roles": RouteClass.ADMIN,
+    "/api/v1/user-roles": RouteClass.ADMIN,
+    "/api/v1/admin": RouteClass.ADMIN,
+}
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+PAGE_SIZE_PARAMS = ("page_size", "limit")
+TRUE_VALUES = {"true", "1", "yes", "on"}
+
+
+def is_export(query_string: str) -> bool:
+    """
+    Whether a read scans far more rows than a page: pages larger than
+    EXPORT_MIN_PAGE_SIZE, or trips including the archive.
+    """
+    if not query_string:
+        return False
+    params = dict(parse_qsl(query_string))
+    if params.get("include_archived", "").lower() in TRUE_VALUES:
+        return True
+    return any(
+        params.get(name, "").isdigit() and int(params[name]) > settings.EXPORT_MIN_PAGE_SIZE
+        for name in PAGE_SIZE_PARAMS
+    )
+
+
+def classify_route(method: str, path: str, query_string: str = "") -> RouteClass:
+    """
+    Resolve the route class of a request.
+
+    Explicit prefixes win; otherwise large reads (see `is_export`) are EXPORT,
+    other reads READ and every write is INGEST.
+    """
+    for prefix, route_class in ROUTE_CLASS_PREFIXES.items():
+        if path.startswith(prefix):
+            return route_class
+    if method not in READ_METHODS:
+        return RouteClass.INGEST
+    return RouteClass.EXPORT if is_export(query_string) else RouteClass.READ
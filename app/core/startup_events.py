@@ -1,17 +1,74 @@
+import asyncio
+from typing import List
+
 from fastapi import FastAPI
 from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from app.db.session import engine
 from app.db.base_class import Base
+from app.db.pool import PoolAutoscaler
+from app.db.partitions import trip_maintenance
+from app.search.entities import run_search_index_refresh
+from app.cache.notify import version_broadcaster
+from app.limits.rate import rate_limiter
+from app.metrics.multiprocess import worker_metrics_files
+from app.tracing.export import trace_exporter
+from app.capture.traffic import traffic_capture
+from app.profiling.loop_monitor import loop_monitor
+from app.core.config import get_settings
 from app.core.logger import logger
 from app.core.seeder import run_seeders
 
+settings = get_settings()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_tables_and_seed()
+    # awaited, so this month's trip partitions exist before the first insert
+    await trip_maintenance.create_partitions()
+    tasks = start_background_tasks()
     yield
+    await stop_background_tasks(tasks)
+    await rate_limiter.close()
+
+def start_background_tasks() -> List[asyncio.Task]:
+    tasks = []
+    if settings.DB_POOL_ADAPTIVE:
+        autoscaler = PoolAutoscaler(
+            engine,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            interval=settings.DB_POOL_ADAPT_INTERVAL,
+            grow_wait_ms=settings.DB_POOL_GROW_WAIT_MS,
+            shrink_utilization=settings.DB_POOL_SHRINK_UTILIZATION,
+        )
+        tasks.append(asyncio.create_task(autoscaler.run(), name="db-pool-autoscaler"))
+        logger.info(f"DB pool autoscaling enabled ({settings.DB_POOL_MIN_SIZE}-{settings.DB_POOL_MAX_SIZE} connections).")
+
+    tasks.append(asyncio.create_task(trip_maintenance.run(), name="trip-maintenance"))
+    tasks.append(asyncio.create_task(
+        run_search_index_refresh(settings.SEARCH_INDEX_REFRESH_INTERVAL), name="search-index-refresh"
+    ))
+    if settings.CACHE_NOTIFY_ENABLED:
+        tasks.append(asyncio.create_task(version_broadcaster.run(), name="cache-version-broadcaster"))
+    if settings.METRICS_ENABLED and worker_metrics_files is not None:
+        tasks.append(asyncio.create_task(worker_metrics_files.run(), name="metrics-files"))
+    if settings.LOOP_MONITOR_ENABLED:
+        tasks.append(asyncio.create_task(loop_monitor.run(), name="event-loop-monitor"))
+    if settings.TRACING_ENABLED and trace_exporter is not None:
+        tasks.append(asyncio.create_task(trace_exporter.run(), name="trace-exporter"))
+    if traffic_capture is not None:
+        tasks.append(asyncio.create_task(traffic_capture.run(), name="traffic-capture"))
+    return tasks
+
+async def stop_background_tasks(tasks: List[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
 
 def log_table_list(tables: list[str]):
     if not tables:
@@ -0,0 +1,116 @@
+"""
+Verification of the RS256 access tokens checked by the auth middleware.
+
+Public keys are parsed once at startup. Tokens carrying a `kid` header are
+verified with the key configured under that id in AUTH_PUBLIC_KEYS, tokens
+without one (or all tokens, when no keys are configured there) with
+AUTH_PUBLIC_KEY_FILE_PATH. Verified claims are cached per
+token hash until the token expires (at most AUTH_TOKEN_CACHE_TTL_SECONDS), so
+a client reusing its token skips the signature check.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import jwt
+from jwt import InvalidKeyError
+from jwt.algorithms import get_default_algorithms
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def load_keys(algorithm: str, default_key: str, keys: str) -> Tuple[Any, Dict[str, Any]]:
+    """
+    :param keys: Comma separated `kid=path` pairs of additional public keys.
+    :return: The parsed default key and the parsed keys by kid.
+    """
+    prepare_key = get_default_algorithms()[algorithm].prepare_key
+    by_kid = {}
+    for pair in filter(None, (pair.strip() for pair in keys.split(","))):
+        kid, _, path = pair.partition("=")
+        if not path:
+            raise ValueError(f"Invalid AUTH_PUBLIC_KEYS entry '{pair}', expected kid=path")
+        try:
+            by_kid[kid.strip()] = prepare_key(Path(path.strip()).read_text().strip())
+        except Exception as e:
+            raise ValueError(f"Failed to load JWT public key '{kid}' from '{path}': {e}") from e
+    return prepare_key(default_key), by_kid
+
+
+class TokenVerifier:
+    def __init__(self, algorithm: str, audience: str, issuer: str, default_key: Any, keys: Dict[str, Any],
+                 cache_ttl: float, cache_max_entries: int):
+        self.algorithm = algorithm
+        self.audience = audience
+        self.issuer = issuer
+        self.default_key = default_key
+        self.keys = keys
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self._verified: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, token: str) -> Any:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None or not self.keys:
+            return self.default_key
+        key = self.keys.get(kid)
+        if key is None:
+            raise InvalidKeyError(f"Unknown key id '{kid}'")
+        return key
+
+    def decode(self, token: str) -> dict:
+        """
+        Verify the token and return its claims.
+        Raises a `PyJWTError` like `jwt.decode` for invalid or expired tokens.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        cached = self._verified.get(digest)
+        if cached is not None:
+            expires_at, claims = cached
+            if expires_at > time.time():
+                self._verified.move_to_end(digest)
+                self.hits += 1
+                return claims
+            del self._verified[digest]
+
+        self.misses += 1
+        claims = jwt.decode(
+            token,
+            self.key_for(token),
+            algorithms=[self.algorithm],
+            audience=self.audience,
+            issuer=self.issuer,
+        )
+        if self.cache_max_entries > 0:
+            expires_at = time.time() + self.cache_ttl
+            if "exp" in claims:
+                expires_at = min(expires_at, claims["exp"])
+            self._verified[digest] = (expires_at, claims)
+            while len(self._verified) > self.cache_max_entries:
+                self._verified.popitem(last=False)
+        return claims
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._verified), "hits": self.hits, "misses": self.misses, "key_ids": sorted(self.keys)}
+
+
+def _create_verifier() -> TokenVerifier:
+    default_key, keys = load_keys(settings.AUTH_ALGORITHM, settings.AUTH_PUBLIC_KEY, settings.AUTH_PUBLIC_KEYS)
+    return TokenVerifier(
+        algorithm=settings.AUTH_ALGORITHM,
+        audience=settings.AUTH_AUDIENCE,
+        issuer=settings.AUTH_ISSUER,
+        default_key=default_key,
+        keys=keys,
+        cache_ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+        cache_max_entries=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    )
+
+
+token_verifier = _create_verifier()
@@ -0,0 +1,153 @@
+"""
+Build the indexes declared on the models that an existing database is missing,
+and drop the ones removed from the models (`OBSOLETE_INDEXES`).
+
+`init_tables` only creates missing tables, so an index added to a model later never
+reaches a database whose table already exists. Indexes are built with
+CREATE INDEX CONCURRENTLY (and dropped with DROP INDEX CONCURRENTLY) so the table
+keeps taking writes meanwhile.
+
+Usage:
+    poetry run python -m app.db.indexes            # create missing indexes
+    poetry run python -m app.db.indexes --dry-run  # only print the statements
+"""
+import argparse
+import asyncio
+from typing import List
+
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.core.logger import logger
+from app.db import models  # noqa: F401 - registers every model on Base.metadata
+from app.db.base_class import Base
+from app.db.session import engine
+
+INVALID_INDEXES_QUERY = text("""
+    SELECT c.relname
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE NOT i.indisvalid AND c.relkind = 'i' AND n.nspname = current_schema()
+""")
+
+# indexes removed from the models, dropped where they still exist
+OBSOLETE_INDEXES = [
+    "idx_driver_details_active_tenant_license", # redundant with uq_driver_tenant_license
+]
+
+INDEX_EXISTS_QUERY = text("SELECT to_regclass(:name) IS NOT NULL")
+
+PARTITIONS_QUERY = text("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(:table)
+    ORDER BY c.relname
+""")
+
+
+def get_missing_indexes(sync_conn) -> List[Index]:
+    """
+    Compare the indexes declared on the models with the ones present in the database.
+    Tables that do not exist yet are skipped, `create_all` builds their indexes.
+    """
+    inspector = inspect(sync_conn)
+    existing_tables = set(inspector.get_table_names())
+
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                missing.append(index)
+    return missing
+
+
+def compile_concurrent_create(index: Index) -> str:
+    index.dialect_kwargs["postgresql_concurrently"] = True
+    return str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+
+
+def compile_partitioned_create(index: Index, partitions: List[str]) -> List[str]:
+    """
+    CONCURRENTLY is not supported on a partitioned table: create the index on the
+    parent only (left invalid), build it concurrently on every partition and attach
+    those, which makes the parent index valid once all partitions are attached.
+    """
+    table_name = index.table.name
+    create = str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+    on_table = f" ON {table_name} "
+    statements = [create.replace(on_table, f" ON ONLY {table_name} ", 1)]
+    for partition in partitions:
+        suffix = partition.removeprefix(f"{table_name}_")
+        partition_index = f"{index.name[:62 - len(suffix)]}_{suffix}"
+        statements.append(
+            create.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+            .replace(f" {index.name} ", f" {partition_index} ", 1)
+            .replace(on_table, f" ON {partition} ", 1)
+        )
+        statements.append(f"ALTER INDEX {index.name} ATTACH PARTITION {partition_index}")
+    return statements
+
+
+async def create_missing_indexes(dry_run: bool = False) -> List[str]:
+    """
+    Create every missing model index, and drop every obsolete one, concurrently.
+
+    A concurrent build that fails (e.g. cancelled or a unique violation) leaves an
+    INVALID index behind which `IF NOT EXISTS` would silently skip, so those are
+    rebuilt with REINDEX CONCURRENTLY first.
+
+    :param dry_run: Only log the statements without running them.
+    :return: The statements that were (or would be) executed.
+    """
+    async with engine.connect() as conn:
+        missing = await conn.run_sync(get_missing_indexes)
+        invalid = (await conn.execute(INVALID_INDEXES_QUERY)).scalars().all()
+        obsolete = [
+            name for name in OBSOLETE_INDEXES
+            if (await conn.execute(INDEX_EXISTS_QUERY, {"name": name})).scalar()
+        ]
+        partitions = {}
+        for index in missing:
+            table_name = index.table.name
+            if table_name not in partitions:
+                result = await conn.execute(PARTITIONS_QUERY, {"table": table_name})
+                partitions[table_name] = result.scalars().all()
+
+    statements = [f"DROP INDEX CONCURRENTLY IF EXISTS {name}" for name in obsolete]
+    statements += [f"REINDEX INDEX CONCURRENTLY {name}" for name in invalid if name not in obsolete]
+    for index in missing:
+        if partitions[index.table.name]:
+            statements += compile_partitioned_create(index, partitions[index.table.name])
+        else:
+            statements.append(compile_concurrent_create(index))
+
+    if not statements:
+        logger.info("✅ All model indexes already exist, no obsolete ones left.")
+        return statements
+
+    # CONCURRENTLY cannot run inside a transaction block
+    autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+    for statement in statements:
+        logger.info(f"⚙️  {statement}")
+        if dry_run:
+            continue
+        async with autocommit_engine.connect() as conn:
+            await conn.execute(text(statement))
+
+    if not dry_run:
+        logger.info(f"✅ {len(statements)} index statement(s) executed.")
+    return statements
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create missing and drop obsolete model indexes concurrently.")
+    parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    args = parser.parse_args()
+
+    asyncio.run(create_missing_indexes(dry_run=args.dry_run))
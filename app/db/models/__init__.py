@@ -1,8 +1,9 @@
 from .vehicle_type import VehicleType
 from .vehicle import Vehicle
 from .vehicle_tracking import VehicleTracking
+from .vehicle_position import VehiclePosition
 from .location import Location
-from .trip import Trip
+from .trip import Trip, trips_archive
 from .driver_details import DriverDetail
 from .user import User
 from .tenant import Tenant
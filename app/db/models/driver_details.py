@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, Text, TIMESTAMP,
-    UniqueConstraint, func
+    UniqueConstraint, Index, func
 )
 from app.db.base_class import Base
 
@@ -29,6 +29,9 @@ class DriverDetail(Base):
     __table_args__ = (
         UniqueConstraint('tenant', 'license_number', name='uq_driver_tenant_license'),
         UniqueConstraint('ext_driver_id', 'tenant', name='uq_ext_driver_id_tenant'),
+        # list route filters tenant and is_active (default True) and pages by id;
+        # tenant + license_number lookups use uq_driver_tenant_license
+        Index('idx_driver_details_tenant_active_id', 'tenant', 'is_active', 'id'),
     )
 
     def __repr__(self):
@@ -1,14 +1,15 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, Float, Text, TIMESTAMP,
-    func, UniqueConstraint
+    func, UniqueConstraint, Index, Table, PrimaryKeyConstraint, DDL, event
 )
 from app.db.base_class import Base
 
 class Trip(Base):
     __tablename__ = "trips"
 
-    id = Column(Integer, primary_key=True, index=True)
-    trip_code = Column(String(100), nullable=False, unique=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    # unique per partition only (the partition key must be part of it), TripRepository checks it on create
+    trip_code = Column(String(100), nullable=False, index=True)
     status = Column(String(100), nullable=False)
 
     trip_start_time = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -40,8 +41,34 @@ class Trip(Base):
 
     tenant = Column(String(100), nullable=False)
 
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    # partition key, so it has to be part of the primary key
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        Index('idx_trips_tenant_status_vehicle_number', 'tenant', 'status', 'vehicle_number'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
     def __repr__(self):
         return f"<Trip(id={self.id}, code={self.trip_code}, status={self.status})>"
+
+
+# Completed trips older than TRIP_ARCHIVE_AFTER_DAYS are moved here, same columns and partitioning
+trips_archive = Table(
+    "trips_archive",
+    Base.metadata,
+    *(Column(column.name, column.type, nullable=column.nullable) for column in Trip.__table__.columns),
+    PrimaryKeyConstraint("id", "created_at", name="trips_archive_pkey"),
+    Index("idx_trips_archive_trip_code", "trip_code"),
+    Index("idx_trips_archive_tenant_status_vehicle_number", "tenant", "status", "vehicle_number"),
+    postgresql_partition_by="RANGE (created_at)",
+)
+
+# rows outside every monthly partition land in the default partition instead of failing
+for _table in (Trip.__table__, trips_archive):
+    event.listen(
+        _table,
+        "after_create",
+        DDL("CREATE TABLE IF NOT EXISTS %(table)s_default PARTITION OF %(table)s DEFAULT"),
+    )
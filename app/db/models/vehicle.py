@@ -34,6 +34,7 @@ class Vehicle(Base):
         Index('idx_vehicles_tracking_asset_id', 'tracking_asset_id'),
         Index('idx_vehicles_vehicle_code', 'vehicle_code'),
         Index('idx_vehicles_vehicle_number', 'vehicle_number'),
+        Index('idx_vehicles_tenant_assigned_type', 'tenant', 'is_assigned', 'vehicle_type_id'),
     )
 
     def __repr__(self):
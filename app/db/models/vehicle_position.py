@@ -0,0 +1,43 @@
+from sqlalchemy import (
+    Column, BigInteger, String, Float, TIMESTAMP, Index, PrimaryKeyConstraint, DDL, event, func
+)
+from app.db.base_class import Base
+
+class VehiclePosition(Base):
+    """
+    GPS position history, append only. `vehicle_tracking` keeps each device's
+    current state; bulk loads such as `app.db.synthetic` write the track here.
+    """
+    __tablename__ = "vehicle_positions"
+
+    id = Column(BigInteger, autoincrement=True, nullable=False)
+
+    # no foreign key, COPY would look up the vehicle of every row
+    vehicle_id = Column(String(50), nullable=False)
+    device_id = Column(String(100), nullable=False)
+
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    speed = Column(Float, nullable=True)
+    accuracy = Column(Float, nullable=True)
+
+    # time of the position and the partition key
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # the partition key has to be part of the primary key
+        PrimaryKeyConstraint('id', 'created_at', name='vehicle_positions_pkey'),
+        Index('idx_vehicle_positions_vehicle_created_at', 'vehicle_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
+    def __repr__(self):
+        return f"<VehiclePosition(vehicle_id={self.vehicle_id}, created_at={self.created_at})>"
+
+
+# rows outside every monthly partition land in the default partition instead of failing
+event.listen(
+    VehiclePosition.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS %(table)s_default PARTITION OF %(table)s DEFAULT"),
+)
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean, Enum, ForeignKey,
-    TIMESTAMP, func
+    TIMESTAMP, Index, func, text
 )
 from app.db.base_class import Base
 import enum
@@ -36,5 +36,13 @@ class VehicleTracking(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        # list route defaults to is_active=True, so only active records are indexed
+        Index(
+            'idx_vehicle_tracking_active_vehicle_type', 'vehicle_id', 'tracking_type',
+            postgresql_where=text('is_active'),
+        ),
+    )
+
     def __repr__(self):
         return f"<VehicleTracking(vehicle_id={self.vehicle_id}, type={self.tracking_type}, device_id={self.device_id})>"
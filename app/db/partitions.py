@@ -0,0 +1,258 @@
+"""
+Monthly `created_at` range partitions for `trips`, `trips_archive` and the
+`vehicle_positions` history.
+
+Trip partitions are created at startup and kept ahead by the trip maintenance task, those of
+`vehicle_positions` by whatever loads it (`app.db.synthetic`); rows outside
+every monthly partition fall into the `<table>_default` partition. Databases
+created before trips were partitioned can be converted once with:
+
+    poetry run python -m app.db.partitions migrate
+
+which renames the old table to `trips_unpartitioned` (drop it once verified),
+recreates `trips` partitioned and copies the rows over.
+"""
+import argparse
+import asyncio
+import datetime
+from typing import List, Optional
+
+from sqlalchemy import Table, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.db.models.trip import Trip, trips_archive
+from app.db.session import engine
+
+settings = get_settings()
+
+# pg_advisory_lock key so only one worker runs trip maintenance at a time
+TRIP_MAINTENANCE_LOCK_ID = 7_202_901
+# pg_advisory_xact_lock key so workers create partitions one after another
+TRIP_PARTITIONS_LOCK_ID = 7_202_902
+
+
+def month_floor(value: datetime.datetime) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month: datetime.date, count: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_start_after(value: datetime.datetime, count: int) -> datetime.datetime:
+    month = add_months(month_floor(value), count)
+    return datetime.datetime(month.year, month.month, 1, tzinfo=datetime.UTC)
+
+
+def partition_name(table_name: str, month: datetime.date) -> str:
+    return f"{table_name}_y{month:%Y}m{month:%m}"
+
+
+async def is_partitioned(conn: AsyncConnection, table_name: str) -> bool:
+    result = await conn.execute(
+        text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table p
+                JOIN pg_class c ON c.oid = p.partrelid
+                WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace
+            )
+        """),
+        {"table": table_name},
+    )
+    return result.scalar()
+
+
+async def ensure_monthly_partitions(
+    conn: AsyncConnection,
+    table_name: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> List[str]:
+    """
+    Create the monthly partitions of `table_name` covering [start, end].
+
+    A month whose rows already sit in the default partition cannot be split out
+    of it; that month is logged and skipped, its rows stay queryable.
+
+    :return: Names of the partitions that were created.
+    """
+    created = []
+    month = month_floor(start)
+    while month <= end.date():
+        name = partition_name(table_name, month)
+        upper = add_months(month, 1)
+        exists = (await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})).scalar()
+        if not exists:
+            try:
+                async with conn.begin_nested():
+                    await conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {table_name} "
+                        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+                    ))
+                created.append(name)
+            except DBAPIError as e:
+                logger.warning(f"Could not create partition {name}: {e.orig}")
+        month = upper
+    return created
+
+
+async def migrate_to_partitioned(conn: AsyncConnection, table: Table, months_ahead: int) -> Optional[str]:
+    """
+    Convert an existing plain `table` into its partitioned definition.
+
+    :return: Name of the renamed legacy table, or None if already partitioned.
+    """
+    name = table.name
+    if await is_partitioned(conn, name):
+        return None
+
+    legacy = f"{name}_unpartitioned"
+    index_names = (await conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"),
+        {"table": name},
+    )).scalars().all()
+    sequence = (await conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": name})).scalar()
+
+    # move the old table and everything named after it out of the way
+    await conn.execute(text(f"ALTER TABLE {name} RENAME TO {legacy}"))
+    for index_name in index_names:
+        await conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:50]}_unpartitioned"'))
+    if sequence:
+        await conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {name}_id_seq_unpartitioned"))
+
+    await conn.run_sync(table.create)
+
+    oldest = (await conn.execute(text(f"SELECT min(created_at) FROM {legacy}"))).scalar()
+    now = datetime.datetime.now(datetime.UTC)
+    await ensure_monthly_partitions(conn, name, oldest or now, month_start_after(now, months_ahead))
+
+    columns = ", ".join(column.name for column in table.columns)
+    await conn.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {legacy}"))
+    await conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE((SELECT max(id) FROM {name}), 0) + 1, false)"
+    ))
+    return legacy
+
+
+class TripMaintenance:
+    """
+    Trip housekeeping: creates the monthly partitions up to `months_ahead` months
+    on, and periodically moves completed trips older than `archive_after_days`
+    into `trips_archive`.
+
+    Archival runs under a Postgres advisory lock, so with several workers only
+    one of them does the work per round.
+    """
+
+    def __init__(self, interval: float, months_ahead: int, archive_after_days: int, batch_size: int):
+        self.interval = interval
+        self.months_ahead = months_ahead
+        self.archive_after_days = archive_after_days
+        self.batch_size = batch_size
+        self.partitioned_month: Optional[datetime.date] = None
+
+    async def run(self):
+        while True:
+            try:
+                if self.partitioned_month != month_floor(datetime.datetime.now(datetime.UTC)):
+                    # a new month since startup, keep the partitions `months_ahead` ahead
+                    await self.create_partitions()
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Trip maintenance failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def create_partitions(self):
+        """Create the trip partitions from this month to `months_ahead` months on."""
+        now = datetime.datetime.now(datetime.UTC)
+        async with engine.begin() as conn:
+            # workers starting together wait for each other instead of racing to create the same ones
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": TRIP_PARTITIONS_LOCK_ID})
+            for table_name in (Trip.__tablename__, trips_archive.name):
+                if not await is_partitioned(conn, table_name):
+                    logger.warning(f"{table_name} is not partitioned, run `python -m app.db.partitions migrate`.")
+                    continue
+                created = await ensure_monthly_partitions(
+                    conn, table_name, now, month_start_after(now, self.months_ahead)
+                )
+                if created:
+                    logger.info(f"Created partitions: {', '.join(created)}")
+        self.partitioned_month = month_floor(now)
+
+    async def run_once(self) -> int:
+        """Archive one round of completed trips, return how many were moved."""
+        from app.db.repositories.trip import TripRepository
+
+        if not self.archive_after_days:
+            return 0
+        async with engine.connect() as conn:
+            locked = (await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": TRIP_MAINTENANCE_LOCK_ID}
+            )).scalar()
+            await conn.commit()
+            if not locked:
+                return 0
+            try:
+                now = datetime.datetime.now(datetime.UTC)
+                cutoff = now - datetime.timedelta(days=self.archive_after_days)
+                async with AsyncSession(bind=conn) as session:
+                    moved = await TripRepository(session).archive_completed(cutoff, self.batch_size)
+                if moved:
+                    logger.info(f"Archived {moved} completed trip(s) that ended before {cutoff:%Y-%m-%d}.")
+                return moved
+            finally:
+                await self.unlock(conn)
+
+    @staticmethod
+    async def unlock(conn: AsyncConnection):
+        try:
+            # after a failure the transaction is aborted and would reject the unlock
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": TRIP_MAINTENANCE_LOCK_ID})
+            await conn.commit()
+        except Exception:
+            # closing the connection ends its session and the lock with it, instead of pooling it locked
+            await conn.invalidate()
+            raise
+
+
+async def migrate(months_ahead: int):
+    async with engine.begin() as conn:
+        for table in (Trip.__table__, trips_archive):
+            exists = (await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": table.name})).scalar()
+            if not exists:
+                await conn.run_sync(table.create)
+                logger.info(f"Created partitioned table {table.name}.")
+                continue
+            legacy = await migrate_to_partitioned(conn, table, months_ahead)
+            if legacy:
+                logger.info(f"{table.name} is now partitioned, the old rows were copied from {legacy}.")
+            else:
+                logger.info(f"{table.name} is already partitioned.")
+
+
+trip_maintenance = TripMaintenance(
+    interval=settings.TRIP_MAINTENANCE_INTERVAL,
+    months_ahead=settings.TRIP_PARTITION_MONTHS_AHEAD,
+    archive_after_days=settings.TRIP_ARCHIVE_AFTER_DAYS,
+    batch_size=settings.TRIP_ARCHIVE_BATCH_SIZE,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trip partition maintenance.")
+    parser.add_argument("command", choices=["migrate", "maintain"])
+    args = parser.parse_args()
+
+    async def maintain():
+        await trip_maintenance.create_partitions()
+        await trip_maintenance.run_once()
+
+    if args.command == "migrate":
+        asyncio.run(migrate(settings.TRIP_PARTITION_MONTHS_AHEAD))
+    else:
+        asyncio.run(maintain())
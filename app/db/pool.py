@@ -0,0 +1,198 @@
+import asyncio
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import greenlet_spawn
+
+from app.core.logger import logger
+
+
+class PoolWindow:
+    """Checkout activity since the last time the autoscaler looked at the pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.timeouts = 0
+        self.peak_in_use = 0
+
+
+class PoolStats:
+    """
+    Connection pool telemetry.
+
+    Counters are plain attributes updated from the event loop thread, so they
+    need no locking.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.resizes = 0
+        self._connected_at: Dict[int, float] = {}
+        self.window = PoolWindow()
+
+    def record_checkout(self, wait: float, in_use: int):
+        self.checkouts += 1
+        self.checkout_wait_total += wait
+        self.checkout_wait_max = max(self.checkout_wait_max, wait)
+        self.window.checkouts += 1
+        self.window.wait_total += wait
+        self.window.peak_in_use = max(self.window.peak_in_use, in_use)
+
+    def record_timeout(self):
+        self.checkout_timeouts += 1
+        self.window.timeouts += 1
+
+    def record_connect(self, connection_record):
+        self.connections_opened += 1
+        self._connected_at[id(connection_record)] = time.monotonic()
+
+    def record_close(self, connection_record):
+        self.connections_closed += 1
+        self._connected_at.pop(id(connection_record), None)
+
+    def take_window(self) -> PoolWindow:
+        window, self.window = self.window, PoolWindow()
+        return window
+
+    def snapshot(self, pool: AsyncAdaptedQueuePool) -> dict:
+        now = time.monotonic()
+        ages = [now - connected_at for connected_at in self._connected_at.values()]
+        return {
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "connections_open": len(ages),
+            "connection_age_max_seconds": round(max(ages), 3) if ages else 0.0,
+            "connection_age_avg_seconds": round(sum(ages) / len(ages), 3) if ages else 0.0,
+            "checkouts_total": self.checkouts,
+            "checkout_wait_avg_ms": round(self.checkout_wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+            "checkout_timeouts_total": self.checkout_timeouts,
+            "connections_opened_total": self.connections_opened,
+            "connections_closed_total": self.connections_closed,
+            "resizes_total": self.resizes,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool` that records how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record_timeout()
+            raise
+        pool_stats.record_checkout(time.perf_counter() - started, self.checkedout())
+        return record
+
+
+def register_pool_events(engine: AsyncEngine):
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_stats.record_connect(connection_record)
+
+    @event.listens_for(engine.sync_engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        pool_stats.record_close(connection_record)
+
+    @event.listens_for(engine.sync_engine, "close_detached")
+    def on_close_detached(dbapi_connection):
+        pool_stats.connections_closed += 1
+
+
+def resize_pool(pool: AsyncAdaptedQueuePool, new_size: int):
+    """
+    Change the number of persistent connections the pool keeps, keeping max_overflow.
+
+    QueuePool tracks open connections as `_overflow = open - pool_size`, so the
+    counter moves by the opposite of the size change. Connections in use beyond
+    the new size are closed as they are returned to the full pool.
+    """
+    delta = new_size - pool.size()
+    if not delta:
+        return
+    queue = pool._pool
+    queue.maxsize = new_size
+    asyncio_queue = queue.__dict__.get("_queue")  # created lazily on first use
+    if asyncio_queue is not None:
+        asyncio_queue._maxsize = new_size
+    with pool._overflow_lock:
+        pool._overflow -= delta
+    pool_stats.resizes += 1
+
+
+async def close_surplus_idle(pool: AsyncAdaptedQueuePool):
+    """Close idle connections left over after the pool was shrunk."""
+    while pool.checkedin() > pool.size():
+        record = pool._pool.get(False)
+        await greenlet_spawn(record.close)
+        pool._dec_overflow()
+
+
+class PoolAutoscaler:
+    """
+    Grows the persistent pool under sustained checkout wait and shrinks it when idle.
+
+    Every `interval` seconds the last window of checkouts is inspected: a pool
+    timeout or an average wait above `grow_wait_ms` grows the pool by a quarter
+    (at least one connection); a peak in-use count below `shrink_utilization` of
+    the pool shrinks it by one. The size always stays within [min_size, max_size].
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        min_size: int,
+        max_size: int,
+        interval: float,
+        grow_wait_ms: float,
+        shrink_utilization: float,
+    ):
+        self.engine = engine
+        self.min_size = min_size
+        self.max_size = max_size
+        self.interval = interval
+        self.grow_wait_ms = grow_wait_ms
+        self.shrink_utilization = shrink_utilization
+
+    async def run(self):
+        pool_stats.take_window()
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.adjust()
+
+    async def adjust(self):
+        pool = self.engine.sync_engine.pool
+        window = pool_stats.take_window()
+        size = pool.size()
+        avg_wait_ms = window.wait_total / window.checkouts * 1000 if window.checkouts else 0.0
+
+        if (window.timeouts or avg_wait_ms >= self.grow_wait_ms) and size < self.max_size:
+            new_size = min(self.max_size, size + max(1, size // 4))
+        elif window.peak_in_use < size * self.shrink_utilization and size > self.min_size:
+            new_size = max(self.min_size, size - 1)
+        else:
+            return
+
+        resize_pool(pool, new_size)
+        await close_surplus_idle(pool)
+        logger.info(
+            f"DB pool resized {size} -> {new_size} "
+            f"(avg wait {avg_wait_ms:.1f}ms, timeouts {window.timeouts}, peak in use {window.peak_in_use})"
+        )
@@ -1,4 +1,5 @@
 from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.future import select
 from sqlalchemy.orm import DeclarativeMeta
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,12 +7,40 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from fastapi import HTTPException, status
 
-from typing import TypeVar, Generic, List, Dict, Optional
+from collections import defaultdict
+from typing import TypeVar, Generic, List, Dict, Optional, Callable, AsyncIterator, Tuple
 
 from app.core.logger import logger
+from app.db.single_flight import coalesced, single_flight
+from app.db.transactions import DEFERRED_WRITES
+from app.tracing.spans import traced
 
 ModelType = TypeVar("ModelType", bound=DeclarativeMeta) # Type variable for generic model types
 
+WriteListener = Callable[[str, object, dict], None]
+# model class -> callbacks run with ("create" | "update" | "upsert" | "delete", obj, previous) after the
+# write is committed; `previous` holds the overwritten values of an update, e.g. to see a tenant change
+_write_listeners: Dict[type, List[WriteListener]] = defaultdict(list)
+
+
+def on_write(model: type, listener: WriteListener):
+    """
+    Register a callback for committed repository writes of `model`.
+    Listeners run synchronously on the event loop and must not raise.
+    """
+    _write_listeners[model].append(listener)
+
+
+def notify_write(action: str, obj, previous: Optional[dict] = None):
+    """Run the write listeners of a committed write."""
+    single_flight.forget(type(obj))
+    for listener in _write_listeners.get(type(obj), ()):
+        try:
+            listener(action, obj, previous or {})
+        except Exception as e:
+            logger.error(f"Write listener {listener!r} failed on {action}: {e}", exc_info=True)
+
+
 class BaseRepository(Generic[ModelType]):
     def __init__(self, db: AsyncSession, model: ModelType):
         """
@@ -23,6 +52,7 @@ class BaseRepository(Generic[ModelType]):
         self.db = db
         self.model = model
 
+    @traced
     async def create(self, data: dict) -> ModelType:
         """
         Create a new record in the database.
@@ -35,6 +65,7 @@ class BaseRepository(Generic[ModelType]):
             self.db.add(obj)
             await self.db.commit()
             await self.db.refresh(obj)
+            self._notify_write("create", obj)
             return obj
         except IntegrityError as e:
             await self.db.rollback()
@@ -50,6 +81,60 @@ class BaseRepository(Generic[ModelType]):
                 detail="Database error occurred."
             ) from e
 
+    @traced
+    async def bulk_upsert(self, rows: List[dict], conflict_columns: List[str]) -> List[ModelType]:
+        """
+        Insert many records in one statement, updating the ones that already exist.
+
+        Every row must have the same keys. Database errors are raised after a
+        rollback so callers can retry the rows one at a time.
+
+        :param rows: The records to write, as dictionaries.
+        :param conflict_columns: Columns of the unique constraint identifying an existing record.
+        :return: The inserted or updated model objects.
+        """
+        if not rows:
+            return []
+        stmt = pg_insert(self.model)
+        updates = {key: stmt.excluded[key] for key in rows[0] if key not in conflict_columns}
+        if hasattr(self.model, "updated_at"):
+            updates["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=conflict_columns, set_=updates).returning(self.model)
+        try:
+            # a list of parameter sets runs as ORM bulk insert, batched into multi-row VALUES
+            result = await self.db.execute(stmt, rows, execution_options={"populate_existing": True})
+            objs = result.scalars().all()
+            await self.db.commit()
+        except SQLAlchemyError:
+            await self.db.rollback()
+            raise
+        for obj in objs:
+            self._notify_write("upsert", obj)
+        return objs
+
+    def _notify_write(self, action: str, obj: ModelType, previous: Optional[dict] = None):
+        deferred = self.db.info.get(DEFERRED_WRITES)
+        if deferred is not None:
+            # committed to a savepoint only, see `app.db.transactions`
+            deferred.append((action, obj, previous))
+            return
+        notify_write(action, obj, previous)
+
+    async def stream_columns(self, *columns, batch_size: int = 5000) -> AsyncIterator[Tuple]:
+        """
+        Stream selected columns of every record without loading the whole table.
+
+        :param columns: The model columns to select.
+        :param batch_size: The number of rows fetched from the server at a time.
+        :return: An async iterator of row tuples.
+        """
+        stmt = select(*columns).execution_options(yield_per=batch_size)
+        result = await self.db.stream(stmt)
+        async for row in result:
+            yield tuple(row)
+
+    @traced
+    @coalesced
     async def get(self, id: int) -> Optional[ModelType]:
         """
         Fetch a record by ID.
@@ -61,6 +146,22 @@ class BaseRepository(Generic[ModelType]):
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
+    def apply_filters(self, query, filters: Optional[Dict[str, any]] = None):
+        """
+        Add an equality condition per filter to a query.
+        Repositories override this for filters that are not plain equality.
+
+        :param query: The select statement to filter.
+        :param filters: A dictionary of filters (field_name: value).
+        :return: The filtered select statement.
+        """
+        if filters:
+            for key, value in filters.items():
+                query = query.where(getattr(self.model, key) == value)
+        return query
+
+    @traced
+    @coalesced
     async def get_all(
         self, 
         filters: Optional[Dict[str, any]] = None, 
@@ -82,9 +183,7 @@ class BaseRepository(Generic[ModelType]):
         query = select(self.model)
         
         # filters
-        if filters:
-            for key, value in filters.items():
-                query = query.where(getattr(self.model, key) == value)
+        query = self.apply_filters(query, filters)
 
         # sorting
         if order_by:
@@ -99,6 +198,7 @@ class BaseRepository(Generic[ModelType]):
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    @traced
     async def update(self, id: int, data: dict) -> Optional[ModelType]:
         """
         Update a record by ID.
@@ -112,13 +212,16 @@ class BaseRepository(Generic[ModelType]):
         obj = result.scalar_one_or_none()
 
         if obj:
+            previous = {key: getattr(obj, key) for key in data}
             for key, value in data.items():
                 setattr(obj, key, value)
             await self.db.commit()
             await self.db.refresh(obj)
+            self._notify_write("update", obj, previous)
             return obj
         return None
 
+    @traced
     async def delete(self, id: int) -> bool:
         """
         Delete a record by ID.
@@ -133,9 +236,12 @@ class BaseRepository(Generic[ModelType]):
         if obj:
             await self.db.delete(obj)
             await self.db.commit()
+            self._notify_write("delete", obj)
             return True
         return False
 
+    @traced
+    @coalesced
     async def count(self, filters: Optional[Dict[str, any]] = None) -> int:
         """
         Count records based on optional filters.
@@ -144,14 +250,12 @@ class BaseRepository(Generic[ModelType]):
         :return: The count of records that match the filters.
         """
         query = select(func.count()).select_from(self.model)
-        
-        if filters:
-            for key, value in filters.items():
-                query = query.where(getattr(self.model, key) == value)
-        
+        query = self.apply_filters(query, filters)
+
         result = await self.db.execute(query)
         return result.scalar()
 
+    @traced
     async def paginate_query(
         self,
         filters: Optional[Dict[str, any]] = None,
@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional
+
+from app.cache.reference import reference_cache
+from app.cache.versions import model_versions
+from app.db.repositories.base import BaseRepository, ModelType
+from app.db.transactions import in_joined_transaction
+
+
+class ReferenceDataRepository(BaseRepository[ModelType]):
+    """
+    Repository of small, rarely changing tables whose reads are served from
+    `reference_cache`.
+
+    Cached objects are expunged from the session that loaded them and shared
+    between requests, so callers must treat them as read only; writes go
+    through the regular methods, which load the record again. Sessions in a
+    joined transaction bypass the cache.
+    """
+    namespace: str # version namespace the model is registered under with `bump_on_write`
+    tenant_filter: Optional[str] = None # filter scoping list reads to one tenant's version
+
+    def _versions(self, filters: Optional[Dict[str, any]]) -> tuple:
+        tenant = (filters or {}).get(self.tenant_filter) if self.tenant_filter else None
+        return model_versions.snapshot((self.namespace,), None if tenant is None else str(tenant))
+
+    def _detach(self, objs: List[ModelType]) -> List[ModelType]:
+        for obj in objs:
+            if obj in self.db:
+                self.db.expunge(obj)
+        return objs
+
+    async def get(self, id: int) -> Optional[ModelType]:
+        load = super().get
+        if in_joined_transaction(self.db):
+            return await load(id)
+
+        async def load_detached():
+            obj = await load(id)
+            return self._detach([obj])[0] if obj else None
+
+        # a single record may move between tenants, so it follows the namespace version
+        key = (self.namespace, "get", id)
+        return await reference_cache.get_or_load(key, model_versions.snapshot((self.namespace,)), load_detached)
+
+    async def get_all(
+        self,
+        filters: Optional[Dict[str, any]] = None,
+        limit: int = 10,
+        offset: int = 0,
+        order_by: str = 'id',
+        order_direction: str = 'ASC'
+    ) -> List[ModelType]:
+        load = super().get_all
+        if in_joined_transaction(self.db):
+            return await load(filters, limit, offset, order_by, order_direction)
+
+        async def load_detached():
+            return self._detach(list(await load(filters, limit, offset, order_by, order_direction)))
+
+        key = (self.namespace, "all", tuple(sorted((filters or {}).items())), limit, offset, order_by, order_direction.upper())
+        return await reference_cache.get_or_load(key, self._versions(filters), load_detached)
+
+    async def count(self, filters: Optional[Dict[str, any]] = None) -> int:
+        load = super().count
+        if in_joined_transaction(self.db):
+            return await load(filters)
+        key = (self.namespace, "count", tuple(sorted((filters or {}).items())))
+        return await reference_cache.get_or_load(key, self._versions(filters), lambda: load(filters))
@@ -1,6 +1,12 @@
-from app.db.repositories.base import BaseRepository
+from app.cache.versions import bump_on_write
+from app.db.repositories.reference import ReferenceDataRepository
 from app.db.models.role import Role
 
-class RoleRepository(BaseRepository[Role]):
+bump_on_write(Role, "roles", "tenant_id")
+
+class RoleRepository(ReferenceDataRepository[Role]):
+    namespace = "roles"
+    tenant_filter = "tenant_id"
+
     def __init__(self, session):
         super().__init__(db=session, model=Role)
\ No newline at end of file
@@ -1,6 +1,11 @@
-from app.db.repositories.base import BaseRepository
+from app.cache.versions import bump_on_write
+from app.db.repositories.reference import ReferenceDataRepository
 from app.db.models.tenant import Tenant
 
-class TenantRepository(BaseRepository[Tenant]):
+bump_on_write(Tenant, "tenants", "id")
+
+class TenantRepository(ReferenceDataRepository[Tenant]):
+    namespace = "tenants"
+
     def __init__(self, session):
         super().__init__(db=session, model=Tenant)
\ No newline at end of file
@@ -1,6 +1,114 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, select, text, tuple_, union_all
+from sqlalchemy.orm import aliased
+
 from app.db.repositories.base import BaseRepository
-from app.db.models.trip import Trip
+from app.db.models.trip import Trip, trips_archive
+from app.db.partitions import ensure_monthly_partitions, is_partitioned
+
+# range filters on the partition key, so Postgres only scans the matching months
+CREATED_RANGE_FILTERS = {
+    "created_from": lambda model, value: model.created_at >= value,
+    "created_to": lambda model, value: model.created_at < value,
+}
+
 
 class TripRepository(BaseRepository[Trip]):
-    def __init__(self, session):
-        super().__init__(db=session, model=Trip)
\ No newline at end of file
+    def __init__(self, session, include_archived: bool = False):
+        """
+        :param include_archived: Read from live and archived trips. Only meant
+            for reads, archived trips are never updated.
+        """
+        super().__init__(db=session, model=Trip)
+        if include_archived:
+            all_trips = union_all(select(Trip.__table__), select(trips_archive)).subquery("trips_all")
+            self.model = aliased(Trip, all_trips)
+
+    def apply_filters(self, query, filters: Optional[Dict[str, any]] = None):
+        filters = dict(filters or {})
+        for key, condition in CREATED_RANGE_FILTERS.items():
+            value = filters.pop(key, None)
+            if value is not None:
+                query = query.where(condition(self.model, value))
+        return super().apply_filters(query, filters)
+
+    async def create(self, data: dict) -> Trip:
+        """
+        Create a trip, rejecting a duplicate trip_code with 409.
+
+        The partitioned table can only enforce uniqueness per partition, so the
+        check runs here under a transaction-level advisory lock on the code.
+        """
+        await self._reject_duplicate_code(data["trip_code"])
+        return await super().create(data)
+
+    async def update(self, id: int, data: dict) -> Optional[Trip]:
+        """Update a trip, rejecting a trip_code another live or archived trip has with 409, see `create`."""
+        if data.get("trip_code") is not None:
+            await self._reject_duplicate_code(data["trip_code"], exclude_id=id)
+        return await super().update(id, data)
+
+    async def _reject_duplicate_code(self, trip_code: str, exclude_id: Optional[int] = None):
+        # held until the transaction writing the trip commits or rolls back
+        await self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:code))"), {"code": trip_code})
+        live = select(Trip.id).where(Trip.trip_code == trip_code)
+        archived = select(trips_archive.c.id).where(trips_archive.c.trip_code == trip_code)
+        if exclude_id is not None:
+            live = live.where(Trip.id != exclude_id)
+            archived = archived.where(trips_archive.c.id != exclude_id)
+        duplicate = await self.db.execute(select(live.union_all(archived).exists()))
+        if duplicate.scalar():
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Trip with trip_code '{trip_code}' already exists."
+            )
+
+    async def archive_completed(self, cutoff: datetime, batch_size: int = 1000) -> int:
+        """
+        Move completed trips that ended and were created before `cutoff` into
+        trips_archive, committing every `batch_size` rows.
+
+        :param cutoff: Trips that ended before this moment are archived.
+        :param batch_size: Rows moved per transaction.
+        :return: The number of trips archived.
+        """
+        trips = Trip.__table__
+        eligible = (
+            (trips.c.status == "completed")
+            & (trips.c.trip_end_time < cutoff)
+            & (trips.c.created_at < cutoff)
+        )
+
+        oldest = (await self.db.execute(select(func.min(trips.c.created_at)).where(eligible))).scalar()
+        if oldest is None:
+            return 0
+        conn = await self.db.connection()
+        if await is_partitioned(conn, trips_archive.name):
+            await ensure_monthly_partitions(conn, trips_archive.name, oldest, cutoff)
+        await self.db.commit()
+
+        columns = [column.name for column in trips.columns]
+        moved = 0
+        while True:
+            batch = (
+                select(trips.c.id, trips.c.created_at)
+                .where(eligible)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            removed = (
+                delete(trips)
+                .where(tuple_(trips.c.id, trips.c.created_at).in_(batch))
+                .returning(*trips.columns)
+                .cte("removed")
+            )
+            stmt = insert(trips_archive).from_select(columns, select(*(removed.c[name] for name in columns)))
+            result = await self.db.execute(stmt)
+            await self.db.commit()
+            moved += result.rowcount
+            if result.rowcount < batch_size:
+                return moved
@@ -1,12 +1,17 @@
+from app.cache.versions import bump_on_write
 from app.db.repositories.base import BaseRepository
+from app.db.single_flight import coalesced
 from app.db.models.user import User
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
+bump_on_write(User, "users", "id")
+
 class UserRepository(BaseRepository[User]):
     def __init__(self, session):
         super().__init__(db=session, model=User)
 
+    @coalesced
     async def get_user_with_roles_and_tenant(self, user_id: int):
         stmt = (
             select(User)
@@ -1,6 +1,10 @@
+from app.cache.versions import bump_on_write
 from app.db.repositories.base import BaseRepository
 from app.db.models.user_role import UserRole
 
+# a user's roles are part of the cached user context
+bump_on_write(UserRole, "users", "user_id")
+
 class UserRoleRepository(BaseRepository[UserRole]):
     def __init__(self, session):
         super().__init__(db=session, model=UserRole)
\ No newline at end of file
@@ -1,6 +1,12 @@
-from app.db.repositories.base import BaseRepository
+from app.cache.versions import bump_on_write
+from app.db.repositories.reference import ReferenceDataRepository
 from app.db.models.vehicle_type import VehicleType
 
-class VehicleTypeRepository(BaseRepository[VehicleType]):
+bump_on_write(VehicleType, "vehicle_types", "tenant")
+
+class VehicleTypeRepository(ReferenceDataRepository[VehicleType]):
+    namespace = "vehicle_types"
+    tenant_filter = "tenant"
+
     def __init__(self, session):
         super().__init__(db=session, model=VehicleType)
\ No newline at end of file
@@ -1,20 +1,65 @@
+import math
+
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import get_settings
+from app.db.pool import InstrumentedAsyncPool, register_pool_events
+from app.db.single_flight import clear_flush, track_flush
+from app.db.timeouts import apply_statement_timeout, statement_timeout_for
+from app.limits.bulkheads import BulkheadFull, tenant_bulkheads
+from app.limits.rate import tenant_key
+from app.metrics.instruments import register_query_events
+from app.tracing.instrument import register_sql_spans
 
 settings = get_settings()
 
 engine = create_async_engine(
     settings.DATABASE_URL,
-    pool_size=5, # persistent connections open to db
-    max_overflow=10, # Extra temp conn open beyond pool_size when pool is full - not persistent
-    pool_timeout=10, # wait in seconds to get a conn from pool before raising an error
+    poolclass=InstrumentedAsyncPool,
+    pool_size=settings.DB_POOL_SIZE, # persistent connections open to db
+    max_overflow=settings.DB_MAX_OVERFLOW, # Extra temp conn open beyond pool_size when pool is full - not persistent
+    pool_timeout=settings.DB_POOL_TIMEOUT, # wait in seconds to get a conn from pool before raising an error
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
     echo=False, # Set to True to log all SQL statements
     future=True
 )
+register_pool_events(engine)
+register_query_events(engine)
+if settings.TRACING_ENABLED:
+    register_sql_spans(engine)
+
+
+class AppSession(Session):
+    pass
+
+
+event.listen(AppSession, "after_begin", apply_statement_timeout)
+event.listen(AppSession, "after_flush", track_flush)
+event.listen(AppSession, "after_commit", clear_flush)
+event.listen(AppSession, "after_rollback", clear_flush)
 
+AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, sync_session_class=AppSession)
 
-AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+async def get_db(request: Request):
+    shared = getattr(request.state, "db_session", None)
+    if shared is not None:
+        # batch operation, the batch request owns the session
+        yield shared
+        return
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
+    claims = getattr(request.state, "user", None)
+    try:
+        async with tenant_bulkheads.slot(tenant_key(claims) if claims else None):
+            async with AsyncSessionLocal() as session:
+                session.info["statement_timeout_ms"] = statement_timeout_for(request.method, request.url.path, request.url.query)
+                yield session
+    except BulkheadFull:
+        # only raised while waiting for a slot, before the session is handed out
+        raise HTTPException(
+            status_code=429,
+            detail="Too many concurrent requests for this tenant",
+            headers={"Retry-After": str(max(1, math.ceil(tenant_bulkheads.queue_timeout)))},
+        )
@@ -0,0 +1,165 @@
+"""
+Coalesce identical concurrent repository reads (single-flight).
+
+While a read decorated with `coalesced` is running, callers of the same method
+with the same arguments on a repository of the same type wait for it instead
+of sending their own query. Each of them gets the result merged into its own
+session (`Session.merge(load=False)`, no SQL), so the objects behave exactly
+as if they had been loaded there.
+
+Only reads still in flight are shared, results are never kept. A committed
+repository write of the model stops later callers from joining the reads of
+that model already running, so nobody gets a result from before a write it
+could have seen. Sessions with changes not yet committed read on their own.
+"""
+import asyncio
+import functools
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.transactions import in_joined_transaction
+
+settings = get_settings()
+
+# result handed to followers whose leader was cancelled, they run the read again
+RETRY = object()
+
+
+@dataclass
+class Flight:
+    model: type
+    followers: List[Tuple[Session, asyncio.Future]] = field(default_factory=list)
+
+
+def adopt(session: Session, value: Any) -> Any:
+    """`value` with every ORM object in it replaced by its copy in `session`."""
+    if hasattr(value, "_sa_instance_state"):
+        return session.merge(value, load=False)
+    if isinstance(value, list):
+        return [adopt(session, item) for item in value]
+    if type(value) is tuple:
+        return tuple(adopt(session, item) for item in value)
+    if type(value) is dict:
+        return {key: adopt(session, item) for key, item in value.items()}
+    return value
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[tuple, Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key: tuple, model: type, session: AsyncSession, load: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, model, load)
+            future = asyncio.get_running_loop().create_future()
+            flight.followers.append((session.sync_session, future))
+            self.followers += 1
+            value = await future
+            if value is not RETRY:
+                return value
+
+    async def _lead(self, key: tuple, model: type, load: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights[key] = Flight(model)
+        self.leaders += 1
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            self._land(key, flight)
+            for _, future in flight.followers:
+                if not future.done():
+                    future.set_result(RETRY)
+            raise
+        except Exception as e:
+            self._land(key, flight)
+            for _, future in flight.followers:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+
+        self._land(key, flight)
+        # right away, before the leader can change its objects
+        for session, future in flight.followers:
+            if future.done():
+                continue
+            try:
+                future.set_result(adopt(session, value))
+            except Exception as e:
+                future.set_exception(e)
+        return value
+
+    def _land(self, key: tuple, flight: Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def forget(self, model: type):
+        """Let later reads of `model` start a new query instead of joining the running ones."""
+        for key, flight in list(self._flights.items()):
+            if flight.model is model:
+                del self._flights[key]
+
+    def snapshot(self) -> dict:
+        return {"in_flight": len(self._flights), "leaders": self.leaders, "followers": self.followers}
+
+
+single_flight = SingleFlight()
+
+
+def can_coalesce(session: AsyncSession) -> bool:
+    return not (
+        session.new or session.dirty or session.deleted
+        or session.info.get("flushed_writes") or in_joined_transaction(session)
+    )
+
+
+def coalesced(method):
+    """
+    Decorator for read methods of `BaseRepository` subclasses, see the module
+    docstring. Calls with unhashable arguments are not coalesced.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if not settings.DB_SINGLE_FLIGHT_ENABLED or not can_coalesce(self.db):
+            return await method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        try:
+            key = (type(self), self.model, method.__name__, freeze(list(bound.arguments.values())[1:]))
+            hash(key)
+        except TypeError:
+            return await method(self, *args, **kwargs)
+        model = sa_inspect(self.model).mapper.class_
+        return await single_flight.run(key, model, self.db, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+def track_flush(session: Session, flush_context):
+    """`after_flush` session hook: the session now holds writes other sessions cannot see."""
+    session.info["flushed_writes"] = True
+
+
+def clear_flush(session: Session, *args):
+    """`after_commit` / `after_rollback` session hook."""
+    session.info.pop("flushed_writes", None)
@@ -0,0 +1,373 @@
+"""
+Synthetic fleet data at production scale.
+
+Seeds the database like the app does on startup (`app.core.seeder`), then adds
+`--tenants` tenants, each with vehicle types, vehicles, drivers and locations
+in Indian cities, and `--months` of trips driven back to back up to now. A
+vehicle shuttles between the locations nearest to its home, and every trip
+leaves a GPS track: a position every `--ping-interval` seconds along a gently
+curving path between the two cities at a varying speed, then one an hour while
+the vehicle is parked at the destination. Tracks are stored in the
+`vehicle_positions` history; `vehicle_tracking` gets one active record per
+vehicle, its current state at the last position.
+
+Tracks and trips are generated by `--workers` processes, each loading its
+share of the vehicles with binary COPY over its own connection. The secondary
+indexes of `vehicle_positions` are dropped for the load and rebuilt afterwards,
+and the monthly partitions of the whole period are created first. The default
+interval gives about 20k positions per vehicle and month, so 5000 vehicles over
+one month are 100M rows.
+
+Runs are reproducible for a `--seed`. Use a dedicated database: `--truncate`
+empties the fleet tables (vehicles, types, drivers, locations, trips, tracking
+and positions) and removes earlier synthetic tenants first.
+
+Usage:
+    poetry run python -m app.db.synthetic --tenants 20 --vehicles 250 --months 1 --truncate
+"""
+import argparse
+import asyncio
+import datetime
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateIndex
+
+from app.core.config import get_settings
+from app.core.seeder import run_seeders
+from app.db.base_class import Base
+from app.db.models.trip import Trip, trips_archive
+from app.db.models.vehicle_position import VehiclePosition
+from app.db.partitions import ensure_monthly_partitions, month_start_after
+from app.db.session import AsyncSessionLocal, engine
+
+settings = get_settings()
+
+TENANT_PREFIX = "synthetic-tenant-"
+ROUTE_CHOICES = 8 # a vehicle drives between this many locations nearest to its home
+ROAD_FACTOR = 1.25 # road distance over straight-line distance
+PARKED_PING_SECONDS = 3600
+
+CLIENTS = ["Acme Retail", "Bharat Cement", "Coastal Foods", "Deccan Steel", "Everfresh Dairy", "Ganga Textiles"]
+
+# name, state, state code, pincode prefix, latitude, longitude
+CITIES = [
+    ("Mumbai", "Maharashtra", "MH", "400", 19.0760, 72.8777),
+    ("Pune", "Maharashtra", "MH", "411", 18.5204, 73.8567),
+    ("Nagpur", "Maharashtra", "MH", "440", 21.1458, 79.0882),
+    ("Nashik", "Maharashtra", "MH", "422", 19.9975, 73.7898),
+    ("Ahmedabad", "Gujarat", "GJ", "380", 23.0225, 72.5714),
+    ("Surat", "Gujarat", "GJ", "395", 21.1702, 72.8311),
+    ("Vadodara", "Gujarat", "GJ", "390", 22.3072, 73.1812),
+    ("Jaipur", "Rajasthan", "RJ", "302", 26.9124, 75.7873),
+    ("Udaipur", "Rajasthan", "RJ", "313", 24.5854, 73.7125),
+    ("Delhi", "Delhi", "DL", "110", 28.7041, 77.1025),
+    ("Gurugram", "Haryana", "HR", "122", 28.4595, 77.0266),
+    ("Chandigarh", "Chandigarh", "CH", "160", 30.7333, 76.7794),
+    ("Lucknow", "Uttar Pradesh", "UP", "226", 26.8467, 80.9462),
+    ("Kanpur", "Uttar Pradesh", "UP", "208", 26.4499, 80.3319),
+    ("Indore", "Madhya Pradesh", "MP", "452", 22.7196, 75.8577),
+    ("Bhopal", "Madhya Pradesh", "MP", "462", 23.2599, 77.4126),
+    ("Kolkata", "West Bengal", "WB", "700", 22.5726, 88.3639),
+    ("Patna", "Bihar", "BR", "800", 25.5941, 85.1376),
+    ("Bhubaneswar", "Odisha", "OD", "751", 20.2961, 85.8245),
+    ("Hyderabad", "Telangana", "TS", "500", 17.3850, 78.4867),
+    ("Visakhapatnam", "Andhra Pradesh", "AP", "530", 17.6868, 83.2185),
+    ("Bengaluru", "Karnataka", "KA", "560", 12.9716, 77.5946),
+    ("Mysuru", "Karnataka", "KA", "570", 12.2958, 76.6394),
+    ("Chennai", "Tamil Nadu", "TN", "600", 13.0827, 80.2707),
+    ("Coimbatore", "Tamil Nadu", "TN", "641", 11.0168, 76.9558),
+    ("Kochi", "Kerala", "KL", "682", 9.9312, 76.2673),
+]
+
+POSITION_COLUMNS = ["vehicle_id", "device_id", "latitude", "longitude", "speed", "accuracy", "created_at"]
+TRACKING_COLUMNS = [
+    "vehicle_id", "tracking_type", "provider_name", "device_id", "sim_number", "latitude", "longitude",
+    "speed", "accuracy", "last_update_time", "is_active", "created_at", "updated_at",
+]
+TRIP_COLUMNS = [
+    "trip_code", "status", "trip_start_time", "trip_end_time", "origin_name", "destination_name",
+    "vehicle_code", "vehicle_number", "total_distance", "total_trip_kms", "total_time", "tat",
+    "driver_name", "driver_number", "created_by", "client_name", "tenant", "created_at", "updated_at",
+]
+
+
+def asyncpg_dsn() -> str:
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+class FleetPlan:
+    """Rows of the small tables and, per vehicle, what the workers need to drive it."""
+
+    def __init__(self, tenants: int, vehicles: int, drivers: int, locations: int, seed: int, now: datetime.datetime):
+        rnd = random.Random(seed)
+        self.now = now
+        self.tenants, self.vehicle_types, self.vehicles, self.drivers, self.locations = [], [], [], [], []
+        self.routes: List[dict] = []
+        for t in range(tenants):
+            tenant = f"{TENANT_PREFIX}{t:03d}"
+            self.tenants.append((tenant, f"{tenant}.example.com", f"ops@{tenant}.example.com", "active", now, now))
+            for kind in ("CAR", "TRUCK", "VAN"):
+                self.vehicle_types.append((kind, f"SYN{t:03d}-{kind}", tenant, 12, 2.5, 3, 9000, True, "synthetic", now, now))
+
+            places = []
+            for j in range(locations):
+                city, state, state_code, pincode, lat, lon = CITIES[(t + j) % len(CITIES)] if j < len(CITIES) else rnd.choice(CITIES)
+                lat, lon = lat + rnd.uniform(-0.15, 0.15), lon + rnd.uniform(-0.15, 0.15)
+                name = f"{city} {'Depot' if j < len(CITIES) else 'Hub'} {j}"
+                places.append((name, lat, lon))
+                self.locations.append((
+                    tenant, f"L{t:03d}{j:05d}", name, lat, lon, city, state, state_code,
+                    f"Plot {rnd.randint(1, 400)}, MIDC, {city}", f"{pincode}{rnd.randint(0, 999):03d}",
+                    500, 5000, rnd.randint(30, 240), now, now,
+                ))
+
+            tenant_drivers = []
+            for j in range(drivers):
+                state_code = CITIES[j % len(CITIES)][2]
+                name, number = f"Driver {t:03d}-{j:05d}", f"9{rnd.randrange(10 ** 9):09d}"
+                tenant_drivers.append((name, number))
+                self.drivers.append((
+                    tenant, name, number, f"{state_code}{t:03d}{j:010d}",
+                    now + datetime.timedelta(days=rnd.randint(30, 3000)), True, False, False, now, now,
+                ))
+
+            for j in range(vehicles):
+                home = rnd.choice(places)
+                nearby = sorted(places, key=lambda place: distance_km(home[1], home[2], place[1], place[2]))
+                state_code = CITIES[(t + j) % len(CITIES)][2]
+                vehicle = {
+                    "id": f"VEH-SYN-{t:03d}-{j:06d}",
+                    "vehicle_number": f"{state_code}{j // 10000:02d}SY{j % 10000:04d}",
+                    "vehicle_code": f"SYN-{t:03d}-{j:06d}",
+                    "tenant": tenant,
+                    "type_code": f"SYN{t:03d}-{rnd.choice(('CAR', 'TRUCK', 'VAN'))}",
+                }
+                self.vehicles.append(vehicle)
+                driver = tenant_drivers[j % len(tenant_drivers)] if tenant_drivers else (None, None)
+                self.routes.append({
+                    **vehicle,
+                    "device_id": f"IMEI{t:03d}{j:09d}",
+                    "sim_number": f"89{rnd.randrange(10 ** 15):015d}",
+                    "driver": driver,
+                    "places": nearby[:ROUTE_CHOICES],
+                })
+
+
+def drive(route: dict, rnd: random.Random, start: datetime.datetime, end: datetime.datetime, interval: float,
+          pings: list, trips: list) -> tuple:
+    """
+    Append the trips of one vehicle from `start` to `end` and the positions
+    along them, return its `vehicle_tracking` row.
+    """
+    vehicle_id, device_id, sim = route["id"], route["device_id"], route["sim_number"]
+    places = route["places"]
+    step = datetime.timedelta(seconds=interval)
+    parked_step = datetime.timedelta(seconds=PARKED_PING_SECONDS)
+    here = places[0]
+    now = start + datetime.timedelta(hours=rnd.uniform(0, 12))
+    while now < end:
+        there = rnd.choice(places[1:]) if len(places) > 1 else here
+        km = max(distance_km(here[1], here[2], there[1], there[2]) * ROAD_FACTOR, 5)
+        kmh = rnd.uniform(35, 60)
+        hours = km / kmh
+        arrival = now + datetime.timedelta(hours=hours)
+        finished = arrival <= end
+        trips.append((
+            f"TRIP-{vehicle_id[8:]}-{len(trips):05d}-{rnd.getrandbits(24):06x}",
+            "completed" if finished else "in_transit",
+            now, arrival if finished else None, here[0], there[0],
+            route["vehicle_code"], route["vehicle_number"],
+            round(km, 1) if finished else None, round(km, 1), round(hours * 60, 1) if finished else None,
+            math.ceil(hours * 1.2), route["driver"][0], route["driver"][1], "synthetic",
+            rnd.choice(CLIENTS), route["tenant"], now, arrival if finished else now,
+        ))
+
+        # a bowed path with small wiggles instead of a straight line
+        lat0, lon0 = here[1], here[2]
+        dlat, dlon = there[1] - lat0, there[2] - lon0
+        norm = math.hypot(dlat, dlon) or 1.0
+        bow = rnd.uniform(-0.12, 0.12) * norm
+        wiggle = rnd.uniform(0.005, 0.02)
+        waves = rnd.randint(3, 12) * math.pi
+        perp_lat, perp_lon = -dlon / norm, dlat / norm
+        steps = max(int(hours * 3600 / interval), 1)
+        at = now
+        uniform = rnd.random
+        for i in range(steps):
+            if at >= end:
+                break
+            f = i / steps
+            offset = bow * math.sin(math.pi * f) + wiggle * math.sin(waves * f)
+            speed = 0.0 if uniform() < 0.04 else kmh * (0.5 + uniform())
+            pings.append((
+                vehicle_id, device_id,
+                lat0 + dlat * f + perp_lat * offset + (uniform() - 0.5) * 0.0004,
+                lon0 + dlon * f + perp_lon * offset + (uniform() - 0.5) * 0.0004,
+                speed, 3 + 17 * uniform(), at,
+            ))
+            at += step
+        if not finished:
+            break
+
+        here, now = there, arrival
+        parked_until = arrival + datetime.timedelta(hours=rnd.uniform(1, 16))
+        while now < parked_until and now < end:
+            pings.append((
+                vehicle_id, device_id,
+                there[1] + (uniform() - 0.5) * 0.0004, there[2] + (uniform() - 0.5) * 0.0004,
+                0.0, 3 + 17 * uniform(), now,
+            ))
+            now += parked_step
+        now = parked_until
+
+    if pings and pings[-1][0] == vehicle_id:
+        _, _, lat, lon, speed, accuracy, at = pings[-1]
+    else:
+        lat, lon, speed, accuracy, at = here[1], here[2], 0.0, None, start
+    return vehicle_id, "GPS", "synthetic", device_id, sim, lat, lon, speed, accuracy, at, True, start, at
+
+
+def load_routes(routes: List[dict], options: dict) -> Tuple[int, int]:
+    """Worker process entry point, returns the positions and trips it loaded."""
+    return asyncio.run(copy_routes(routes, options))
+
+
+async def copy_routes(routes: List[dict], options: dict) -> Tuple[int, int]:
+    conn = await asyncpg.connect(options["dsn"])
+    loaded_pings = loaded_trips = 0
+    try:
+        await conn.execute("SET synchronous_commit = off")
+        pings, trips, tracking = [], [], []
+        for index, route in enumerate(routes):
+            rnd = random.Random(f"{options['seed']}:{route['id']}")
+            tracking.append(drive(route, rnd, options["start"], options["end"], options["interval"], pings, trips))
+            if len(pings) >= options["chunk_size"] or index == len(routes) - 1:
+                await conn.copy_records_to_table("vehicle_positions", records=pings, columns=POSITION_COLUMNS)
+                await conn.copy_records_to_table("vehicle_tracking", records=tracking, columns=TRACKING_COLUMNS)
+                await conn.copy_records_to_table("trips", records=trips, columns=TRIP_COLUMNS)
+                loaded_pings += len(pings)
+                loaded_trips += len(trips)
+                pings, trips, tracking = [], [], []
+    finally:
+        await conn.close()
+    return loaded_pings, loaded_trips
+
+
+async def prepare(args, start: datetime.datetime, now: datetime.datetime):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        await run_seeders(session)
+
+    async with engine.begin() as conn:
+        if args.truncate:
+            await conn.execute(text(
+                "TRUNCATE vehicle_positions, vehicle_tracking, trips, trips_archive, vehicles, vehicle_types, driver_details, location "
+                "RESTART IDENTITY CASCADE"
+            ))
+            await conn.execute(text(f"DELETE FROM tenants WHERE name LIKE '{TENANT_PREFIX}%'"))
+        for table in (Trip.__table__, trips_archive, VehiclePosition.__table__):
+            await ensure_monthly_partitions(
+                conn, table.name, start, month_start_after(now, settings.TRIP_PARTITION_MONTHS_AHEAD)
+            )
+
+
+async def load_fleet(conn: asyncpg.Connection, plan: FleetPlan):
+    await conn.copy_records_to_table("tenants", records=plan.tenants, columns=[
+        "name", "domain", "contact_email", "status", "created_at", "updated_at",
+    ])
+    await conn.copy_records_to_table("vehicle_types", records=plan.vehicle_types, columns=[
+        "type", "code", "tenant", "length", "breadth", "height", "load_capacity", "is_active", "created_by", "created_at", "updated_at",
+    ])
+    type_ids = dict(await conn.fetch("SELECT code, id FROM vehicle_types WHERE code LIKE 'SYN%'"))
+    now = plan.now
+    await conn.copy_records_to_table("vehicles", records=[
+        (v["id"], v["vehicle_number"], type_ids[v["type_code"]], False, v["tenant"], "synthetic", now, now, v["vehicle_code"])
+        for v in plan.vehicles
+    ], columns=[
+        "id", "vehicle_number", "vehicle_type_id", "is_assigned", "tenant", "created_by", "created_at", "updated_at", "vehicle_code",
+    ])
+    await conn.copy_records_to_table("driver_details", records=plan.drivers, columns=[
+        "tenant", "driver_name", "contact_number", "license_number", "license_expiry",
+        "is_active", "is_dedicated", "is_assigned", "created_at", "updated_at",
+    ])
+    await conn.copy_records_to_table("location", records=plan.locations, columns=[
+        "tenant", "location_code", "location_name", "latitude", "longitude", "city_name", "state_name", "state_code",
+        "address", "pincode", "gps_radius", "sim_radius", "avg_loading_time", "created_at", "updated_at",
+    ])
+
+
+async def main(args):
+    now = datetime.datetime.now(datetime.UTC)
+    start = now - datetime.timedelta(days=30 * args.months)
+    began = time.perf_counter()
+
+    await prepare(args, start, now)
+    plan = FleetPlan(args.tenants, args.vehicles, args.drivers, args.locations, args.seed, now)
+    dsn = asyncpg_dsn()
+    conn = await asyncpg.connect(dsn)
+    try:
+        await load_fleet(conn, plan)
+        print(f"Loaded {len(plan.tenants)} tenants, {len(plan.vehicles):,} vehicles, "
+              f"{len(plan.drivers):,} drivers and {len(plan.locations):,} locations.")
+
+        position_indexes = list(VehiclePosition.__table__.indexes)
+        for index in position_indexes:
+            await conn.execute(f'DROP INDEX IF EXISTS "{index.name}"')
+
+        options = {
+            "dsn": dsn, "seed": args.seed, "start": start, "end": now,
+            "interval": args.ping_interval, "chunk_size": args.chunk_size,
+        }
+        # interleaved shards, so every worker gets vehicles of every tenant
+        shards = [plan.routes[worker::args.workers] for worker in range(args.workers)]
+        # spawned, so the workers do not inherit this process' event loop and logging thread
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            loop = asyncio.get_running_loop()
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, load_routes, shard, options) for shard in shards if shard
+            ))
+        pings, trips = (sum(column) for column in zip(*results))
+        loaded = time.perf_counter() - began
+        print(f"Loaded {pings:,} positions and {trips:,} trips in {loaded:.0f}s ({pings / loaded:,.0f} positions/s).")
+
+        print("Rebuilding vehicle_positions indexes, analyzing...")
+        async with engine.begin() as sa_conn:
+            # from the model, so a run that failed after dropping them restores them too
+            for index in position_indexes:
+                await sa_conn.execute(CreateIndex(index))
+        for table in ("vehicle_positions", "vehicle_tracking", "trips", "vehicles", "driver_details", "location", "vehicle_types", "tenants"):
+            await conn.execute(f"ANALYZE {table}")
+    finally:
+        await conn.close()
+    print(f"Done in {time.perf_counter() - began:.0f}s.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--vehicles", type=int, default=100, help="per tenant")
+    parser.add_argument("--drivers", type=int, default=100, help="per tenant")
+    parser.add_argument("--locations", type=int, default=40, help="per tenant")
+    parser.add_argument("--months", type=int, default=3, help="of trips and tracks up to now")
+    parser.add_argument("--ping-interval", type=float, default=60, help="seconds between positions while driving")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="loading processes")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="positions per COPY")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="empty the fleet tables and remove earlier synthetic tenants first")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,25 @@
+from app.core.config import get_settings
+from app.core.route_classes import RouteClass, classify_route
+
+settings = get_settings()
+
+STATEMENT_TIMEOUTS_MS = {
+    RouteClass.INGEST: settings.STATEMENT_TIMEOUT_INGEST_MS,
+    RouteClass.READ: settings.STATEMENT_TIMEOUT_READ_MS,
+    RouteClass.EXPORT: settings.STATEMENT_TIMEOUT_EXPORT_MS,
+    RouteClass.ADMIN: settings.STATEMENT_TIMEOUT_ADMIN_MS,
+}
+
+
+def statement_timeout_for(method: str, path: str, query_string: str = "") -> int:
+    return STATEMENT_TIMEOUTS_MS[classify_route(method, path, query_string)]
+
+
+def apply_statement_timeout(session, transaction, connection):
+    """
+    `after_begin` session hook: scope the request's statement timeout to the
+    transaction that just started, so it never leaks to the pooled connection.
+    """
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
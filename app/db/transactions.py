@@ -0,0 +1,13 @@
+"""
+Sessions joined to a transaction owned by their caller, e.g. an atomic batch.
+
+Commits of such a session only release a savepoint, the caller decides whether
+the transaction commits. Until then nothing it wrote may leave the session:
+repository write notifications are collected under DEFERRED_WRITES in
+`session.info`, and caches neither serve nor store its reads.
+"""
+DEFERRED_WRITES = "deferred_writes"
+
+
+def in_joined_transaction(session) -> bool:
+    return DEFERRED_WRITES in session.info
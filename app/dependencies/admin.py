@@ -0,0 +1,15 @@
+from fastapi import Request, HTTPException
+
+
+def require_admin(request: Request):
+    """
+    Allow the request only when the verified JWT carries the `admin` role.
+    The `roles` claim may be a list or a comma-separated string.
+    """
+    claims = getattr(request.state, "user", None) or {}
+    roles = claims.get("roles") or []
+    if isinstance(roles, str):
+        roles = [role.strip() for role in roles.split(",")]
+
+    if "admin" not in roles:
+        raise HTTPException(status_code=403, detail="Admin role required")
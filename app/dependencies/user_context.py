@@ -1,7 +1,10 @@
 from fastapi import Request, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache.reference import user_context_cache
+from app.cache.versions import model_versions
 from app.db.session import get_db
+from app.db.transactions import in_joined_transaction
 from app.db.repositories.user import UserRepository
 from app.db.models.user import User
 
@@ -9,13 +12,40 @@ async def get_current_user_with_context(
     request: Request,
     db: AsyncSession = Depends(get_db)
 ) -> User:
+    """
+    The authenticated user with roles and tenant loaded, cached per user and
+    token `iat`. The user is detached from the session and shared between
+    requests, so it must not be modified.
+
+    Writes of the user or its roles drop its entry; tenant writes are rare
+    and drop every entry.
+    """
     user_id = getattr(request.state, "user_id", None)
     if not user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
+    try:
+        user_id = int(user_id) # `sub` is a string claim
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    async def load():
+        user = await UserRepository(db).get_user_with_roles_and_tenant(user_id=user_id)
+        if user:
+            for obj in (user, user.tenant, *user.roles):
+                if obj is not None and obj in db:
+                    db.expunge(obj)
+        return user
+
+    claims = getattr(request.state, "user", None) or {}
+    if in_joined_transaction(db):
+        user = await load()
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        return user
+
+    versions = model_versions.snapshot(("users",), str(user_id)) + (model_versions.get("tenants"),)
+    user = await user_context_cache.get_or_load((str(user_id), claims.get("iat")), versions, load)
 
-    user_repo = UserRepository(db)
-    user = await user_repo.get_user_with_roles_and_tenant(user_id=user_id)
-    
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
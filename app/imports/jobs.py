@@ -0,0 +1,98 @@
+"""
+In-memory registry of bulk import jobs.
+
+A job only keeps counters; the uploaded file and the error report live in
+IMPORT_DIR, so memory stays flat whatever the file size. Jobs are local to the
+worker that accepted the upload and are dropped, with their files, once they
+have been finished for IMPORT_JOB_RETENTION_SECONDS.
+"""
+import asyncio
+import os
+import time
+import uuid
+from enum import Enum
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class ImportStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJob:
+    def __init__(self, entity: str, format: str, tenant: Optional[str], directory: str):
+        self.id = uuid.uuid4().hex
+        self.entity = entity
+        self.format = format
+        self.tenant = tenant
+        self.status = ImportStatus.QUEUED
+        self.upload_path = os.path.join(directory, f"{self.id}.upload")
+        self.errors_path = os.path.join(directory, f"{self.id}.errors.csv")
+        self.bytes_total = 0
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.rows_imported = 0
+        self.rows_failed = 0
+        self.errors_bytes = 0 # size of the error report up to the last complete chunk
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def finish(self, status: ImportStatus, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        if os.path.exists(self.upload_path):
+            os.remove(self.upload_path)
+
+    def snapshot(self) -> dict:
+        return {
+            "id": self.id,
+            "entity": self.entity,
+            "format": self.format,
+            "tenant": self.tenant,
+            "status": self.status.value,
+            "progress": round(self.bytes_read / self.bytes_total, 4) if self.bytes_total else 0.0,
+            "rows_read": self.rows_read,
+            "rows_imported": self.rows_imported,
+            "rows_failed": self.rows_failed,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ImportJobRegistry:
+    def __init__(self, directory: str, retention_seconds: float):
+        self.directory = directory
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, ImportJob] = {}
+
+    def create(self, entity: str, format: str, tenant: Optional[str]) -> ImportJob:
+        self.purge_expired()
+        os.makedirs(self.directory, exist_ok=True)
+        job = ImportJob(entity, format, tenant, self.directory)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+    def purge_expired(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                for path in (job.upload_path, job.errors_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                del self._jobs[job_id]
+
+
+import_jobs = ImportJobRegistry(settings.IMPORT_DIR, settings.IMPORT_JOB_RETENTION_SECONDS)
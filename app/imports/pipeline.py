@@ -0,0 +1,224 @@
+"""
+Bulk import of CSV / NDJSON onboarding files.
+
+The uploaded file is read back in chunks of IMPORT_CHUNK_SIZE rows: parsing and
+schema validation run in a worker thread, then the valid rows of the chunk are
+written with one upsert. When the upsert fails (a foreign key, a second unique
+constraint...) the chunk is retried row by row so only the offending rows end
+up in the error report.
+"""
+import asyncio
+import csv
+import json
+from dataclasses import dataclass
+from enum import Enum
+from itertools import islice
+from typing import IO, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.db.repositories.driver_details import DriverDetailRepository
+from app.db.repositories.location import LocationRepository
+from app.db.repositories.vehicle import VehicleRepository
+from app.db.session import AsyncSessionLocal
+from app.imports.jobs import ImportJob, ImportStatus
+from app.schemas.driver_details import DriverDetailCreate
+from app.schemas.location import LocationCreate
+from app.schemas.vehicle import VehicleCreate
+
+settings = get_settings()
+
+
+class ImportEntity(str, Enum):
+    LOCATION = "location"
+    VEHICLE = "vehicle"
+    DRIVER = "driver"
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+CONTENT_TYPE_FORMATS = {
+    "text/csv": ImportFormat.CSV,
+    "application/x-ndjson": ImportFormat.NDJSON,
+    "application/jsonl": ImportFormat.NDJSON,
+}
+
+
+@dataclass(frozen=True)
+class ImportTarget:
+    repository_class: type
+    schema: Type[BaseModel]
+    conflict_columns: Tuple[str, ...] # unique key an imported row updates instead of duplicating
+
+
+IMPORT_TARGETS = {
+    ImportEntity.LOCATION: ImportTarget(LocationRepository, LocationCreate, ("tenant", "location_code")),
+    ImportEntity.VEHICLE: ImportTarget(VehicleRepository, VehicleCreate, ("vehicle_number", "tenant")),
+    ImportEntity.DRIVER: ImportTarget(DriverDetailRepository, DriverDetailCreate, ("tenant", "license_number")),
+}
+
+# (line number, parsed row or None, parse error or None)
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+# (line number, error, raw row)
+RowError = Tuple[int, str, str]
+
+_job_slots: Optional[asyncio.Semaphore] = None
+
+
+def format_from_content_type(content_type: Optional[str]) -> Optional[ImportFormat]:
+    if not content_type:
+        return None
+    return CONTENT_TYPE_FORMATS.get(content_type.split(";")[0].strip().lower())
+
+
+def read_rows(file: IO[str], format: ImportFormat) -> Iterator[ParsedRow]:
+    if format == ImportFormat.CSV:
+        reader = csv.DictReader(file)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, row, "More values than header columns"
+            else:
+                yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(row, dict):
+            yield line_number, row, None
+        else:
+            yield line_number, None, "Each line must be a JSON object"
+
+
+def clean_csv_row(row: dict, schema: Type[BaseModel]) -> dict:
+    """Empty CSV cells fall back to the field default, or null when the field has none."""
+    cleaned = {}
+    for key, value in row.items():
+        if value == "":
+            field = schema.model_fields.get(key)
+            if field is not None and not field.is_required():
+                continue
+            value = None
+        cleaned[key] = value
+    return cleaned
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def read_chunk(
+    rows: Iterator[ParsedRow],
+    job: ImportJob,
+    target: ImportTarget,
+    size: int,
+) -> Tuple[List[Tuple[int, dict]], List[RowError], bool]:
+    """
+    Parse and validate the next `size` rows.
+
+    :return: The valid rows, the rejected rows and whether the file is exhausted.
+    """
+    valid, invalid = [], []
+    count = 0
+    for line_number, row, problem in islice(rows, size):
+        count += 1
+        if problem:
+            invalid.append((line_number, problem, json.dumps(row, default=str) if row else ""))
+            continue
+        if job.format == ImportFormat.CSV:
+            row = clean_csv_row(row, target.schema)
+        if job.tenant:
+            row["tenant"] = job.tenant
+        try:
+            valid.append((line_number, target.schema.model_validate(row).model_dump()))
+        except ValidationError as e:
+            invalid.append((line_number, format_validation_error(e), json.dumps(row, default=str)))
+    return valid, invalid, count < size
+
+
+def write_report(report, errors_file: IO[str], errors: List[RowError]) -> int:
+    """Append `errors` to the error report and flush it, return the report's size."""
+    report.writerows(errors)
+    errors_file.flush()
+    return errors_file.tell()
+
+
+async def write_chunk(repo, target: ImportTarget, rows: List[Tuple[int, dict]]) -> Tuple[int, List[RowError]]:
+    """
+    Upsert the chunk in one statement, falling back to one row at a time.
+
+    :return: The number of rows written and the rows the database rejected.
+    """
+    try:
+        await repo.bulk_upsert([row for _, row in rows], list(target.conflict_columns))
+        return len(rows), []
+    except SQLAlchemyError:
+        pass
+
+    written, rejected = 0, []
+    for line_number, row in rows:
+        try:
+            await repo.bulk_upsert([row], list(target.conflict_columns))
+            written += 1
+        except SQLAlchemyError as e:
+            message = str(getattr(e, "orig", None) or e).splitlines()[0]
+            rejected.append((line_number, message, json.dumps(row, default=str)))
+    return written, rejected
+
+
+async def run_import(job: ImportJob):
+    global _job_slots
+    if _job_slots is None:
+        _job_slots = asyncio.Semaphore(settings.IMPORT_MAX_CONCURRENT_JOBS)
+
+    async with _job_slots:
+        job.status = ImportStatus.RUNNING
+        target = IMPORT_TARGETS[ImportEntity(job.entity)]
+        try:
+            with open(job.upload_path, encoding="utf-8-sig", newline="") as file, \
+                    open(job.errors_path, "w", newline="") as errors_file:
+                report = csv.writer(errors_file)
+                report.writerow(["line", "error", "row"])
+                rows = read_rows(file, ImportFormat(job.format))
+
+                async with AsyncSessionLocal() as session:
+                    session.info["statement_timeout_ms"] = settings.STATEMENT_TIMEOUT_EXPORT_MS
+                    repo = target.repository_class(session)
+                    done = False
+                    while not done:
+                        valid, invalid, done = await asyncio.to_thread(
+                            read_chunk, rows, job, target, settings.IMPORT_CHUNK_SIZE
+                        )
+                        written, rejected = await write_chunk(repo, target, valid) if valid else (0, [])
+
+                        job.errors_bytes = await asyncio.to_thread(
+                            write_report, report, errors_file, sorted(invalid + rejected)
+                        )
+                        job.rows_read += len(valid) + len(invalid)
+                        job.rows_imported += written
+                        job.rows_failed += len(invalid) + len(rejected)
+                        job.bytes_read = file.buffer.tell()
+            job.finish(ImportStatus.COMPLETED)
+            logger.info(
+                f"Import {job.id} of {job.entity} finished: {job.rows_imported} imported, {job.rows_failed} failed."
+            )
+        except asyncio.CancelledError:
+            job.finish(ImportStatus.FAILED, "Import was cancelled.")
+            raise
+        except Exception as e:
+            logger.error(f"Import {job.id} failed: {e}", exc_info=True)
+            job.finish(ImportStatus.FAILED, str(e))
@@ -0,0 +1,109 @@
+"""
+Per tenant caps on requests holding a DB session.
+
+The connection pool is per worker, so are the bulkheads: a tenant can hold at
+most BULKHEAD_MAX_CONCURRENT sessions of a worker and always leaves the rest of
+the pool to the others. Requests over the cap wait up to
+BULKHEAD_QUEUE_TIMEOUT_SECONDS for a slot, in arrival order.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class BulkheadFull(Exception):
+    pass
+
+
+@dataclass
+class Compartment:
+    semaphore: asyncio.Semaphore
+    active: int = 0
+    users: int = 0 # active and waiting, the compartment is dropped at 0
+
+
+class Bulkheads:
+    def __init__(self, limit: int, queue_timeout: float):
+        """
+        :param limit: Concurrent slots per key, 0 disables the bulkheads.
+        """
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self._compartments: Dict[str, Compartment] = {}
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, key: Optional[str]):
+        """Hold one of the slots of `key` for the block, raise `BulkheadFull` when none frees up in time."""
+        if self.limit <= 0 or key is None:
+            yield
+            return
+
+        compartment = self._compartments.get(key)
+        if compartment is None:
+            compartment = self._compartments[key] = Compartment(asyncio.Semaphore(self.limit))
+        compartment.users += 1
+        try:
+            try:
+                await asyncio.wait_for(compartment.semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise BulkheadFull(key) from None
+            compartment.active += 1
+            try:
+                yield
+            finally:
+                compartment.active -= 1
+                compartment.semaphore.release()
+        finally:
+            compartment.users -= 1
+            if compartment.users == 0:
+                del self._compartments[key]
+
+    @asynccontextmanager
+    async def spare_slots(self, key: Optional[str], wanted: int):
+        """
+        Hold up to `wanted` more slots of `key` for the block, only those free
+        right now, and yield how many. Never waits, so a caller that already
+        holds a slot of `key` cannot deadlock with others waiting for one.
+        """
+        if self.limit <= 0 or key is None:
+            yield wanted
+            return
+
+        compartment = self._compartments.get(key)
+        held = 0
+        # the compartment stays while the caller holds its slot
+        while compartment is not None and held < wanted and not compartment.semaphore.locked():
+            await compartment.semaphore.acquire()
+            held += 1
+        if held:
+            compartment.active += held
+        try:
+            yield held
+        finally:
+            if held:
+                compartment.active -= held
+                for _ in range(held):
+                    compartment.semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_timeout_seconds": self.queue_timeout,
+            "rejected": self.rejected,
+            "active": {key: compartment.active for key, compartment in self._compartments.items()},
+            "waiting": {
+                key: compartment.users - compartment.active
+                for key, compartment in self._compartments.items()
+                if compartment.users > compartment.active
+            },
+        }
+
+
+tenant_bulkheads = Bulkheads(settings.BULKHEAD_MAX_CONCURRENT, settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS)
@@ -0,0 +1,178 @@
+"""
+Token bucket rate limits per tenant and route class.
+
+The tenant is taken from the verified JWT claims (RATE_LIMIT_TENANT_CLAIM,
+falling back to the subject), the route class from `classify_route`, so one
+tenant flooding ingest neither starves its own reads nor other tenants.
+
+Buckets live in the worker by default, so with N workers a tenant gets up to N
+times the configured rate. RATE_LIMIT_BACKEND=redis keeps them in Redis and
+shares them between workers; while Redis is unreachable the in-process buckets
+are used instead of rejecting or stalling traffic.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.core.route_classes import RouteClass
+
+settings = get_settings()
+
+SHARED_TIMEOUT = 0.25 # seconds per Redis connect / command
+SHARED_RETRY_INTERVAL = 5 # seconds the in-process buckets are used after a Redis error
+SHARED_ERROR_LOG_INTERVAL = 30 # seconds between warnings while the shared backend fails
+
+# KEYS[1] bucket, ARGV rate and burst; returns the seconds until a token is available, "0" when one was taken
+TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+def tenant_key(claims: Mapping) -> Optional[str]:
+    """Key the limits of a request are tracked under, None without usable claims."""
+    tenant = claims.get(settings.RATE_LIMIT_TENANT_CLAIM)
+    if tenant not in (None, ""):
+        return f"tenant:{tenant}"
+    subject = claims.get("sub")
+    return f"sub:{subject}" if subject else None
+
+
+class TokenBuckets:
+    """In-process buckets, least recently used ones are dropped past `max_buckets`."""
+
+    def __init__(self, max_buckets: int):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: Tuple[str, str], rate: float, burst: int) -> float:
+        """Take a token, return 0 or the seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisTokenBuckets:
+    """Buckets shared by all workers, updated atomically by a Lua script on the Redis clock."""
+
+    def __init__(self, url: str, prefix: str = "navex:ratelimit"):
+        try:
+            import redis.asyncio as redis
+            from redis.exceptions import RedisError
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis needs the redis package, install the `redis` extra") from e
+        self.prefix = prefix
+        self.errors = (RedisError, OSError)
+        self._client = redis.from_url(url, socket_timeout=SHARED_TIMEOUT, socket_connect_timeout=SHARED_TIMEOUT)
+        self._take = self._client.register_script(TAKE_TOKEN_SCRIPT)
+
+    async def take(self, key: Tuple[str, str], rate: float, burst: int) -> float:
+        tenant, route_class = key
+        wait = await self._take(keys=[f"{self.prefix}:{route_class}:{tenant}"], args=[rate, burst])
+        return float(wait)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class RateLimiter:
+    def __init__(self, limits: Dict[RouteClass, Tuple[float, int]], local: TokenBuckets, shared: Optional[RedisTokenBuckets] = None):
+        """
+        :param limits: Tokens per second and bucket size per route class, a rate of 0 disables the class.
+        """
+        self.limits = limits
+        self.local = local
+        self.shared = shared
+        self.allowed = {route_class.value: 0 for route_class in limits}
+        self.limited = {route_class.value: 0 for route_class in limits}
+        self.shared_errors = 0
+        self._shared_retry_at = 0.0
+        self._shared_error_logged_at = 0.0
+
+    async def check(self, tenant: str, route_class: RouteClass) -> float:
+        """Count a request of `tenant`, return 0 when it may proceed or the seconds to wait."""
+        rate, burst = self.limits[route_class]
+        if rate <= 0:
+            return 0.0
+        key = (tenant, route_class.value)
+        wait = None
+        if self.shared is not None and time.monotonic() >= self._shared_retry_at:
+            try:
+                wait = await self.shared.take(key, rate, burst)
+            except self.shared.errors as e:
+                self.shared_error(e)
+        if wait is None:
+            wait = self.local.take(key, rate, burst)
+
+        if wait > 0:
+            self.limited[route_class.value] += 1
+        else:
+            self.allowed[route_class.value] += 1
+        return wait
+
+    def shared_error(self, error: Exception):
+        self.shared_errors += 1
+        now = time.monotonic()
+        self._shared_retry_at = now + SHARED_RETRY_INTERVAL
+        if now - self._shared_error_logged_at >= SHARED_ERROR_LOG_INTERVAL:
+            self._shared_error_logged_at = now
+            logger.warning(f"Rate limit backend unavailable, using in-process buckets: {error}")
+
+    async def close(self):
+        if self.shared is not None:
+            await self.shared.close()
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": "redis" if self.shared is not None else "memory",
+            "limits": {
+                route_class.value: {"per_second": rate, "burst": burst}
+                for route_class, (rate, burst) in self.limits.items()
+            },
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+            "local_buckets": len(self.local),
+            "shared_errors": self.shared_errors,
+        }
+
+
+rate_limiter = RateLimiter(
+    limits={
+        RouteClass.INGEST: (settings.RATE_LIMIT_INGEST_PER_SECOND, settings.RATE_LIMIT_INGEST_BURST),
+        RouteClass.READ: (settings.RATE_LIMIT_READ_PER_SECOND, settings.RATE_LIMIT_READ_BURST),
+        RouteClass.EXPORT: (settings.RATE_LIMIT_EXPORT_PER_SECOND, settings.RATE_LIMIT_EXPORT_BURST),
+        RouteClass.ADMIN: (settings.RATE_LIMIT_ADMIN_PER_SECOND, settings.RATE_LIMIT_ADMIN_BURST),
+    },
+    local=TokenBuckets(settings.RATE_LIMIT_MAX_BUCKETS),
+    shared=RedisTokenBuckets(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_BACKEND == "redis" else None,
+)
@@ -0,0 +1,65 @@
+"""Families read at scrape time from the stats the app already keeps (pool, caches)."""
+from typing import List
+
+from app.cache.reference import reference_cache, user_context_cache
+from app.cache.responses import response_cache
+from app.core.logger import log_pipeline
+from app.core.tokens import token_verifier
+from app.db.pool import pool_stats
+from app.db.session import engine
+from app.metrics.instruments import registry
+from app.metrics.registry import family
+
+
+def pool_families() -> List[dict]:
+    pool = engine.sync_engine.pool
+    gauges = {
+        "size": ("Persistent connections the pool keeps.", pool.size()),
+        "in_use": ("Connections checked out.", pool.checkedout()),
+        "idle": ("Connections waiting in the pool.", pool.checkedin()),
+        "overflow": ("Connections open beyond the pool size.", max(pool.overflow(), 0)),
+    }
+    counters = {
+        "checkouts": ("Connections handed out by the pool.", pool_stats.checkouts),
+        "checkout_wait_seconds": ("Time spent waiting for a connection.", pool_stats.checkout_wait_total),
+        "checkout_timeouts": ("Checkouts that gave up after DB_POOL_TIMEOUT.", pool_stats.checkout_timeouts),
+        "connections_opened": ("Connections opened to the database.", pool_stats.connections_opened),
+        "connections_closed": ("Connections closed.", pool_stats.connections_closed),
+    }
+    return [
+        *(family(f"navex_db_pool_{name}", "gauge", text, (), [((), value)]) for name, (text, value) in gauges.items()),
+        *(family(f"navex_db_pool_{name}_total", "counter", text, (), [((), value)]) for name, (text, value) in counters.items()),
+    ]
+
+
+def cache_families() -> List[dict]:
+    caches = {
+        "response": response_cache,
+        "reference": reference_cache,
+        "user_context": user_context_cache,
+        "token": token_verifier,
+    }
+    return [
+        family("navex_cache_hits_total", "counter", "Lookups answered from a cache.", ("cache",),
+               [((name,), cache.hits) for name, cache in caches.items()]),
+        family("navex_cache_misses_total", "counter", "Lookups a cache could not answer.", ("cache",),
+               [((name,), cache.misses) for name, cache in caches.items()]),
+    ]
+
+
+def logging_families() -> List[dict]:
+    if log_pipeline is None:
+        return []
+    return [
+        family("navex_log_queue_records", "gauge", "Log records waiting for the writer thread.", (),
+               [((), log_pipeline.queue.qsize())]),
+        family("navex_log_records_dropped_total", "counter", "Log records dropped because the queue was full.", ("level",),
+               [((level,), count) for level, count in log_pipeline.handler.dropped.items()]),
+        family("navex_log_records_sampled_out_total", "counter", "Log records left out by LOG_SAMPLE_RATES.", ("logger",),
+               [((name,), count) for name, count in log_pipeline.sampling.sampled_out.items()]),
+    ]
+
+
+def collect() -> List[dict]:
+    """All families of this worker."""
+    return registry.collect() + pool_families() + cache_families() + logging_families()
@@ -0,0 +1,75 @@
+"""Metrics updated on the hot path: HTTP requests, SQL queries, tracking pings and event loop lag."""
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.metrics.registry import QUERY_BUCKETS, Counter, Gauge, Histogram, Registry
+
+PING_LAG_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 900, 3600)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_OPERATIONS = {"SELECT": "select", "INSERT": "insert", "UPDATE": "update", "DELETE": "delete"}
+
+registry = Registry()
+
+http_requests = registry.register(Histogram(
+    "navex_http_request_duration_seconds",
+    "Time until the response was sent, by route template and status.",
+    labels=("method", "route", "status"),
+))
+http_in_flight = registry.register(Gauge(
+    "navex_http_requests_in_flight",
+    "HTTP requests being handled.",
+))
+db_queries = registry.register(Histogram(
+    "navex_db_query_duration_seconds",
+    "Time spent executing SQL statements, by statement type.",
+    labels=("operation",),
+    buckets=QUERY_BUCKETS,
+))
+tracking_pings = registry.register(Counter(
+    "navex_tracking_pings_total",
+    "Tracking positions received, by endpoint.",
+    labels=("source",),
+))
+tracking_ping_lag = registry.register(Histogram(
+    "navex_tracking_ping_lag_seconds",
+    "Time between the device's position timestamp and its arrival.",
+    buckets=PING_LAG_BUCKETS,
+))
+event_loop_lag = registry.register(Histogram(
+    "navex_event_loop_lag_seconds",
+    "How late the event loop ran a callback scheduled every LOOP_MONITOR_INTERVAL_MS.",
+    buckets=LOOP_LAG_BUCKETS,
+))
+event_loop_blocks = registry.register(Counter(
+    "navex_event_loop_blocked_total",
+    "Times the event loop was blocked longer than LOOP_SLOW_CALLBACK_MS.",
+))
+
+
+def record_ping(source: str, reported_at: Optional[datetime]):
+    """Count a received position, `reported_at` is the device's timestamp if it sent one."""
+    tracking_pings.inc((source,))
+    if reported_at is not None:
+        if reported_at.tzinfo is None:
+            reported_at = reported_at.replace(tzinfo=timezone.utc)
+        lag = (datetime.now(timezone.utc) - reported_at).total_seconds()
+        tracking_ping_lag.observe(max(lag, 0.0))
+
+
+def register_query_events(engine: AsyncEngine):
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        operation = QUERY_OPERATIONS.get(statement.lstrip()[:6].upper(), "other")
+        db_queries.observe(time.perf_counter() - started, (operation,))
@@ -0,0 +1,89 @@
+"""
+Metrics of all uvicorn workers on one /metrics endpoint.
+
+With METRICS_MULTIPROC_DIR set every worker writes its families to
+`worker-<pid>.msgpack` in that directory every METRICS_FLUSH_INTERVAL seconds
+and once more on shutdown. A scrape, answered by any one worker, adds its live
+families to the files of the others. Counters and histograms of workers that
+have exited are kept, so totals never go back; their gauges are dropped once
+the file is older than three flush intervals or the worker stopped cleanly.
+
+Empty the directory before starting the server, as with any Prometheus
+multiprocess setup, so files of earlier runs are not counted.
+"""
+import asyncio
+import os
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import List
+
+import msgpack
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.metrics.collectors import collect
+from app.metrics.registry import merge
+
+settings = get_settings()
+
+STALE_AFTER_INTERVALS = 3
+
+
+class WorkerMetricsFiles:
+    def __init__(self, directory: str, interval: float):
+        self.directory = Path(directory)
+        self.interval = interval
+
+    @property
+    def path(self) -> Path:
+        # looked up each time, the app may be imported before the workers fork
+        return self.directory / f"worker-{os.getpid()}.msgpack"
+
+    async def run(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            while True:
+                await self.flush()
+                await asyncio.sleep(self.interval)
+        finally:
+            # lets the other workers drop this one's gauges right away
+            await asyncio.shield(self.flush(stopped=True))
+
+    async def flush(self, stopped: bool = False):
+        data = {"pid": os.getpid(), "written_at": time.time(), "stopped": stopped, "families": collect()}
+        try:
+            await asyncio.to_thread(self.write, msgpack.packb(data))
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.path}: {e}")
+
+    def write(self, content: bytes):
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_bytes(content)
+        os.replace(temporary, self.path)
+
+    def read_others(self) -> List[List[dict]]:
+        """Families from the files of the other workers, without the gauges of those no longer running."""
+        snapshots = []
+        stale_before = time.time() - self.interval * STALE_AFTER_INTERVALS
+        for path in self.directory.glob("worker-*.msgpack"):
+            if path == self.path:
+                continue
+            with suppress(OSError, ValueError, msgpack.UnpackException):
+                data = msgpack.unpackb(path.read_bytes())
+                families = data["families"]
+                if data["stopped"] or data["written_at"] < stale_before:
+                    families = [family for family in families if family["type"] != "gauge"]
+                snapshots.append(families)
+        return snapshots
+
+    async def collect_all(self) -> List[dict]:
+        own = collect()
+        others = await asyncio.to_thread(self.read_others)
+        return merge([own, *others])
+
+
+worker_metrics_files = (
+    WorkerMetricsFiles(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL)
+    if settings.METRICS_MULTIPROC_DIR else None
+)
@@ -0,0 +1,167 @@
+"""
+Prometheus metrics without a client library.
+
+Metrics are updated from the event loop thread only (request middleware, the
+SQLAlchemy cursor events that run in its greenlets), so updates are plain dict
+and list operations without locks. Histograms count into fixed buckets and
+keep one list per label set; nothing is sorted or allocated per observation
+once a label set has been seen.
+
+`collect` turns metrics into families, plain dicts that can be merged across
+workers (see `app.metrics.multiprocess`) and rendered in the text exposition
+format.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def collect(self) -> dict:
+        return family(self.name, self.type, self.documentation, self.labels, self.values.items())
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, labels: Labels = ()):
+        self.values[labels] = value
+
+    def dec(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: observations per bucket (not cumulative), the +Inf bucket, then the sum
+        self.series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> dict:
+        data = family(self.name, self.type, self.documentation, self.labels, self.series.items())
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+def family(name: str, type: str, documentation: str, labels: Sequence[str], samples: Iterable[Tuple[Labels, object]]) -> dict:
+    """A collected metric, `samples` are (label values, value) pairs; histogram values are their series."""
+    return {
+        "name": name,
+        "type": type,
+        "help": documentation,
+        "labels": list(labels),
+        "samples": [[list(label_values), list(value) if isinstance(value, list) else value] for label_values, value in samples],
+    }
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> List[dict]:
+        return [metric.collect() for metric in self._metrics.values()]
+
+
+def merge(snapshots: Iterable[List[dict]]) -> List[dict]:
+    """Add up the families of several workers sample by sample; histograms with other buckets are skipped."""
+    merged: Dict[str, dict] = {}
+    sums: Dict[str, Dict[Labels, object]] = {}
+    for families in snapshots:
+        for data in families:
+            name = data["name"]
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {key: value for key, value in data.items() if key != "samples"}
+                sums[name] = {}
+            elif target["type"] != data["type"] or target.get("buckets") != data.get("buckets"):
+                continue
+            samples = sums[name]
+            for label_values, value in data["samples"]:
+                key = tuple(label_values)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = list(value) if isinstance(value, list) else value
+                elif isinstance(current, list):
+                    samples[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    samples[key] = current + value
+    for name, target in merged.items():
+        target["samples"] = [[list(key), value] for key, value in sums[name].items()]
+    return list(merged.values())
+
+
+def render(families: Iterable[dict]) -> str:
+    """Prometheus text exposition format 0.0.4."""
+    lines = []
+    for data in families:
+        name = data["name"]
+        lines.append(f"# HELP {name} {escape_help(data['help'])}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        label_names = data["labels"]
+        for label_values, value in data["samples"]:
+            pairs = list(zip(label_names, label_values))
+            if data["type"] != "histogram":
+                lines.append(f"{name}{format_labels(pairs)} {format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*data["buckets"], "+Inf"], value):
+                cumulative += count
+                le = bound if bound == "+Inf" else format_value(bound)
+                lines.append(f"{name}_bucket{format_labels(pairs + [('le', le)])} {format_value(cumulative)}")
+            lines.append(f"{name}_sum{format_labels(pairs)} {format_value(value[-1])}")
+            lines.append(f"{name}_count{format_labels(pairs)} {format_value(cumulative)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(str(value))}"' for name, value in pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer() and abs(value) < 1e15):
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
@@ -1,70 +1,82 @@
-from typing import Callable
-
-import jwt
 from jwt import PyJWTError
-from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from uvicorn.main import logger
-
-from app.core.config import get_settings
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.logger import logger
+from app.core.tokens import token_verifier
+from app.tracing.spans import span
 
-settings = get_settings()
+auth_logger = logger.getChild("auth")
 
-EXEMPT_PATHS = {"/docs", "/openapi.json"}
+EXEMPT_PATHS = {"/docs", "/openapi.json", "/metrics"}
 EXEMPT_PREFIXES = ["/open"]
 
 
-class JWTAuthMiddlewareRS256(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable):
-        path = request.url.path
+def unauthorized(message: str) -> JSONResponse:
+    return JSONResponse(status_code=401, content={"error": "Unauthorized", "message": message})
+
+
+class JWTAuthMiddlewareRS256:
+    """
+    Reject HTTP requests without a valid Bearer token, except on the exempt paths.
+    The verified claims are stored as `request.state.user` and their `sub` as
+    `request.state.user_id`.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
 
         if any(path.startswith(prefix) for prefix in EXEMPT_PREFIXES) or path in EXEMPT_PATHS:
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+
+        if scope.get("state", {}).get("user") is not None:
+            # verified by the request that dispatched this one, e.g. a batch operation
+            await self.app(scope, receive, send)
+            return
+
+        with span("authenticate"):
+            response = self.authenticate(scope)
+        if response is not None:
+            await response(scope, receive, send)
+            return
 
-        auth_header = request.headers.get("Authorization")
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def authenticate(scope: Scope):
+        """Store the verified claims in the request state, or return the 401 response to send."""
+        auth_header = Headers(scope=scope).get("Authorization")
         if not auth_header:
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Unauthorized", "message": "Missing Authorization header"},
-            )
+            return unauthorized("Missing Authorization header")
 
         try:
             scheme, token = auth_header.split(" ")
         except ValueError:
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Unauthorized", "message": "Invalid Authorization header format"},
-            )
+            return unauthorized("Invalid Authorization header format")
 
         if scheme.lower() != "bearer":
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Unauthorized", "message": "Authorization scheme must be Bearer"},
-            )
+            return unauthorized("Authorization scheme must be Bearer")
 
         try:
-            payload = jwt.decode(
-                token,
-                settings.AUTH_PUBLIC_KEY,
-                algorithms=[settings.AUTH_ALGORITHM],
-                audience=settings.AUTH_AUDIENCE,
-                issuer=settings.AUTH_ISSUER,
-            )
-            user_id = payload.get("sub")
-            if user_id:
-                request.state.user_id = user_id
-                request.state.user = payload
-            else:
-                return JSONResponse(
-                    status_code=401,
-                    content={"error": "Unauthorized", "message": "Invalid token payload"},
-                )
+            payload = token_verifier.decode(token)
         except PyJWTError as e:
-            logger.error(f"JWTAuthMiddlewareRS256: JWT decode error - {e} path={path} client={request.client.host}")
-            return JSONResponse(
-                status_code=401,
-                content={"error": "Unauthorized", "message": "Invalid or expired token"},
-            )
+            client = scope.get("client")
+            auth_logger.warning(f"JWTAuthMiddlewareRS256: JWT decode error - {e} path={scope['path']} client={client[0] if client else None}")
+            return unauthorized("Invalid or expired token")
+
+        user_id = payload.get("sub")
+        if not user_id:
+            return unauthorized("Invalid token payload")
 
-        return await call_next(request)
\ No newline at end of file
+        state = scope.setdefault("state", {})
+        state["user_id"] = user_id
+        state["user"] = payload
+        return None
@@ -0,0 +1,166 @@
+from typing import Optional
+
+import msgpack
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.context import response_format_ctx_var
+from app.schemas.serialization import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, MSGPACK_MEDIA_TYPES, encode_msgpack
+
+# request bodies of these routes are passed through untouched (uploaded files)
+RAW_BODY_PREFIXES = ("/api/v1/imports",)
+
+
+def media_type(content_type: Optional[str]) -> str:
+    return (content_type or "").partition(";")[0].strip().lower()
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    "msgpack" when the `Accept` header ranks a MessagePack media type at least as
+    high as JSON, "json" otherwise.
+    """
+    if not accept:
+        return "json"
+    msgpack_q = json_q = 0.0
+    for entry in accept.split(","):
+        name, _, params = entry.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif name in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return "msgpack" if msgpack_q > 0 and msgpack_q >= json_q else "json"
+
+
+async def read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            raise OSError("Client disconnected while sending the request body")
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+class ContentNegotiationMiddleware:
+    """
+    Accept MessagePack request bodies (`Content-Type: application/msgpack`) and
+    send MessagePack responses to clients asking for them in `Accept`.
+
+    MessagePack bodies are turned into JSON before routing, so handlers and
+    their validation are unchanged. JSON responses are re-encoded unless the
+    handler already produced MessagePack, see `fast_response`.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        response_format = negotiate_format(headers.get("accept"))
+
+        if media_type(headers.get("content-type")) in MSGPACK_MEDIA_TYPES and not scope["path"].startswith(RAW_BODY_PREFIXES):
+            try:
+                body = orjson.dumps(msgpack.unpackb(await read_body(receive), timestamp=3))
+            except OSError:
+                return
+            except (ValueError, TypeError, msgpack.UnpackException, orjson.JSONEncodeError):
+                response = JSONResponse(status_code=400, content={"detail": "Invalid MessagePack body"})
+                await self.send_in_format(response, response_format, scope, receive, send)
+                return
+            scope, receive = self.with_json_body(scope, receive, body)
+
+        if response_format != "msgpack":
+            await self.app(scope, receive, self.json_sender(send))
+            return
+
+        token = response_format_ctx_var.set("msgpack")
+        try:
+            await self.app(scope, receive, self.msgpack_sender(send))
+        finally:
+            response_format_ctx_var.reset(token)
+
+    @staticmethod
+    def with_json_body(scope: Scope, receive: Receive, body: bytes):
+        headers = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-type", b"content-length")
+        ]
+        headers += [(b"content-type", JSON_MEDIA_TYPE.encode()), (b"content-length", str(len(body)).encode())]
+        sent = False
+
+        async def receive_json() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        # the scope itself is changed, outer middleware reads what the router stores in it
+        scope["headers"] = headers
+        return scope, receive_json
+
+    @staticmethod
+    def json_sender(send: Send) -> Send:
+        async def send_json(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header("Accept")
+            await send(message)
+
+        return send_json
+
+    @staticmethod
+    def msgpack_sender(send: Send) -> Send:
+        start: Message = {}
+        chunks = []
+        transcode = False
+
+        async def send_msgpack(message: Message):
+            nonlocal start, transcode
+            if message["type"] == "http.response.start":
+                transcode = media_type(Headers(raw=message.get("headers", [])).get("content-type")) == JSON_MEDIA_TYPE
+                if transcode:
+                    start = message
+                    return
+                MutableHeaders(scope=message).add_vary_header("Accept")
+                await send(message)
+                return
+            if not transcode or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            if body:
+                body = encode_msgpack(orjson.loads(body))
+            headers = MutableHeaders(scope=start)
+            headers["content-type"] = MSGPACK_MEDIA_TYPE
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        return send_msgpack
+
+    async def send_in_format(self, response, response_format: str, scope: Scope, receive: Receive, send: Send):
+        if response_format == "msgpack":
+            send = self.msgpack_sender(send)
+        await response(scope, receive, send)
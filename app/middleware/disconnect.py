@@ -0,0 +1,70 @@
+import asyncio
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logger import logger
+
+CLIENT_CLOSED_REQUEST = 499
+
+
+class CancelOnDisconnectMiddleware:
+    """
+    Cancel the request handler when the HTTP client goes away.
+
+    A single pump task owns the server's `receive` and hands messages to the app
+    through a one-slot queue, so request bodies keep their backpressure. When the
+    pump sees `http.disconnect` before the response is complete, the handler task
+    is cancelled; an awaiting asyncpg query is cancelled on the server with it and
+    its pooled connection is released instead of running to completion.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages: asyncio.Queue = asyncio.Queue(maxsize=1)
+        response_started = False
+        response_complete = False
+        cancelled_by_disconnect = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        app_task = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+
+        async def pump():
+            nonlocal cancelled_by_disconnect
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    if not response_complete and not app_task.done():
+                        cancelled_by_disconnect = True
+                        app_task.cancel()
+                    if not messages.full():
+                        messages.put_nowait(message)
+                    return
+                await messages.put(message)
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            if not cancelled_by_disconnect:
+                app_task.cancel()
+                raise
+            logger.info(f"Client disconnected, cancelled {scope['method']} {scope['path']}")
+            if not response_started:
+                # keep the ASGI contract for outer middleware, the server discards it
+                await send({"type": "http.response.start", "status": CLIENT_CLOSED_REQUEST, "headers": []})
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            pump_task.cancel()
@@ -0,0 +1,43 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics.instruments import http_in_flight, http_requests
+
+UNROUTED = "unrouted" # answered before routing: 404s, auth and rate limit rejections, response cache hits
+
+
+class MetricsMiddleware:
+    """
+    Count in-flight HTTP requests and observe their duration by method, route
+    template (`/api/v1/vehicle/{id}`, not the concrete path) and status.
+
+    Added last so it is the outermost middleware and times the whole stack. The
+    route is read from `scope["route"]`, set by the router on the shared scope.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNROUTED
+            http_requests.observe(time.perf_counter() - started, (scope["method"], template, str(status)))
@@ -0,0 +1,69 @@
+import asyncio
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.context import profile_id_ctx_var
+from app.profiling.profiles import PROFILE_HEADER, profile_store, verify_token
+from app.profiling.sampler import StackSampler, collapsed
+
+settings = get_settings()
+
+PROFILE_HEADER_KEY = PROFILE_HEADER.lower().encode()
+
+
+def save_profile(profile_id: str, sampler: StackSampler):
+    profile_store.save(profile_id, collapsed(sampler.stop()))
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request sent with a valid `X-Profile-Token`, see
+    `app.profiling.profiles`; the response carries `X-Profile-Id`. Only time the
+    event loop spends on this request's tasks is sampled, other requests running
+    at the same time are left out.
+
+    Other requests only pay for a header lookup.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = next((value for name, value in scope["headers"] if name == PROFILE_HEADER_KEY), None)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = verify_token(token.decode("latin-1"))
+        # reserved before dispatch, so the token cannot be replayed while this request runs
+        if profile_id is None or not await asyncio.to_thread(profile_store.reserve, profile_id):
+            response = JSONResponse(
+                status_code=403,
+                content={"error": "Forbidden", "message": f"Invalid, expired or already used {PROFILE_HEADER}"},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        context_token = profile_id_ctx_var.set(profile_id)
+        sampler = StackSampler(
+            settings.PROFILING_REQUEST_INTERVAL_MS / 1000, loop=asyncio.get_running_loop(), profile_id=profile_id
+        )
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile_id_ctx_var.reset(context_token)
+            # stopping waits for at most one sample, saving for the disk, neither on the event loop
+            await asyncio.to_thread(save_profile, profile_id, sampler)
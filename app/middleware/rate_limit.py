@@ -0,0 +1,53 @@
+import math
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.route_classes import classify_route
+from app.limits.rate import rate_limiter, tenant_key
+from app.tracing.spans import span
+
+settings = get_settings()
+
+
+def too_many_requests(message: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Too Many Requests", "message": message},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimitMiddleware:
+    """
+    Answer 429 with `Retry-After` once a tenant's token bucket for the route
+    class of the request is empty, see `app.limits.rate`.
+
+    Has to run inside the auth middleware, it reads the verified claims from the
+    request state. Requests without claims (exempt paths) are not limited.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        claims = scope.get("state", {}).get("user")
+        tenant = tenant_key(claims) if claims else None
+        if tenant is None:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        with span("rate_limit", {"route_class": route_class.value}):
+            wait = await rate_limiter.check(tenant, route_class)
+        if wait > 0:
+            response = too_many_requests(f"Rate limit exceeded for {route_class.value} requests", wait)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
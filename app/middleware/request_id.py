@@ -1,15 +1,79 @@
 import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
 
-from app.core.context import request_id_ctx_var
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core.config import get_settings
+from app.core.context import request_id_ctx_var, span_ctx_var
+from app.tracing.export import record_trace
+from app.tracing.spans import SERVER, start_trace
+
+settings = get_settings()
+
+
+class RequestIDMiddleware:
+    """
+    Tag every HTTP request with a fresh id, exposed as `X-Request-ID` and `request_id_ctx_var`.
+
+    Sampled requests also get the root span of their trace here, its id is sent back as `X-Trace-ID`.
+    Requests dispatched by a traced batch are child spans of the batch's trace.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
         request_id = str(uuid.uuid4())
         request_id_ctx_var.set(request_id)
 
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
+        root = self.start_span(scope, request_id) if settings.TRACING_ENABLED else None
+        if root is None:
+            async def send_with_request_id(message: Message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)["X-Request-ID"] = request_id
+                await send(message)
+
+            await self.app(scope, receive, send_with_request_id)
+            return
+
+        async def send_with_trace_id(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Trace-ID"] = root.trace.trace_id
+                root.attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        parent = span_ctx_var.get()
+        token = span_ctx_var.set(root)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            root.fail(e)
+            raise
+        finally:
+            span_ctx_var.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            root.end()
+            if parent is None:
+                record_trace(root.trace)
+
+    @staticmethod
+    def start_span(scope: Scope, request_id: str):
+        attributes = {"http.method": scope["method"], "http.target": scope["path"], "request_id": request_id}
+        parent = span_ctx_var.get()
+        if parent is not None:
+            return parent.child(f"{scope['method']} {scope['path']}", attributes, kind=SERVER)
+        return start_trace(
+            f"{scope['method']} {scope['path']}",
+            Headers(scope=scope).get("traceparent"),
+            settings.TRACING_SAMPLE_RATE,
+            settings.TRACING_MAX_SPANS,
+            attributes,
+        )
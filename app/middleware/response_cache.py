@@ -0,0 +1,115 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache.responses import CachedResponse, match_cached_route, response_cache
+from app.cache.versions import model_versions
+from app.core.config import get_settings
+from app.middleware.content_negotiation import negotiate_format
+
+settings = get_settings()
+
+
+def etag_matches(if_none_match: str, etag: bytes) -> bool:
+    """Weak comparison, the one If-None-Match uses: `W/` is ignored on both sides."""
+    tag = etag.decode().removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+class ResponseCacheMiddleware:
+    """
+    Serve cached GET responses of the routes in `CACHED_ROUTES`.
+
+    Every 200 response of those routes gets an ETag (sha256 of the body) and a
+    matching `If-None-Match` is answered with 304 whether or not the entry was
+    cached. The ETag is weak: GZipMiddleware, outside this one, may send the
+    body compressed, and a strong ETag must differ between encodings. The versions are read before the handler runs, so a write that
+    lands while the response is built leaves an entry that is already stale.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http" or scope["method"] != "GET" or not settings.RESPONSE_CACHE_ENABLED
+            or scope.get("state", {}).get("joined_transaction") # may read writes that are rolled back
+        ):
+            await self.app(scope, receive, send)
+            return
+        route = match_cached_route(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        query = sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+        tenant = next((value for name, value in query if name == route.tenant_param), None)
+        headers = Headers(scope=scope)
+        key = (scope["path"], urlencode(query), tenant, negotiate_format(headers.get("accept")))
+        versions = model_versions.snapshot(route.namespaces, tenant)
+        if_none_match = headers.get("if-none-match")
+
+        entry = response_cache.get(key, versions)
+        if entry is not None:
+            await self.send_entry(entry, if_none_match, send, b"HIT")
+            return
+
+        start: Message = {}
+        chunks = []
+        size = 0
+        passthrough = False
+
+        async def capture(message: Message):
+            nonlocal start, size, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                passthrough = message["status"] != 200
+                if passthrough:
+                    await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > settings.RESPONSE_CACHE_MAX_BODY_BYTES:
+                # too large to keep, stream the rest untouched
+                passthrough = True
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                if not message.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b""})
+                return
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            entry = CachedResponse(
+                versions=versions,
+                status=start["status"],
+                headers=[(name, value) for name, value in start.get("headers", []) if name.lower() != b"etag"],
+                body=body,
+                etag=f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'.encode(),
+            )
+            response_cache.put(key, entry)
+            await self.send_entry(entry, if_none_match, send, b"MISS")
+
+        await self.app(scope, receive, capture)
+
+    @staticmethod
+    async def send_entry(entry: CachedResponse, if_none_match: str, send: Send, state: bytes):
+        if if_none_match and etag_matches(if_none_match, entry.etag):
+            response_cache.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", entry.etag)]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers = entry.headers + [(b"etag", entry.etag), (b"x-cache", state)]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
@@ -0,0 +1,98 @@
+import random
+import time
+from typing import Optional, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.capture.traffic import KEPT_HEADERS, redact, redact_query, traffic_capture
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def match_route(scope: Scope) -> Tuple[Optional[str], dict]:
+    """Route template and path parameters of a request the router did not see (rejected or answered from cache)."""
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, child_scope = route.matches(scope)
+        if match != Match.NONE:
+            return route.path, child_scope.get("path_params", {})
+    return None, {}
+
+
+class TrafficCaptureMiddleware:
+    """
+    Record sanitized metadata of a share of the requests for `benchmarks.replay`,
+    see `app.capture.traffic`. Requests matching no route are not recorded.
+
+    The operations of a batch request pass through here again (see
+    `app.batch.runner`) and are recorded like direct requests, marked with
+    `batch_operation`; the batch request itself is not recorded. Its body is
+    captured by shape only, so a replayed batch would carry generated paths
+    and reproduce none of the work, while the recorded operations replay as
+    separate requests (each committed on its own, not in the batch's transaction).
+
+    Added just inside the metrics middleware, so the recorded duration covers
+    authentication, rate limiting and the response cache.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or random.random() >= settings.CAPTURE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        started = time.perf_counter()
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"] if name in KEPT_HEADERS}
+        chunks = []
+        body_bytes = 0
+        status = 500
+        response_bytes = 0
+
+        async def receive_and_record() -> Message:
+            nonlocal body_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_bytes += len(chunk)
+                if body_bytes <= settings.CAPTURE_MAX_BODY_BYTES:
+                    chunks.append(chunk)
+            return message
+
+        async def send_and_record(message: Message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_record, send_and_record)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            if route is not None:
+                template, path_params = route.path, scope.get("path_params", {})
+            else:
+                template, path_params = match_route(scope)
+            if template is not None and not scope.get("state", {}).get("batch_dispatched"):
+                traffic_capture.add({
+                    "time": started_at,
+                    "method": scope["method"],
+                    "route": template,
+                    "path_params": redact(path_params),
+                    "query": redact_query(scope.get("query_string", b"").decode("latin-1")),
+                    "headers": headers,
+                    "body_bytes": body_bytes,
+                    # shaped by the writer thread, larger bodies only by size
+                    "body": b"".join(chunks) if body_bytes <= settings.CAPTURE_MAX_BODY_BYTES else b"",
+                    "status": status,
+                    "duration_ms": round(duration_ms, 3),
+                    "response_bytes": response_bytes,
+                    "batch_operation": bool(scope.get("state", {}).get("batch_operation")),
+                })
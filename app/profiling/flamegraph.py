@@ -0,0 +1,80 @@
+"""Self-contained SVG flamegraph of collapsed stacks, hover a frame for its sample count."""
+import zlib
+from html import escape
+from typing import Dict, Mapping
+
+WIDTH = 1200
+FRAME_HEIGHT = 16
+PADDING = 10
+TITLE_HEIGHT = 30
+MIN_FRAME_WIDTH = 0.3 # narrower frames are left out
+CHAR_WIDTH = 6.5 # of the 11px monospace labels
+
+
+class Node:
+    __slots__ = ("count", "children")
+
+    def __init__(self):
+        self.count = 0
+        self.children: Dict[str, "Node"] = {}
+
+
+def build_tree(stacks: Mapping[str, int]) -> Node:
+    root = Node()
+    for stack, count in stacks.items():
+        node = root
+        node.count += count
+        for frame in stack.split(";"):
+            child = node.children.get(frame)
+            if child is None:
+                child = node.children[frame] = Node()
+            child.count += count
+            node = child
+    return root
+
+
+def depth(node: Node) -> int:
+    return 1 + max((depth(child) for child in node.children.values()), default=0)
+
+
+def color(name: str) -> str:
+    """Warm colours, stable per frame name."""
+    value = zlib.crc32(name.encode())
+    return f"rgb({205 + value % 50},{(value >> 8) % 230},{(value >> 16) % 55})"
+
+
+def render_flamegraph(stacks: Mapping[str, int], title: str) -> str:
+    root = build_tree(stacks)
+    levels = depth(root) - 1
+    height = TITLE_HEIGHT + levels * FRAME_HEIGHT + PADDING
+    total = root.count or 1
+    scale = (WIDTH - 2 * PADDING) / total
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+        f'viewBox="0 0 {WIDTH} {height}" font-family="monospace" font-size="11">',
+        '<rect width="100%" height="100%" fill="#f8f8f8"/>',
+        f'<text x="{WIDTH / 2}" y="20" text-anchor="middle" font-size="14">{escape(title)} ({root.count} samples)</text>',
+    ]
+
+    def draw(node: Node, x: float, level: int):
+        for name, child in sorted(node.children.items()):
+            width = child.count * scale
+            if width >= MIN_FRAME_WIDTH:
+                y = height - PADDING - (level + 1) * FRAME_HEIGHT
+                label = escape(name)
+                percent = child.count / total * 100
+                parts.append(
+                    f'<g><title>{label} ({child.count} samples, {percent:.2f}%)</title>'
+                    f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" height="{FRAME_HEIGHT - 1}" fill="{color(name)}" rx="2"/>'
+                )
+                chars = int((width - 4) / CHAR_WIDTH)
+                if chars >= 3:
+                    text = name if len(name) <= chars else name[:chars - 2] + ".."
+                    parts.append(f'<text x="{x + 3:.2f}" y="{y + FRAME_HEIGHT - 4}">{escape(text)}</text>')
+                parts.append("</g>")
+                draw(child, x, level + 1)
+            x += width
+
+    draw(root, PADDING, 0)
+    parts.append("</svg>")
+    return "\n".join(parts)
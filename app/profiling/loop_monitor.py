@@ -0,0 +1,134 @@
+"""
+Event loop lag and blocking call detection.
+
+`LoopMonitor.run` sleeps LOOP_MONITOR_INTERVAL_MS at a time on the loop and
+records how much later than scheduled it woke up; that delay is what every
+other callback waiting on the loop saw too.
+
+With LOOP_SLOW_CALLBACK_MS set a watchdog thread checks that those wake-ups
+keep coming. Once the loop has not run the monitor for longer than the
+threshold, the watchdog reads the loop thread's stack (the code blocking it,
+e.g. bcrypt or RSA verification called without `to_thread`) and logs it with
+the task and request id. The duration logged is a lower bound; the recorded
+block is updated with the full duration when the loop runs again.
+"""
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+
+from app.core.config import get_settings
+from app.core.context import request_id_ctx_var
+from app.core.logger import logger
+from app.metrics.instruments import event_loop_blocks, event_loop_lag
+from app.profiling.sampler import frame_label
+
+settings = get_settings()
+
+loop_logger = logger.getChild("loop")
+
+RECENT_BLOCKS = 50
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, slow_callback: float):
+        """
+        :param interval: Seconds between lag measurements.
+        :param slow_callback: Seconds the loop may be blocked before its stack is logged, 0 disables the watchdog.
+        """
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.measurements = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.blocks: Deque[dict] = deque(maxlen=RECENT_BLOCKS)
+        self.blocked = 0
+        self._last_wakeup = time.monotonic()
+        self._open_block: Optional[dict] = None
+        self._stopped = threading.Event()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        watchdog = None
+        if self.slow_callback > 0:
+            self._stopped.clear()
+            watchdog = threading.Thread(
+                target=self.watch, args=(loop, threading.get_ident()), name="navex-loop-watchdog", daemon=True,
+            )
+            watchdog.start()
+        try:
+            while True:
+                self._last_wakeup = time.monotonic()
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                self.record(max(loop.time() - expected, 0.0))
+        finally:
+            self._stopped.set()
+
+    def record(self, lag: float):
+        self.measurements += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.total_lag += lag
+        event_loop_lag.observe(lag)
+        block = self._open_block
+        if block is not None:
+            # the loop runs again, the block lasted about as long as this wake-up was late
+            self._open_block = None
+            block["blocked_ms"] = round(max(lag * 1000, block["blocked_ms"]), 1)
+
+    def watch(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int):
+        check_interval = max(min(self.slow_callback / 4, self.interval), 0.005)
+        reported = None
+        while not self._stopped.wait(check_interval):
+            last_wakeup = self._last_wakeup
+            blocked = time.monotonic() - last_wakeup - self.interval
+            if blocked >= self.slow_callback and reported != last_wakeup:
+                reported = last_wakeup
+                self.report(loop, loop_thread_id, blocked)
+
+    def report(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int, blocked: float):
+        frame = sys._current_frames().get(loop_thread_id)
+        stack: List[str] = []
+        while frame is not None:
+            stack.append(frame_label(frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        stack.reverse()
+        task = asyncio.current_task(loop)
+        block = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "blocked_ms": round(blocked * 1000, 1),
+            "task": task.get_name() if task is not None else None,
+            "request_id": task.get_context().get(request_id_ctx_var) if task is not None else None,
+            "stack": stack,
+        }
+        self.blocks.append(block)
+        self._open_block = block
+        self.blocked += 1
+        event_loop_blocks.inc()
+        loop_logger.warning(
+            f"Event loop blocked for more than {block['blocked_ms']} ms in task {block['task']} "
+            f"(request {block['request_id'] or '-'}), most recent call last:\n  " + "\n  ".join(stack),
+            extra={"blocked_ms": block["blocked_ms"], "blocked_request_id": block["request_id"]},
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "slow_callback_ms": self.slow_callback * 1000,
+            "measurements": self.measurements,
+            "lag_ms": {
+                "last": round(self.last_lag * 1000, 3),
+                "mean": round(self.total_lag / self.measurements * 1000, 3) if self.measurements else 0.0,
+                "max": round(self.max_lag * 1000, 3),
+            },
+            "blocked": self.blocked,
+            "recent_blocks": list(self.blocks),
+        }
+
+
+loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL_MS / 1000, settings.LOOP_SLOW_CALLBACK_MS / 1000)
@@ -0,0 +1,103 @@
+"""
+Single request profiles.
+
+An admin asks for a token (`POST /api/v1/admin/profiling/request-tokens`) and
+sends it as `X-Profile-Token` with the request to profile. The token is an
+HMAC-signed profile id with an expiry, so it can be handed to whoever
+reproduces the slow call without giving them admin rights, and it is good for
+one request: the first request sending it reserves the profile id in
+PROFILING_DIR. The stacks are written there under the profile id, where any
+worker sharing the directory serves them, and removed after
+PROFILING_RETENTION_SECONDS.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+PROFILE_HEADER = "X-Profile-Token"
+# tokens of one worker are only valid there unless PROFILING_SECRET is shared
+_secret = (settings.PROFILING_SECRET or secrets.token_hex(32)).encode()
+
+
+def sign(message: str) -> str:
+    return hmac.new(_secret, message.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_token(ttl_seconds: float) -> Tuple[str, str, int]:
+    """A new profile id, the token enabling it and the token's expiry (unix time)."""
+    profile_id = secrets.token_hex(16)
+    expires_at = int(time.time() + ttl_seconds)
+    message = f"{profile_id}.{expires_at}"
+    return profile_id, f"{message}.{sign(message)}", expires_at
+
+
+def verify_token(token: str) -> Optional[str]:
+    """The profile id of a valid, unexpired token, None otherwise."""
+    message, _, signature = token.strip().rpartition(".")
+    profile_id, _, expires_at = message.partition(".")
+    if not hmac.compare_digest(sign(message), signature):
+        return None
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return None
+    return profile_id
+
+
+def parse_collapsed(text: str) -> Dict[str, int]:
+    stacks = {}
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] = stacks.get(stack, 0) + int(count)
+    return stacks
+
+
+class ProfileStore:
+    def __init__(self, directory: str, retention_seconds: float):
+        self.directory = directory
+        self.retention_seconds = retention_seconds
+
+    def path(self, profile_id: str, suffix: str = ".collapsed") -> str:
+        return os.path.join(self.directory, f"{profile_id}{suffix}")
+
+    def reserve(self, profile_id: str) -> bool:
+        """Claim `profile_id` for one request, False if a request of any worker sharing the directory did."""
+        self.purge_expired()
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            # created or failing atomically, also between workers
+            os.close(os.open(self.path(profile_id, ".reserved"), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        return True
+
+    def save(self, profile_id: str, content: str):
+        with open(self.path(profile_id), "w") as file:
+            file.write(content)
+
+    def load(self, profile_id: str) -> Optional[str]:
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(self.path(profile_id)) as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def purge_expired(self):
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - self.retention_seconds
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith((".collapsed", ".reserved")) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_RETENTION_SECONDS)
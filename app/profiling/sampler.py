@@ -0,0 +1,135 @@
+"""
+Sampling profiler reading Python stacks from a background thread.
+
+While a profile runs, a daemon thread reads `sys._current_frames()` every
+`interval` seconds. Nothing is hooked into the interpreter, so without a
+running profile there is no overhead at all, and while one runs the profiled
+code is only paused for the moment a sample is taken (it holds the GIL).
+
+Stacks are aggregated in the collapsed format flamegraph tools read: one
+`root;caller;callee count` entry per distinct stack, the thread name first.
+"""
+import asyncio
+import os
+import sys
+import sysconfig
+import threading
+from collections import Counter
+from types import CodeType
+from typing import Dict, Mapping, Optional
+
+from app.core.context import profile_id_ctx_var
+
+# longest first, so a virtualenv's site-packages wins over its prefix
+PATH_PREFIXES = sorted(
+    {os.path.join(path, "") for path in (sysconfig.get_paths()["purelib"], sysconfig.get_paths()["stdlib"], os.getcwd())},
+    key=len,
+    reverse=True,
+)
+
+
+def frame_label(code: CodeType, line: Optional[int] = None) -> str:
+    """`qualname (file:line)`, the first line of the function unless `line` is given."""
+    filename = code.co_filename
+    for prefix in PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f"{code.co_qualname} ({filename}:{line or code.co_firstlineno})"
+
+
+class SwitchInterval:
+    """
+    A busy thread only hands the GIL over every `sys.getswitchinterval()` (5ms),
+    which would be the real sampling interval. While samplers run, the switch
+    interval is lowered to the shortest of their intervals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._intervals = []
+        self._default = sys.getswitchinterval()
+
+    def add(self, interval: float):
+        with self._lock:
+            if not self._intervals:
+                self._default = sys.getswitchinterval()
+            self._intervals.append(interval)
+            sys.setswitchinterval(min([self._default, *self._intervals]))
+
+    def remove(self, interval: float):
+        with self._lock:
+            self._intervals.remove(interval)
+            sys.setswitchinterval(min([self._default, *self._intervals]))
+
+
+switch_interval = SwitchInterval()
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, interval: float, loop: Optional[asyncio.AbstractEventLoop] = None, profile_id: Optional[str] = None):
+        """
+        :param interval: Seconds between samples.
+        :param loop: With `profile_id`, sample only the thread of this loop, and
+            only while it runs a task of the profiled request (`profile_id_ctx_var`
+            in the task's context). Without, every thread is sampled.
+        """
+        super().__init__(name="navex-profiler", daemon=True)
+        self.interval = interval
+        self.loop = loop
+        self.profile_id = profile_id
+        self.loop_thread_id = threading.get_ident() if loop is not None else None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[CodeType, str] = {}
+        self._stopped = threading.Event()
+
+    def start(self):
+        switch_interval.add(self.interval)
+        super().start()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            if self.loop is not None:
+                self.sample_request()
+            else:
+                self.sample_process()
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        switch_interval.remove(self.interval)
+        return self.stacks
+
+    def sample_process(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != self.ident:
+                self.record(names.get(thread_id, str(thread_id)), frame)
+        self.samples += 1
+
+    def sample_request(self):
+        task = asyncio.current_task(self.loop)
+        if task is None or task.get_context().get(profile_id_ctx_var) != self.profile_id:
+            return
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is not None:
+            self.record("request", frame)
+            self.samples += 1
+
+    def record(self, root: str, frame):
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = frame_label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(root.replace(";", ","))
+        self.stacks[";".join(reversed(stack))] += 1
+
+
+def collapsed(stacks: Mapping[str, int]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+
+
+class BatchOperation(BaseModel):
+    id: Optional[str] = Field(None, description="Name later operations use to reference this result")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: str = Field(..., description="A /api/v1 path with query string, may contain ${id.path.to.value} references")
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1)
+    atomic: bool = Field(False, description="Run every operation in one transaction, rolled back if any fails")
+
+
+class BatchResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: List[BatchResult]
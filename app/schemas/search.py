@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Dict, Optional, Union
+
+class SearchHitRead(BaseModel):
+    id: Union[int, str]
+    score: float
+    match: str
+    field: str
+    values: Dict[str, Optional[str]]
+
+    model_config = {
+        "from_attributes": True
+    }
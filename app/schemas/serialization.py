@@ -0,0 +1,159 @@
+"""
+Fast JSON responses for endpoints returning many rows.
+
+FastAPI validates the returned object against `response_model`, serializes
+the validated models and then JSON-encodes the result, which dominates the
+time of large list responses. `fast_response` instead reads each field of the
+`*Read` schema straight from ORM objects, Core rows or mappings and encodes the
+envelope with orjson. Values already of the annotated type are used as they
+are; anything else goes through pydantic for that field, so the output is the
+same as the validated path. Endpoints keep their `response_model`, which then
+only documents the response.
+
+Clients that negotiated MessagePack get the same document encoded with msgpack,
+with dates, times and UUIDs as the strings the JSON encoding would carry.
+"""
+import datetime
+import decimal
+import enum
+import types
+import uuid
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Type, Union, get_args, get_origin
+
+import msgpack
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.context import response_format_ctx_var
+
+# types orjson encodes exactly like pydantic's JSON mode
+NATIVE_TYPES = (str, int, bool, float, datetime.datetime, datetime.date, datetime.time, uuid.UUID)
+
+Converter = Callable[[Any], Any]
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, uuid.UUID)):
+        # same text as in JSON responses
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)[1:-1].decode()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def encode_msgpack(data: Any) -> bytes:
+    return msgpack.packb(data, default=_msgpack_default)
+
+
+def _pydantic_converter(annotation) -> Converter:
+    adapter = TypeAdapter(annotation)
+    return lambda value: adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json")
+
+
+def _passthrough_types(annotation) -> frozenset:
+    """Value types that serialize to JSON unchanged for `annotation`."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = get_args(annotation)
+        if len(args) == 2 and type(None) in args:
+            inner = next(arg for arg in args if arg is not type(None))
+            return _passthrough_types(inner) | {type(None)}
+        return frozenset()
+    return frozenset({annotation}) if annotation in NATIVE_TYPES else frozenset()
+
+
+def _converter(annotation) -> Converter:
+    fallback = _pydantic_converter(annotation)
+    origin = get_origin(annotation)
+
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1 and len(get_args(annotation)) == 2:
+            inner = _converter(args[0])
+            return lambda value: None if value is None else inner(value)
+        return fallback
+
+    if origin in (list, List) and get_args(annotation):
+        inner = _converter(get_args(annotation)[0])
+        return lambda value: [inner(item) for item in value] if isinstance(value, (list, tuple)) else fallback(value)
+
+    if annotation is float:
+        # Numeric columns load as Decimal
+        return lambda value: value if type(value) is float else float(value) if type(value) is decimal.Decimal else fallback(value)
+    if annotation in NATIVE_TYPES:
+        return lambda value: value if type(value) is annotation else fallback(value)
+    if annotation is decimal.Decimal:
+        return lambda value: str(value) if type(value) is decimal.Decimal else fallback(value)
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return lambda value: value.value if type(value) is annotation else fallback(value)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return row_serializer(annotation)
+    return fallback
+
+
+def _has_custom_logic(schema: Type[BaseModel]) -> bool:
+    decorators = schema.__pydantic_decorators__
+    return any((
+        decorators.validators, decorators.field_validators, decorators.root_validators,
+        decorators.model_validators, decorators.field_serializers, decorators.model_serializers,
+        decorators.computed_fields,
+    ))
+
+
+@lru_cache(maxsize=None)
+def row_serializer(schema: Type[BaseModel]) -> Converter:
+    """
+    Build a function turning one row into the JSON-ready dict `schema` would dump.
+    Schemas with validators or custom serializers are fully handled by pydantic.
+    """
+    if _has_custom_logic(schema):
+        return _pydantic_converter(schema)
+
+    fields = [
+        (name, field.serialization_alias or field.alias or name, _passthrough_types(field.annotation), _converter(field.annotation))
+        for name, field in schema.model_fields.items()
+        if not field.exclude
+    ]
+
+    def serialize(row) -> dict:
+        if isinstance(row, Mapping):
+            get = row.__getitem__
+        elif hasattr(row, "_sa_instance_state"):
+            # loaded columns live in the instance dict, skip the instrumented attribute
+            loaded = row.__dict__
+            get = lambda name: loaded[name] if name in loaded else getattr(row, name)
+        else:
+            get = lambda name: getattr(row, name)
+
+        data = {}
+        for name, key, passthrough, convert in fields:
+            value = get(name)
+            data[key] = value if type(value) in passthrough else convert(value)
+        return data
+
+    return serialize
+
+
+def serialize_rows(schema: Type[BaseModel], rows: Iterable) -> List[dict]:
+    serialize = row_serializer(schema)
+    return [serialize(row) for row in rows]
+
+
+def fast_response(data: Any, code: int = 200, message: Optional[str] = None) -> Response:
+    """
+    An `APIResponse` envelope around JSON-ready `data`, e.g. from `serialize_rows`,
+    encoded in the format the client negotiated.
+    """
+    envelope = {"success": True, "code": code, "message": message, "data": data}
+    if response_format_ctx_var.get() == "msgpack":
+        return Response(content=encode_msgpack(envelope), status_code=code, media_type=MSGPACK_MEDIA_TYPE)
+    body = orjson.dumps(envelope, option=orjson.OPT_UTC_Z)
+    return Response(content=body, status_code=code, media_type=JSON_MEDIA_TYPE)
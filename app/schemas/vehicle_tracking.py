@@ -10,7 +10,7 @@ class TrackingTypeEnum(str, Enum):
     OTHER = "OTHER"
 
 class VehicleTrackingBase(BaseModel):
-    vehicle_id: int
+    vehicle_id: str
     tracking_type: TrackingTypeEnum
     provider_name: Optional[str]
     device_id: str
@@ -39,3 +39,4 @@ class VehicleTrackingPing(BaseModel):
     longitude: confloat(ge=-180, le=180)
     speed: Optional[float]
     accuracy: Optional[float]
+    timestamp: Optional[datetime] = None # when the device took the position, defaults to its arrival
@@ -0,0 +1,150 @@
+"""
+Search indexes of the entities the booking screens autocomplete on.
+
+Each index is built from its repository at startup, in a worker thread so the
+event loop keeps serving, and kept current with this worker's committed
+repository writes. Every SEARCH_INDEX_REFRESH_INTERVAL seconds the records
+are streamed again and compared with the index, which picks up writes made by
+other workers without building a second index next to the live one.
+"""
+import asyncio
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.logger import logger
+from app.db.models.driver_details import DriverDetail
+from app.db.models.location import Location
+from app.db.models.vehicle import Vehicle
+from app.db.repositories.base import on_write
+from app.db.repositories.driver_details import DriverDetailRepository
+from app.db.repositories.location import LocationRepository
+from app.db.repositories.vehicle import VehicleRepository
+from app.db.session import AsyncSessionLocal
+from app.search.index import SearchHit, TenantSearchIndex
+
+# rows fetched from the database, and indexed by the build thread, at a time
+BATCH_SIZE = 5000
+
+Change = Tuple[str, str, Hashable, Dict[str, Optional[str]]]
+
+
+class EntitySearch:
+    def __init__(self, name: str, repository_class, model, fields: Sequence[str]):
+        self.name = name
+        self.repository_class = repository_class
+        self.model = model
+        self.fields = tuple(fields)
+        self.index: Optional[TenantSearchIndex] = None
+        # writes seen while a build is streaming rows, replayed on the new index
+        self._pending: Optional[List[Change]] = None
+        # ids written while a refresh is streaming rows, the index is newer than their rows
+        self._written: Optional[Set[Hashable]] = None
+        on_write(model, self.on_write)
+
+    def on_write(self, action: str, obj, previous: dict):
+        change = (action, obj.tenant, obj.id, {field: getattr(obj, field) for field in self.fields})
+        if self._pending is not None:
+            self._pending.append(change)
+        if self._written is not None:
+            self._written.add(obj.id)
+        if self.index is not None:
+            self._apply(self.index, change)
+
+    @staticmethod
+    def _apply(index: TenantSearchIndex, change: Change):
+        action, tenant, id, values = change
+        if action == "delete":
+            index.remove(id)
+        else:
+            index.upsert(tenant, id, values)
+
+    def _rows(self, session):
+        repo = self.repository_class(session)
+        columns = [self.model.id, self.model.tenant, *(getattr(self.model, field) for field in self.fields)]
+        return repo.stream_columns(*columns, batch_size=BATCH_SIZE)
+
+    async def build(self, session):
+        """Load every record into a new index, in a worker thread, and publish it."""
+        index = TenantSearchIndex(self.fields)
+        self._pending = []
+        try:
+            batch = []
+            async for row in self._rows(session):
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    await asyncio.to_thread(self._load, index, batch)
+                    batch = []
+            await asyncio.to_thread(self._load, index, batch)
+            await asyncio.to_thread(index.finish_bulk)
+            for change in self._pending:
+                self._apply(index, change)
+            self.index = index
+        finally:
+            self._pending = None
+
+    def _load(self, index: TenantSearchIndex, rows: List[tuple]):
+        # the index is not published yet, only this thread touches it
+        for id, tenant, *values in rows:
+            index.upsert(tenant, id, dict(zip(self.fields, values)), bulk=True)
+
+    async def refresh(self, session) -> Tuple[int, int]:
+        """
+        Bring the published index up to date with the database, return the
+        numbers of records changed and removed.
+        """
+        index = self.index
+        seen = set()
+        changed = 0
+        self._written = set()
+        try:
+            async for id, tenant, *values in self._rows(session):
+                seen.add(id)
+                if id not in self._written and index.get(id) != (tenant, tuple(values)):
+                    index.upsert(tenant, id, dict(zip(self.fields, values)))
+                    changed += 1
+            removed = [id for id in index.ids() if id not in seen and id not in self._written]
+            for id in removed:
+                index.remove(id)
+        finally:
+            self._written = None
+        return changed, len(removed)
+
+    def search(self, tenant: str, query: str, limit: int) -> List[SearchHit]:
+        if self.index is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"{self.name.capitalize()} search index is still loading."
+            )
+        return self.index.search(tenant, query, limit)
+
+
+location_search = EntitySearch("location", LocationRepository, Location, ("location_name", "location_code"))
+driver_search = EntitySearch("driver", DriverDetailRepository, DriverDetail, ("driver_name", "license_number"))
+vehicle_search = EntitySearch("vehicle", VehicleRepository, Vehicle, ("vehicle_number", "vehicle_code"))
+
+ENTITY_SEARCHES = [location_search, driver_search, vehicle_search]
+
+
+async def refresh_search_indexes():
+    """Build the indexes not loaded yet and refresh the others."""
+    for entity in ENTITY_SEARCHES:
+        async with AsyncSessionLocal() as session:
+            if entity.index is None:
+                await entity.build(session)
+                logger.info(f"Search index for {entity.name} loaded ({len(entity.index)} records).")
+            else:
+                changed, removed = await entity.refresh(session)
+                logger.info(f"Search index for {entity.name} refreshed ({changed} changed, {removed} removed).")
+
+
+async def run_search_index_refresh(interval: float):
+    """Build the indexes, then refresh them every `interval` seconds (0 builds once)."""
+    while True:
+        try:
+            await refresh_search_indexes()
+        except Exception as e:
+            logger.error(f"Search index refresh failed: {e}", exc_info=True)
+        if not interval:
+            return
+        await asyncio.sleep(interval)
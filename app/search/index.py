@@ -0,0 +1,321 @@
+"""
+In-memory prefix and fuzzy search over a few short text fields per record.
+
+Every field value is indexed as terms: the whole value compacted (casefolded,
+only letters and digits, so "MH-12 AB" matches "mh12ab") and each of its words.
+Terms are kept in a sorted list for prefix lookups with bisect, and broken into
+trigrams for fuzzy matches when the prefix matches do not fill the result.
+
+Most terms belong to a single record, so postings are kept compact: records
+are numbered by slot, a posting is the int `slot * len(fields) + field position`
+and a term's postings are that int alone, or an `array` once it has several.
+"""
+import bisect
+import heapq
+import re
+import sys
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+PREFIX_SCAN_LIMIT = 500 # terms scanned per prefix lookup, bounds short queries like "a"
+FUZZY_MIN_SIMILARITY = 0.3
+FUZZY_CANDIDATE_LIMIT = 200 # terms scored per fuzzy lookup
+FUZZY_COUNT_BUDGET = 5_000 # postings counted per fuzzy lookup, rarest trigrams first
+BULK_SORT_RUN = 10_000 # terms sorted at a time by finish_bulk
+
+NON_ALNUM = re.compile(r"[\W_]+")
+
+Postings = Union[int, array]
+
+
+def compact(value: str) -> str:
+    return NON_ALNUM.sub("", value.casefold())
+
+
+def words(value: str) -> List[str]:
+    return NON_ALNUM.sub(" ", value.casefold()).split()
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"$${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def entries(postings: Postings) -> Iterable[int]:
+    return (postings,) if isinstance(postings, int) else postings
+
+
+@dataclass
+class SearchHit:
+    id: Hashable
+    score: float
+    match: str # "prefix" | "fuzzy"
+    field: str
+    values: Dict[str, Optional[str]]
+
+
+class SearchIndex:
+    """
+    Index of the records of one tenant. Not thread safe: no method awaits and a
+    published index is only touched from the event loop (it may be built in a
+    worker thread before that).
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self._width = len(self.fields)
+        # record id <-> slot, freed slots are reused
+        self._slots: Dict[Hashable, int] = {}
+        self._ids: List[Optional[Hashable]] = []
+        self._rows: List[Optional[Tuple[Optional[str], ...]]] = []
+        self._free: List[int] = []
+        self._terms: List[str] = [] # sorted, unique
+        # term -> postings, for whole values and for single words
+        self._whole: Dict[str, Postings] = {}
+        self._words: Dict[str, Postings] = {}
+        self._grams: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get(self, id: Hashable) -> Optional[Tuple[Optional[str], ...]]:
+        """The indexed values of a record, in `fields` order."""
+        slot = self._slots.get(id)
+        return None if slot is None else self._rows[slot]
+
+    def ids(self) -> Iterable[Hashable]:
+        return self._slots.keys()
+
+    def _record_terms(self, values: Tuple[Optional[str], ...]) -> Iterable[Tuple[str, int, bool]]:
+        for position, value in enumerate(values):
+            if not value:
+                continue
+            whole = compact(value)
+            if whole:
+                yield whole, position, True
+            for word in dict.fromkeys(words(value)):
+                if word != whole:
+                    yield word, position, False
+
+    def _add_term(self, term: str, entry: int, whole: bool, bulk: bool):
+        postings = self._whole if whole else self._words
+        existing = postings.get(term)
+        if existing is None:
+            postings[term] = entry
+            if term not in (self._words if whole else self._whole):
+                if not bulk:
+                    bisect.insort(self._terms, term)
+                grams = self._grams
+                for gram in trigrams(term):
+                    terms = grams.get(gram)
+                    if terms is None:
+                        grams[gram] = [term]
+                    else:
+                        terms.append(term)
+        elif isinstance(existing, int):
+            postings[term] = array("i", (existing, entry))
+        else:
+            existing.append(entry)
+
+    def _remove_term(self, term: str, entry: int, whole: bool):
+        postings = self._whole if whole else self._words
+        existing = postings.get(term)
+        if existing is None:
+            return
+        if not isinstance(existing, int):
+            existing.remove(entry)
+            if len(existing) == 1:
+                postings[term] = existing[0]
+            return
+        del postings[term]
+        if term in (self._words if whole else self._whole):
+            return
+        position = bisect.bisect_left(self._terms, term)
+        if position < len(self._terms) and self._terms[position] == term:
+            del self._terms[position]
+        for gram in trigrams(term):
+            terms = self._grams.get(gram)
+            if terms is not None:
+                terms.remove(term)
+                if not terms:
+                    del self._grams[gram]
+
+    def upsert(self, id: Hashable, values: Dict[str, Optional[str]], bulk: bool = False):
+        """
+        Add or replace a record. With `bulk`, the term list is left unsorted until
+        `finish_bulk` is called, which is much faster when loading many records.
+        """
+        row = tuple(values.get(field) for field in self.fields)
+        slot = self._slots.get(id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._ids[slot] = id
+            else:
+                slot = len(self._ids)
+                self._ids.append(id)
+                self._rows.append(None)
+            self._slots[id] = slot
+        elif self._rows[slot] == row:
+            return
+        else:
+            self._remove_terms(slot)
+        self._rows[slot] = row
+        base = slot * self._width
+        for term, position, whole in self._record_terms(row):
+            self._add_term(term, base + position, whole, bulk)
+
+    def finish_bulk(self):
+        # sorted in short runs merged in Python: one sort of every term would
+        # hold the GIL, and stall the event loop, for the whole sort when built in a thread
+        terms = list(self._whole)
+        terms += [term for term in self._words if term not in self._whole]
+        runs = [sorted(terms[start:start + BULK_SORT_RUN]) for start in range(0, len(terms), BULK_SORT_RUN)]
+        self._terms = list(heapq.merge(*runs))
+
+    def remove(self, id: Hashable):
+        slot = self._slots.pop(id, None)
+        if slot is None:
+            return
+        self._remove_terms(slot)
+        self._ids[slot] = self._rows[slot] = None
+        self._free.append(slot)
+
+    def _remove_terms(self, slot: int):
+        base = slot * self._width
+        for term, position, whole in self._record_terms(self._rows[slot]):
+            self._remove_term(term, base + position, whole)
+
+    def _hit(self, slot: int, score: float, match: str, position: int) -> SearchHit:
+        return SearchHit(
+            id=self._ids[slot],
+            score=round(score, 4),
+            match=match,
+            field=self.fields[position],
+            values=dict(zip(self.fields, self._rows[slot])),
+        )
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """
+        Ranked matches for `query`: prefix matches first (exact values, then whole
+        values, then words; shorter completions before longer ones), then fuzzy
+        trigram matches to fill up to `limit`.
+
+        Candidate terms are visited best score first, so the lookup stops as soon
+        as `limit` records are found however many records share a common prefix.
+        """
+        term = compact(query)
+        if not term:
+            return []
+
+        start = bisect.bisect_left(self._terms, term)
+        prefixed = []
+        for candidate in self._terms[start:start + PREFIX_SCAN_LIMIT]:
+            if not candidate.startswith(term):
+                break
+            prefixed.append(candidate)
+
+        ranked = []
+        for candidate in prefixed:
+            completion = 1 - (len(candidate) - len(term)) / (len(candidate) + 1)
+            if candidate in self._whole:
+                score = 3.0 if candidate == term else 2.0 + completion * 0.99
+                ranked.append((score, self._whole[candidate]))
+            if candidate in self._words:
+                ranked.append((1.0 + completion * 0.99, self._words[candidate]))
+
+        # record slot -> (score, match, field position), the best match per record
+        best: Dict[int, Tuple[float, str, int]] = {}
+        self._collect(best, ranked, "prefix", limit)
+        if len(best) < limit and len(term) >= 3:
+            ranked = []
+            for candidate, similarity in self._fuzzy_terms(term):
+                score = similarity * 0.99
+                if candidate in self._whole:
+                    ranked.append((score, self._whole[candidate]))
+                if candidate in self._words:
+                    ranked.append((score * 0.9, self._words[candidate]))
+            self._collect(best, ranked, "fuzzy", limit)
+
+        top = sorted(best.items(), key=lambda item: (-item[1][0], str(self._ids[item[0]])))
+        return [self._hit(slot, score, match, position) for slot, (score, match, position) in top]
+
+    def _collect(self, best: dict, ranked: list, match: str, limit: int):
+        ranked.sort(key=lambda item: -item[0])
+        for score, postings in ranked:
+            for entry in entries(postings):
+                slot, position = divmod(entry, self._width)
+                if slot not in best:
+                    best[slot] = (score, match, position)
+                    if len(best) >= limit:
+                        return
+
+    def _fuzzy_terms(self, term: str) -> List[Tuple[str, float]]:
+        grams = trigrams(term)
+        postings = sorted((self._grams[gram] for gram in grams if gram in self._grams), key=len)
+        if not postings:
+            return []
+
+        # rare trigrams say the most about a match, common ones are skipped once over budget
+        shared = Counter()
+        counted = 0
+        for terms in postings:
+            if counted and counted + len(terms) > FUZZY_COUNT_BUDGET:
+                break
+            shared.update(terms)
+            counted += len(terms)
+        matches = []
+        for candidate, _ in shared.most_common(FUZZY_CANDIDATE_LIMIT):
+            candidate_grams = trigrams(candidate)
+            similarity = len(grams & candidate_grams) / len(grams | candidate_grams)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches.append((candidate, similarity))
+        return matches
+
+
+class TenantSearchIndex:
+    """One `SearchIndex` per tenant, so searches never see other tenants' records."""
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self._tenants: Dict[str, SearchIndex] = {}
+        self._tenant_of: Dict[Hashable, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._tenant_of)
+
+    def get(self, id: Hashable) -> Optional[Tuple[str, Tuple[Optional[str], ...]]]:
+        """Tenant and indexed values of a record."""
+        tenant = self._tenant_of.get(id)
+        return None if tenant is None else (tenant, self._tenants[tenant].get(id))
+
+    def ids(self) -> Iterable[Hashable]:
+        return self._tenant_of.keys()
+
+    def upsert(self, tenant: str, id: Hashable, values: Dict[str, Optional[str]], bulk: bool = False):
+        tenant = sys.intern(tenant) # one string per tenant, not one per row
+        previous = self._tenant_of.get(id)
+        if previous is not None and previous != tenant:
+            self._tenants[previous].remove(id)
+        index = self._tenants.get(tenant)
+        if index is None:
+            index = self._tenants[tenant] = SearchIndex(self.fields)
+        index.upsert(id, values, bulk=bulk)
+        self._tenant_of[id] = tenant
+
+    def finish_bulk(self):
+        for index in self._tenants.values():
+            index.finish_bulk()
+
+    def remove(self, id: Hashable):
+        tenant = self._tenant_of.pop(id, None)
+        if tenant is not None:
+            self._tenants[tenant].remove(id)
+
+    def search(self, tenant: str, query: str, limit: int = 10) -> List[SearchHit]:
+        index = self._tenants.get(tenant)
+        if index is None:
+            return []
+        return index.search(query, limit)
@@ -0,0 +1,216 @@
+"""
+Where finished traces go.
+
+Every trace is kept in an in-memory ring buffer of TRACING_BUFFER_TRACES, read
+by the admin endpoints. With TRACING_EXPORT_FILE or TRACING_OTLP_ENDPOINT set
+traces are also queued for `TraceExporter`, which every
+TRACING_EXPORT_INTERVAL seconds writes them as one OTLP/HTTP JSON export
+request: appended as a line to the file, and/or posted to the collector. The
+queue is bounded; when an export falls behind the oldest traces are dropped
+and counted rather than holding memory.
+"""
+import asyncio
+from collections import deque
+from contextlib import suppress
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, List, Optional
+
+import httpx
+import orjson
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.tracing.spans import Span, Trace
+
+settings = get_settings()
+
+EXPORT_TIMEOUT_SECONDS = 10
+
+
+class TraceBuffer:
+    def __init__(self, max_traces: int):
+        self.traces: Deque[Trace] = deque(maxlen=max_traces)
+
+    def add(self, trace: Trace):
+        self.traces.append(trace)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return next((trace for trace in reversed(self.traces) if trace.trace_id == trace_id), None)
+
+    def find(self, limit: int, min_duration_ms: float = 0, route: Optional[str] = None) -> List[Trace]:
+        """Most recent first, `route` matches root span names such as `GET /api/v1/vehicle/{vehicle_id}`."""
+        found = []
+        for trace in reversed(self.traces):
+            root = trace.root
+            if root.duration_ms < min_duration_ms or (route and route not in root.name):
+                continue
+            found.append(trace)
+            if len(found) == limit:
+                break
+        return found
+
+
+def format_time(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, timezone.utc).isoformat(timespec="microseconds")
+
+
+def summary(trace: Trace) -> dict:
+    root = trace.root
+    return {
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "start": format_time(root.start_ns),
+        "duration_ms": round(root.duration_ms, 3),
+        "status_code": root.attributes.get("http.status_code"),
+        "request_id": root.attributes.get("request_id"),
+        "error": root.error or next((span.error for span in trace.spans if span.error), None),
+        "spans": len(trace.spans),
+        "dropped_spans": trace.dropped_spans,
+    }
+
+
+def detail(trace: Trace) -> dict:
+    """The summary and every span, ordered by start, offsets in ms from the start of the root span."""
+    started = trace.root.start_ns
+    depths = {}
+    spans = []
+    for span in sorted(trace.spans, key=lambda span: span.start_ns):
+        depth = depths[span.span_id] = depths.get(span.parent_id, -1) + 1
+        spans.append({
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "depth": depth,
+            "offset_ms": round((span.start_ns - started) / 1e6, 3),
+            "duration_ms": round(span.duration_ms, 3),
+            "attributes": span.attributes,
+            "error": span.error,
+        })
+    return {**summary(trace), "span_list": spans}
+
+
+def otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_attributes(attributes: dict) -> List[dict]:
+    return [{"key": key, "value": otlp_value(value)} for key, value in attributes.items()]
+
+
+def otlp_span(span: Span) -> dict:
+    data = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": otlp_attributes(span.attributes),
+        "status": {"code": 2, "message": span.error} if span.error else {},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+def otlp_request(traces: List[Trace], service_name: str) -> dict:
+    """An OTLP `ExportTraceServiceRequest` in its JSON encoding."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": service_name})},
+            "scopeSpans": [{
+                "scope": {"name": "app.tracing"},
+                "spans": [otlp_span(span) for trace in traces for span in trace.spans],
+            }],
+        }],
+    }
+
+
+class TraceExporter:
+    def __init__(self, file_path: str, endpoint: str, interval: float, max_pending: int, service_name: str):
+        self.file_path = Path(file_path) if file_path else None
+        self.endpoint = endpoint or None
+        self.interval = interval
+        self.service_name = service_name
+        self.pending: Deque[Trace] = deque(maxlen=max_pending)
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def add(self, trace: Trace):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(trace)
+
+    async def run(self):
+        async with httpx.AsyncClient(timeout=EXPORT_TIMEOUT_SECONDS) as client:
+            try:
+                while True:
+                    await asyncio.sleep(self.interval)
+                    await self.flush(client)
+            finally:
+                with suppress(Exception):
+                    await asyncio.shield(self.flush(client))
+
+    async def flush(self, client: httpx.AsyncClient):
+        if not self.pending:
+            return
+        traces = list(self.pending)
+        self.pending.clear()
+        body = orjson.dumps(otlp_request(traces, self.service_name))
+        if self.file_path is not None:
+            try:
+                await asyncio.to_thread(self.append, body)
+            except OSError as e:
+                self.failed += len(traces)
+                logger.warning(f"Could not write traces to {self.file_path}: {e}")
+        if self.endpoint is not None:
+            try:
+                response = await client.post(self.endpoint, content=body, headers={"Content-Type": "application/json"})
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self.failed += len(traces)
+                logger.warning(f"Could not export {len(traces)} traces to {self.endpoint}: {e}")
+                return
+        self.exported += len(traces)
+
+    def append(self, body: bytes):
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.file_path.open("ab") as file:
+            file.write(body + b"\n")
+
+    def snapshot(self) -> dict:
+        return {
+            "file": str(self.file_path) if self.file_path else None,
+            "endpoint": self.endpoint,
+            "pending": len(self.pending),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+trace_buffer = TraceBuffer(settings.TRACING_BUFFER_TRACES)
+trace_exporter = (
+    TraceExporter(
+        settings.TRACING_EXPORT_FILE,
+        settings.TRACING_OTLP_ENDPOINT,
+        settings.TRACING_EXPORT_INTERVAL,
+        settings.TRACING_EXPORT_MAX_PENDING,
+        settings.TRACING_SERVICE_NAME,
+    )
+    if settings.TRACING_EXPORT_FILE or settings.TRACING_OTLP_ENDPOINT else None
+)
+
+
+def record_trace(trace: Trace):
+    trace_buffer.add(trace)
+    if trace_exporter is not None:
+        trace_exporter.add(trace)
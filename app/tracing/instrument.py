@@ -0,0 +1,106 @@
+"""Spans for routes, endpoints and SQL statements, added to existing objects without changing them."""
+import functools
+import inspect
+import re
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.context import span_ctx_var
+from app.tracing.spans import CLIENT, span
+
+MAX_STATEMENT_LENGTH = 2000
+SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([\w.\"]+)", re.IGNORECASE)
+
+
+def sql_span_name(statement: str) -> str:
+    operation = statement.split(None, 1)[0].upper() if statement.strip() else "SQL"
+    table = SQL_TABLE.search(statement)
+    return f"{operation} {table.group(1).strip(chr(34))}" if table else operation
+
+
+def register_sql_spans(engine: AsyncEngine):
+    # the statement is recorded without its parameters, they hold tenant data
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = span_ctx_var.get()
+        if parent is None or context is None:
+            return
+        context._trace_span = parent.child(
+            sql_span_name(statement),
+            {"db.system": "postgresql", "db.statement": statement[:MAX_STATEMENT_LENGTH], "db.executemany": executemany},
+            kind=CLIENT,
+        )
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        sql_span = getattr(context, "_trace_span", None)
+        if sql_span is not None:
+            sql_span.end()
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        sql_span = getattr(exception_context.execution_context, "_trace_span", None)
+        if sql_span is not None and sql_span.end_ns is None:
+            sql_span.fail(exception_context.original_exception)
+            sql_span.end()
+
+
+def traced_route(app: ASGIApp) -> ASGIApp:
+    """Span around a route: request parsing and dependencies, the endpoint, then response serialization."""
+
+    async def route_app(scope: Scope, receive: Receive, send: Send):
+        if span_ctx_var.get() is None:
+            await app(scope, receive, send)
+            return
+        with span("route") as route_span:
+            await app(scope, receive, send)
+        endpoint = next(
+            (child for child in reversed(route_span.trace.spans)
+             if child.parent_id == route_span.span_id and child.name.startswith("endpoint ")),
+            None,
+        )
+        if endpoint is not None and endpoint.end_ns is not None:
+            route_span.child("serialize", start_ns=endpoint.end_ns).end(route_span.end_ns)
+
+    return route_app
+
+
+def traced_endpoint(call):
+    name = f"endpoint {call.__name__}"
+
+    def dependencies_span():
+        # from the start of the route up to the endpoint: body parsing, validation and dependencies
+        route_span = span_ctx_var.get()
+        route_span.child("dependencies", start_ns=route_span.start_ns).end()
+
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            if span_ctx_var.get() is None:
+                return await call(*args, **kwargs)
+            dependencies_span()
+            with span(name):
+                return await call(*args, **kwargs)
+    else:
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            # runs in the threadpool with a copy of the request's context
+            if span_ctx_var.get() is None:
+                return call(*args, **kwargs)
+            dependencies_span()
+            with span(name):
+                return call(*args, **kwargs)
+
+    return endpoint
+
+
+def instrument_routes(app: FastAPI):
+    """Wrap the routes registered so far, call after `register_routes`."""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and inspect.isfunction(route.dependant.call):
+            route.app = traced_route(route.app)
+            route.dependant.call = traced_endpoint(route.dependant.call)
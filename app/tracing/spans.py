@@ -0,0 +1,134 @@
+"""
+Lightweight request tracing.
+
+`RequestIDMiddleware` starts a trace for a sampled request: a share of
+TRACING_SAMPLE_RATE of all requests, and every request whose W3C
+`traceparent` header is marked sampled, which keeps the caller's trace id.
+Spans are plain objects collected on their trace; the innermost open one is
+kept in `span_ctx_var`, so work done deeper down (repository calls, SQL run in
+SQLAlchemy's greenlets, child tasks) attaches to it.
+
+Requests that are not sampled leave `span_ctx_var` None and every
+instrumentation point returns after reading it, so tracing can stay on.
+"""
+import functools
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.core.context import span_ctx_var
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], kind: int = INTERNAL,
+                 attributes: Optional[dict] = None, start_ns: Optional[int] = None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str, attributes: Optional[dict] = None, kind: int = INTERNAL, start_ns: Optional[int] = None) -> "Span":
+        return self.trace.add(Span(self.trace, name, self.span_id, kind, attributes, start_ns))
+
+    def fail(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self, end_ns: Optional[int] = None):
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class Trace:
+    def __init__(self, trace_id: str, max_spans: int):
+        self.trace_id = trace_id
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+
+    def add(self, span: Span) -> Span:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+        return span
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+
+def parse_traceparent(header: str) -> Optional[tuple]:
+    """(trace id, parent span id, sampled) of a valid W3C `traceparent` header."""
+    match = TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def start_trace(name: str, traceparent: Optional[str], sample_rate: float, max_spans: int,
+                attributes: Optional[dict] = None) -> Optional[Span]:
+    """The root span of a new trace, None when the request is not sampled."""
+    parent = parse_traceparent(traceparent) if traceparent else None
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+        if not sampled:
+            return None
+    elif random.random() < sample_rate:
+        trace_id, parent_id = os.urandom(16).hex(), None
+    else:
+        return None
+    trace = Trace(trace_id, max_spans)
+    return trace.add(Span(trace, name, parent_id, SERVER, attributes))
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict] = None):
+    """Child span of the current one around the block, nothing when the request is not sampled."""
+    parent = span_ctx_var.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, attributes)
+    token = span_ctx_var.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.fail(e)
+        raise
+    finally:
+        span_ctx_var.reset(token)
+        child.end()
+
+
+def traced(method):
+    """Decorator for repository methods, spans are named `<Repository class>.<method>`."""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if span_ctx_var.get() is None:
+            return await method(self, *args, **kwargs)
+        with span(f"{type(self).__name__}.{method.__name__}"):
+            return await method(self, *args, **kwargs)
+
+    return wrapper
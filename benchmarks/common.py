@@ -0,0 +1,87 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The app reads its settings when `app.core.config` is first imported, so
+`configure_environment` has to run before anything under `app` is imported.
+"""
+import datetime
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+AUDIENCE = "api-navex-bench"
+ISSUER = "bench.navex.local"
+
+
+def configure_environment(database_url: str) -> str:
+    """
+    Point the app at `database_url` and a throwaway RSA key pair.
+
+    :param database_url: SQLAlchemy URL of the database to benchmark against.
+    :return: The private key (PEM) matching the configured public key.
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode("utf-8")
+    public_pem = key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode("utf-8")
+
+    key_dir = Path(tempfile.mkdtemp(prefix="navex-bench-"))
+    public_key_path = key_dir / "public.key"
+    public_key_path.write_text(public_pem)
+
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "AUTH_PUBLIC_KEY_FILE_PATH": str(public_key_path),
+        "AUTH_AUDIENCE": AUDIENCE,
+        "AUTH_ISSUER": ISSUER,
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        # measure the endpoints, not the per tenant limits
+        "RATE_LIMIT_ENABLED": os.environ.get("RATE_LIMIT_ENABLED", "false"),
+        "BULKHEAD_MAX_CONCURRENT": os.environ.get("BULKHEAD_MAX_CONCURRENT", "0"),
+    })
+    return private_pem
+
+
+def make_token(private_key: str, sub: str = "1", hours: int = 12, **claims) -> str:
+    now = datetime.datetime.now(datetime.UTC)
+    payload = {
+        "sub": sub,
+        "iss": ISSUER,
+        "aud": AUDIENCE,
+        "iat": now,
+        "exp": now + datetime.timedelta(hours=hours),
+        **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm="RS256")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def git_revision() -> dict:
+    """Commit of the working tree, stored with results so runs on different branches can be told apart."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
@@ -0,0 +1,137 @@
+"""
+Per-request overhead of the request id and JWT auth middleware.
+
+Calls a trivial Starlette endpoint in-process through the ASGI interface (no
+server, no database) bare, behind the previous `BaseHTTPMiddleware` versions of
+both middleware and behind the current pure ASGI ones, with a token that is
+already in the verified-token cache so the signature check does not dominate.
+
+Usage:
+    poetry run python -m benchmarks.middleware_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from benchmarks.common import configure_environment, make_token, percentile
+
+
+def legacy_middleware():
+    """The `BaseHTTPMiddleware` implementations the pure ASGI ones replaced."""
+    from fastapi.responses import JSONResponse
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from app.core.context import request_id_ctx_var
+    from app.core.tokens import token_verifier
+
+    class RequestIDMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            request_id = str(uuid.uuid4())
+            request_id_ctx_var.set(request_id)
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = request_id
+            return response
+
+    class JWTAuthMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            scheme, token = request.headers["Authorization"].split(" ")
+            payload = token_verifier.decode(token)
+            if scheme.lower() != "bearer" or not payload.get("sub"):
+                return JSONResponse(status_code=401, content={"error": "Unauthorized"})
+            request.state.user_id = payload["sub"]
+            request.state.user = payload
+            return await call_next(request)
+
+    return RequestIDMiddleware, JWTAuthMiddleware
+
+
+def build_app(middleware):
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    async def ping(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/ping", ping)])
+    for cls in middleware:
+        app.add_middleware(cls)
+    return app
+
+
+async def time_requests(app, token: str, count: int):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    status = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await app(dict(scope), receive, send)
+        samples.append((time.perf_counter() - started) * 1e6)
+    if set(status) != {200}:
+        raise RuntimeError(f"Unexpected statuses {set(status)}")
+    return samples
+
+
+async def run(args, private_key: str):
+    from app.middleware.auth_user_context import JWTAuthMiddlewareRS256
+    from app.middleware.request_id import RequestIDMiddleware
+
+    token = make_token(private_key)
+    legacy_request_id, legacy_auth = legacy_middleware()
+    stacks = {
+        "no middleware": [],
+        "BaseHTTPMiddleware": [legacy_request_id, legacy_auth],
+        "pure ASGI": [RequestIDMiddleware, JWTAuthMiddlewareRS256],
+    }
+
+    results = {}
+    for name, middleware in stacks.items():
+        app = build_app(middleware)
+        await time_requests(app, token, min(args.requests, 1000)) # warm up
+        results[name] = await time_requests(app, token, args.requests)
+
+    baseline = sum(results["no middleware"]) / args.requests
+    print(f"{'stack':<20}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'overhead us':>14}{'req/s':>10}")
+    for name, samples in results.items():
+        mean = sum(samples) / len(samples)
+        print(
+            f"{name:<20}{mean:>10.1f}{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}"
+            f"{mean - baseline:>14.1f}{1e6 / mean:>10,.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    # no database is touched, the URL only has to be valid
+    private_key = configure_environment("postgresql+asyncpg://bench@localhost/bench")
+    asyncio.run(run(args, private_key))
+
+
+if __name__ == "__main__":
+    main()
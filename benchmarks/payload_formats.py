@@ -0,0 +1,118 @@
+"""
+Payload size and encode / decode CPU per wire format.
+
+Compares JSON (the stdlib encoder FastAPI uses and orjson) with MessagePack,
+each plain and gzip compressed, for a single tracking ping request body and
+for tracking record list responses. No server or database is involved.
+
+Usage:
+    poetry run python -m benchmarks.payload_formats --rows 1000
+"""
+import argparse
+import datetime
+import gzip
+import json
+import random
+import time
+
+import msgpack
+import orjson
+
+from benchmarks.common import configure_environment, percentile
+
+
+def tracking_records(count: int, seed: int):
+    from app.schemas.serialization import serialize_rows
+    from app.schemas.vehicle_tracking import VehicleTrackingRead
+
+    rnd = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rows = [
+        {
+            "vehicle_id": f"V{i % 500:05d}",
+            "tracking_type": "GPS",
+            "provider_name": rnd.choice([None, "Telenity", "Traccar"]),
+            "device_id": f"IMEI{rnd.randint(10**14, 10**15 - 1)}",
+            "sim_number": None,
+            "latitude": rnd.uniform(8, 35),
+            "longitude": rnd.uniform(68, 97),
+            "speed": rnd.uniform(0, 90),
+            "accuracy": rnd.uniform(2, 25),
+            "last_update_time": now - datetime.timedelta(seconds=rnd.randint(0, 86400)),
+            "is_active": True,
+            "id": i + 1,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+    document = {"success": True, "code": 200, "message": None, "data": serialize_rows(VehicleTrackingRead, rows)}
+    # datetimes as the strings every format carries
+    return orjson.loads(orjson.dumps(document, option=orjson.OPT_UTC_Z))
+
+
+def ping(seed: int):
+    rnd = random.Random(seed)
+    return {"latitude": rnd.uniform(8, 35), "longitude": rnd.uniform(68, 97), "speed": rnd.uniform(0, 90), "accuracy": 4.5}
+
+
+def formats():
+    from app.schemas.serialization import encode_msgpack
+
+    def json_encode(data):
+        # what FastAPI's JSONResponse does
+        return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def orjson_encode(data):
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+
+    def gzipped(encode, decode):
+        return lambda data: gzip.compress(encode(data), compresslevel=6), lambda body: decode(gzip.decompress(body))
+
+    plain = {
+        "json": (json_encode, json.loads),
+        "orjson": (orjson_encode, orjson.loads),
+        "msgpack": (encode_msgpack, msgpack.unpackb),
+    }
+    result = dict(plain)
+    for name, (encode, decode) in plain.items():
+        result[f"{name}+gzip"] = gzipped(encode, decode)
+    return result
+
+
+def timed(fn, arg, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return percentile(samples, 50)
+
+
+def report(title: str, document, repeat: int):
+    reference = len(orjson.dumps(document))
+    print(f"\n{title}")
+    print(f"{'format':<16}{'bytes':>12}{'vs json':>10}{'encode us':>12}{'decode us':>12}")
+    for name, (encode, decode) in formats().items():
+        body = encode(document)
+        print(
+            f"{name:<16}{len(body):>12,}{len(body) / reference:>10.2f}"
+            f"{timed(encode, document, repeat):>12.1f}{timed(decode, body, repeat):>12.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # no database is touched, the URL only has to be valid
+    configure_environment("postgresql+asyncpg://bench@localhost/bench")
+    report("Tracking ping request body", ping(args.seed), args.repeat * 100)
+    report(f"Tracking list response, {args.rows:,} records", tracking_records(args.rows, args.seed), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
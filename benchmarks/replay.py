@@ -0,0 +1,282 @@
+"""
+Replay captured traffic against a running instance and compare latencies per route.
+
+Reads the files written with CAPTURE_ENABLED (see `app.capture.traffic`;
+a directory reads every `traffic-*.jsonl*` in it) and sends the requests again,
+in the order and at the pace they were captured (`--speed 1`), N times faster
+(`--speed 4`) or as fast as `--concurrency` connections allow (`--speed max`).
+Paced requests are sent open loop: a slow server does not slow the replay
+down, so falling behind shows up as latency and as the lateness reported at
+the end.
+
+Captures hold no credentials, so every request is sent with `--token`. Bodies
+are captured by shape only and replayed with generated values of the same
+types and list lengths; writes exercise the same routes and payloads, but may be
+rejected where the original values mattered (unique codes, foreign keys), so
+the status column shows how many replayed requests got the captured status
+class. Requests whose body was not captured (uploads, bodies above
+CAPTURE_MAX_BODY_BYTES) or whose path has a redacted parameter are skipped.
+
+Replayed writes are committed, so point the replay at an instance with a
+disposable copy of the data and CAPTURE_ENABLED off (or the replay is captured
+too). Captured durations are measured inside the server and replayed ones by
+the client, which adds the connection and HTTP overhead (about a millisecond
+on localhost); compare two replays for the effect of a change.
+
+Per route the captured and replayed p50 / p95 are printed and, with
+`--output`, saved with the commit. `--baseline` compares with an earlier replay
+instead of the capture and fails when a route's p95 grew by more than
+`--max-regression`.
+
+Usage:
+    poetry run python -m benchmarks.replay /tmp/navex-capture \\
+        --base-url http://127.0.0.1:8000 --token "$TOKEN" --speed 2 --output replay.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+import msgpack
+import orjson
+
+from benchmarks.common import git_revision, percentile
+from benchmarks.load_test import check_baseline
+
+REDACTED = "[redacted]" # as written by app.capture.traffic
+PATH_PARAM = re.compile(r"\{(\w+)(?::\w+)?\}")
+
+
+def read_captures(paths: List[str]) -> List[dict]:
+    files = []
+    for path in map(Path, paths):
+        files += sorted(path.glob("traffic-*.jsonl*")) if path.is_dir() else [path]
+    records = []
+    for file in files:
+        with file.open("rb") as lines:
+            records += [orjson.loads(line) for line in lines if line.strip()]
+    records.sort(key=lambda record: record["time"])
+    return records
+
+
+def generate(shape, sequence: int):
+    """A value of the captured shape, see `app.capture.traffic.value_shape`."""
+    if isinstance(shape, dict):
+        if "$list" in shape:
+            return [generate(shape["$list"], sequence) for _ in range(shape["$len"])] if shape["$list"] else []
+        return {key: generate(item, sequence) for key, item in shape.items()}
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return {
+        "str": f"replay-{sequence}",
+        "int": 1,
+        "float": 1.0,
+        "bool": False,
+        "datetime": now.isoformat(),
+        "date": now.date().isoformat(),
+    }.get(shape)
+
+
+def build_request(record: dict, sequence: int) -> Optional[dict]:
+    """Arguments for `httpx.AsyncClient.request`, None when the record cannot be replayed."""
+    params = record["path_params"]
+    if any(value == REDACTED for value in params.values()):
+        return None
+    try:
+        url = PATH_PARAM.sub(lambda match: str(params[match.group(1)]), record["route"])
+    except KeyError:
+        return None
+    headers = dict(record["headers"])
+    request = {
+        "method": record["method"],
+        "url": url,
+        "params": [(name, value) for name, value in record["query"] if value != REDACTED],
+        "headers": headers,
+    }
+    if record["body_bytes"]:
+        shape = record.get("body_shape")
+        if shape is None:
+            return None
+        body = generate(shape, sequence)
+        is_msgpack = "msgpack" in headers.get("content-type", "")
+        request["content"] = msgpack.packb(body) if is_msgpack else orjson.dumps(body)
+    return request
+
+
+class Replay:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.captured: Dict[str, List[float]] = defaultdict(list)
+        self.status_matches: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.lateness: List[float] = []
+        self.skipped = 0
+
+    async def send(self, record: dict, request: dict, due: Optional[float] = None):
+        route = f"{record['method']} {record['route']}"
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if due is not None:
+            self.lateness.append((started - due) * 1000)
+        try:
+            response = await self.client.request(**request)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return
+        self.latencies[route].append((loop.time() - started) * 1000)
+        self.captured[route].append(record["duration_ms"])
+        if response.status_code // 100 == record["status"] // 100:
+            self.status_matches[route] += 1
+
+    def requests(self, records: List[dict]) -> Iterator[tuple]:
+        for sequence, record in enumerate(records):
+            request = build_request(record, sequence)
+            if request is None:
+                self.skipped += 1
+                continue
+            yield record, request
+
+    async def paced(self, records: List[dict], speed: float):
+        loop = asyncio.get_running_loop()
+        started, first = loop.time(), records[0]["time"]
+        pending = set()
+        for record, request in self.requests(records):
+            due = started + (record["time"] - first) / speed
+            await asyncio.sleep(max(due - loop.time(), 0))
+            task = asyncio.create_task(self.send(record, request, due))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+
+    async def unpaced(self, records: List[dict], concurrency: int):
+        queue = self.requests(records)
+
+        async def worker():
+            for record, request in queue:
+                await self.send(record, request)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    def summarize(self) -> Dict[str, dict]:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            samples, captured = self.latencies[route], self.captured[route]
+            routes[route] = {
+                "requests": len(samples) + self.errors[route],
+                "errors": self.errors[route],
+                "status_match_rate": round(self.status_matches[route] / len(samples), 4) if samples else 0.0,
+                "captured_p50_ms": round(percentile(captured, 50), 2),
+                "captured_p95_ms": round(percentile(captured, 95), 2),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+            }
+        return routes
+
+
+def print_routes(routes: Dict[str, dict]):
+    print(
+        f"{'route':<52} {'requests':>9} {'errors':>7} {'status':>7} "
+        f"{'captured p50':>13} {'p50':>9} {'captured p95':>13} {'p95':>9} {'change':>7}"
+    )
+    for route, stats in routes.items():
+        before = stats["captured_p95_ms"]
+        change = f"{stats['p95_ms'] / before - 1:>+7.0%}" if before else f"{'-':>7}"
+        print(
+            f"{route:<52} {stats['requests']:>9,} {stats['errors']:>7,} {stats['status_match_rate']:>7.0%} "
+            f"{stats['captured_p50_ms']:>11.2f}ms {stats['p50_ms']:>7.2f}ms "
+            f"{before:>11.2f}ms {stats['p95_ms']:>7.2f}ms {change}"
+        )
+
+
+def parse_speed(value: str) -> float:
+    """A multiple of the captured pace, 0 for `max`."""
+    if value == "max":
+        return 0.0
+    speed = float(value.removesuffix("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("the speed must be positive or 'max'")
+    return speed
+
+
+async def main(args) -> int:
+    records = read_captures(args.captures)
+    if args.methods:
+        records = [record for record in records if record["method"] in args.methods]
+    if args.route:
+        records = [record for record in records if args.route in record["route"]]
+    records = records[:args.limit] if args.limit else records
+    if not records:
+        print("No captured requests to replay.")
+        return 1
+
+    span = records[-1]["time"] - records[0]["time"]
+    pace = "as fast as possible" if not args.speed else f"at {args.speed:g}x ({span / args.speed:.1f}s)"
+    print(f"Replaying {len(records):,} requests captured over {span:.1f}s {pace}...")
+    limits = httpx.Limits(max_connections=args.concurrency)
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=args.timeout) as client:
+        replay = Replay(client)
+        started = asyncio.get_running_loop().time()
+        if args.speed:
+            await replay.paced(records, args.speed)
+        else:
+            await replay.unpaced(records, args.concurrency)
+        elapsed = asyncio.get_running_loop().time() - started
+
+    routes = replay.summarize()
+    sent = sum(stats["requests"] for stats in routes.values())
+    print()
+    print_routes(routes)
+    print()
+    print(f"{sent:,} requests in {elapsed:.1f}s ({sent / elapsed:.1f}/s), {replay.skipped:,} skipped")
+    if replay.lateness:
+        print(f"Sent late by p50 {percentile(replay.lateness, 50):.2f}ms, p95 {percentile(replay.lateness, 95):.2f}ms")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                **git_revision(),
+                "measured_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "settings": {"captures": args.captures, "speed": args.speed or "max", "concurrency": args.concurrency},
+                "elapsed_seconds": round(elapsed, 2),
+                "skipped": replay.skipped,
+                "routes": routes,
+            }, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            violations = check_baseline(routes, json.load(file)["routes"], args.max_regression)
+        if violations:
+            print()
+            print("FAILED:")
+            for violation in violations:
+                print(f"  {violation}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="capture files or directories")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True, help="bearer token accepted by the instance")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="multiple of the captured pace, or 'max'")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections, and requests in flight with --speed max")
+    parser.add_argument("--methods", nargs="*", help="only these methods, e.g. GET")
+    parser.add_argument("--route", help="only routes containing this, e.g. /api/v1/trips")
+    parser.add_argument("--limit", type=int, help="replay the first N requests")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results of an earlier replay to compare p95 latencies with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth over the baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
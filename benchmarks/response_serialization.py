@@ -0,0 +1,143 @@
+"""
+Time to serialize a large list response through FastAPI's `response_model`
+path and through `fast_response`.
+
+Both routes return the same in-memory `Trip` objects (no database), declared
+as `APIResponse[List[TripRead]]`, and are called in-process through ASGI. The
+script checks that both produce identical bytes.
+
+Usage:
+    poetry run python -m benchmarks.response_serialization --rows 10000
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import time
+
+from benchmarks.common import configure_environment, percentile
+
+
+def build_trips(count: int, seed: int):
+    from app.db.models.trip import Trip
+
+    rnd = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    trips = []
+    for i in range(count):
+        created_at = now - datetime.timedelta(minutes=rnd.randint(0, 500_000), microseconds=rnd.randint(0, 999_999))
+        trips.append(Trip(
+            id=i + 1,
+            trip_code=f"TRIP-{i:08d}",
+            status=rnd.choice(["created", "in_transit", "completed"]),
+            trip_start_time=created_at,
+            trip_end_time=None if i % 3 else created_at + datetime.timedelta(hours=5),
+            origin_name=f"Origin {i % 97}",
+            destination_name=f"Destination {i % 89}",
+            vehicle_code=f"VC-{i % 5000:05d}",
+            vehicle_number=f"MH {i % 50:02d} AB {i % 9999:04d}",
+            tat=rnd.randint(1, 72),
+            driver_name=f"Driver {i % 700}",
+            driver_number=f"98{rnd.randint(10_000_000, 99_999_999)}",
+            started_by="bench",
+            stopped_by=None,
+            created_by="bench",
+            updated_by=None,
+            client_name=rnd.choice([None, "Acme Logistics", "Zeta Freight"]),
+            driver_consent_status=rnd.choice([None, "approved"]),
+            shipment_codes=f"SHP-{i}",
+            comments=None,
+            tenant=f"tenant-{i % 5}",
+            total_distance=rnd.uniform(1, 2000),
+            total_trip_kms=rnd.uniform(1, 2000),
+            total_time=None if i % 4 == 0 else rnd.uniform(1, 100),
+            created_at=created_at,
+            updated_at=created_at,
+        ))
+    return trips
+
+
+def build_app(trips):
+    from typing import List
+
+    from fastapi import FastAPI
+
+    from app.schemas.response import APIResponse
+    from app.schemas.serialization import fast_response, serialize_rows
+    from app.schemas.trip import TripRead
+
+    app = FastAPI()
+
+    @app.get("/validated", response_model=APIResponse[List[TripRead]])
+    async def validated():
+        return APIResponse(success=True, code=200, data=trips)
+
+    @app.get("/fast", response_model=APIResponse[List[TripRead]])
+    async def fast():
+        return fast_response(serialize_rows(TripRead, trips))
+
+    return app
+
+
+async def call(app, path: str) -> bytes:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def run(args):
+    trips = build_trips(args.rows, args.seed)
+    app = build_app(trips)
+
+    validated, fast = await call(app, "/validated"), await call(app, "/fast")
+    if validated != fast:
+        raise RuntimeError("Responses differ")
+    print(f"{args.rows:,} trips, {len(fast) / 1024 / 1024:.1f} MiB per response, bodies identical")
+
+    print(f"{'path':<12}{'p50 ms':>10}{'p99 ms':>10}{'rows/s':>14}")
+    for path in ("/validated", "/fast"):
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            await call(app, path)
+            samples.append((time.perf_counter() - started) * 1000)
+        p50 = percentile(samples, 50)
+        print(f"{path:<12}{p50:>10.1f}{percentile(samples, 99):>10.1f}{args.rows / p50 * 1000:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # no database is touched, the URL only has to be valid
+    configure_environment("postgresql+asyncpg://bench@localhost/bench")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
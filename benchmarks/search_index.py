@@ -0,0 +1,92 @@
+"""
+Latency of the in-memory search index on a large synthetic tenant.
+
+Builds one tenant's index in-process (no database) from synthetic vehicle-like
+records, then times prefix, fuzzy and miss queries plus incremental updates.
+
+Usage:
+    poetry run python -m benchmarks.search_index --records 500000
+"""
+import argparse
+import random
+import string
+import resource
+import time
+
+from benchmarks.common import percentile
+
+STATES = ["MH", "KA", "DL", "GJ", "TN", "UP", "RJ", "WB", "HR", "PB"]
+CITIES = [
+    "Mumbai", "Pune", "Nagpur", "Bengaluru", "Mysuru", "Delhi", "Ahmedabad", "Surat",
+    "Chennai", "Lucknow", "Jaipur", "Kolkata", "Gurugram", "Ludhiana", "Nashik",
+]
+
+
+def build_records(count: int, seed: int):
+    rnd = random.Random(seed)
+    for i in range(count):
+        number = f"{rnd.choice(STATES)} {rnd.randint(1, 99):02d} {''.join(rnd.choices(string.ascii_uppercase, k=2))} {rnd.randint(1, 9999):04d}"
+        name = f"{rnd.choice(CITIES)} {rnd.choice(['Hub', 'Depot', 'Yard', 'Warehouse'])} {i}"
+        yield i, {"name": name, "number": number}
+
+
+def time_queries(index, queries, limit, repeat):
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            index.search("bench", query, limit)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main(args):
+    from app.search.index import TenantSearchIndex
+
+    records = list(build_records(args.records, args.seed))
+    index = TenantSearchIndex(("name", "number"))
+
+    started = time.perf_counter()
+    for id, values in records:
+        index.upsert("bench", id, values, bulk=True)
+    index.finish_bulk()
+    build_seconds = time.perf_counter() - started
+    max_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Indexed {args.records:,} records in {build_seconds:.1f}s, process max RSS {max_rss_mib:,.0f} MiB")
+
+    rnd = random.Random(args.seed + 1)
+    sample = [values for _, values in rnd.sample(records, 200)]
+    groups = {
+        "short prefix (1-2 chars)": [values["number"][:rnd.randint(1, 2)] for values in sample],
+        "prefix (number)": [values["number"][:rnd.randint(4, 9)] for values in sample],
+        "prefix (word)": [values["name"].split()[1][:4] for values in sample],
+        "exact": [values["number"] for values in sample],
+        "fuzzy (typo)": [values["name"].split()[0][:-2] + "xq" for values in sample],
+        "miss": ["zzqx" + str(i) for i in range(len(sample))],
+    }
+
+    print()
+    print(f"{'query':<26} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for label, queries in groups.items():
+        samples = time_queries(index, queries, args.limit, args.repeat)
+        print(
+            f"{label:<26} {percentile(samples, 50):>6.3f}ms {percentile(samples, 95):>6.3f}ms "
+            f"{percentile(samples, 99):>6.3f}ms {max(samples):>6.3f}ms"
+        )
+
+    samples = []
+    for id, values in records[:1000]:
+        started = time.perf_counter()
+        index.upsert("bench", id, {"name": values["name"] + " updated", "number": values["number"]})
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"{'upsert':<26} {percentile(samples, 50):>6.3f}ms {percentile(samples, 95):>6.3f}ms "
+          f"{percentile(samples, 99):>6.3f}ms {max(samples):>6.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())